@@ -22,4 +22,6 @@ except Exception as e:
     raise e
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    # Tables, hypertables, compression and retention tiers (see api/schema.py)
+    from api.schema import apply_schema
+    apply_schema(engine)
\ No newline at end of file
@@ -1,17 +1,18 @@
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from .database import engine, Base, init_db
-from .routes import heart_routes
-
-# Create tables on module load
-Base.metadata.create_all(bind=engine)
+from .database import init_db
+from .routes import heart_routes, admin_routes
+from .services.alert_stream import hub
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Starting the Digital Twin Brain (API Mode)...")
     init_db()
+    hub.start(asyncio.get_running_loop())
     yield
     print("🛑 Shutting down API...")
+    hub.stop()
 
 app = FastAPI(title="Heart Digital Twin", lifespan=lifespan)
 
@@ -23,4 +24,5 @@ def read_root():
         "mode": "production_data_monitoring"
     }
 
-app.include_router(heart_routes.router)
\ No newline at end of file
+app.include_router(heart_routes.router)
+app.include_router(admin_routes.router)
\ No newline at end of file
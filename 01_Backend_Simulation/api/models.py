@@ -6,6 +6,7 @@ class HeartLog(Base):
     __tablename__ = "heart_metrics"
 
     time = Column(DateTime(timezone=True), primary_key=True, default=datetime.datetime.utcnow)
+    twin_id = Column(String(64), primary_key=True, default="default") # Compression segment
     bpm = Column(Float, nullable=False)
     trimp = Column(Float)
     eccentric_load = Column(Float, default=0.0)
@@ -0,0 +1,26 @@
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from api.services.profiler import profiler, ProfilerBusy, PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS
+
+# Optional shared secret for the admin routes (unset = open, as in the dev compose)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+def require_admin(x_admin_token: str = Header(None)):
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@router.post("/profile", response_class=PlainTextResponse)
+def profile_api(seconds: float = Query(5.0, gt=0, le=PROFILER_MAX_SECONDS),
+                interval_ms: float = Query(PROFILER_INTERVAL_MS, ge=0.5, le=1000)):
+    """Sample every thread of the API for `seconds`; collapsed stacks for flamegraph.pl / speedscope."""
+    try:
+        result = profiler.profile(seconds, interval_ms)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return PlainTextResponse(result["collapsed"], headers={
+        "X-Profile-Samples": str(result["samples"]),
+        "X-Profile-Seconds": str(result["seconds"]),
+    })
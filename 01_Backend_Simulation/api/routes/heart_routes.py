@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from api.database import SessionLocal
 from api.models import HeartLog, SimulationState
+from api.services.history_service import get_history
+from api.services.export_service import stream_export, MEDIA_TYPES
+from api.services.alert_stream import hub
+from api.services.simulation_service import forecast, ENSEMBLE_MAX_MEMBERS
+from datetime import datetime, timezone
 import asyncio
 
 router = APIRouter()
@@ -13,12 +19,55 @@ def get_db():
 
 # HTTP ROUTES
 @router.get("/metrics")
-def get_metrics(db: Session = Depends(get_db)):
-    last_log = db.query(HeartLog).order_by(HeartLog.time.desc()).first()
+def get_metrics(twin_id: str = None, db: Session = Depends(get_db)):
+    query = db.query(HeartLog)
+    if twin_id:
+        query = query.filter(HeartLog.twin_id == twin_id)
+    last_log = query.order_by(HeartLog.time.desc()).first()
     if not last_log:
         raise HTTPException(status_code=404, detail="No heart data found")
     return last_log
 
+@router.get("/history")
+def get_metrics_history(start: datetime, end: datetime, step: float = 1.0, twin_id: str = None,
+                        db: Session = Depends(get_db)):
+    """Regular series rebuilt from keyframe/deadband rows (sample-and-hold)."""
+    if end <= start or step <= 0:
+        raise HTTPException(status_code=400, detail="end must be after start and step > 0")
+    if (end - start).total_seconds() / step > 86400:
+        raise HTTPException(status_code=400, detail="Range too large (max 86400 points)")
+
+    series = get_history(db, start, end, step, twin_id)
+    if not series:
+        raise HTTPException(status_code=404, detail="No heart data found")
+    return series
+
+@router.get("/export")
+def export_metrics(start: datetime = Query(..., alias="from"), end: datetime = Query(..., alias="to"),
+                   format: str = Query("parquet", pattern="^(parquet|csv)$"), twin_id: str = None):
+    """Bulk export streamed in chunks (COPY for CSV, server-side cursor for Parquet)."""
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+
+    filename = f"heart_metrics_{start:%Y%m%dT%H%M%S}_{end:%Y%m%dT%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_export(format, start, end, twin_id),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/forecast/{scenario}")
+def forecast_session(scenario: str = Path(..., pattern=r"^[A-Za-z0-9_-]+$"),
+                     members: int = Query(1000, ge=1, le=ENSEMBLE_MAX_MEMBERS),
+                     step: float = Query(1.0, gt=0), seed: int = None):
+    """Likely HR / TRIMP / HRRPT range of a planned session (scenarios/<scenario>.json)."""
+    try:
+        return forecast(scenario, members, step, seed)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Unknown scenario: {scenario}")
+
 @router.post("/set_intensity/{intensity}")
 def set_intensity(intensity: float, db: Session = Depends(get_db)):
     if not (0 <= intensity <= 1.0):
@@ -61,4 +110,36 @@ async def websocket_metrics(websocket: WebSocket):
             await asyncio.sleep(0.1) 
             
     except WebSocketDisconnect:
-        print("❌ Unity is disconnected.")
\ No newline at end of file
+        print("❌ Unity is disconnected.")
+
+#  WEBSOCKET FOR LIVE METRICS (every engine tick, pushed through the bus, no polling)
+@router.websocket("/ws/live")
+async def websocket_live(websocket: WebSocket, twin_id: str = None):
+    await websocket.accept()
+    queue = hub.subscribe("metrics")
+    try:
+        while True:
+            row = await queue.get()
+            if twin_id and row.get("twin_id") != twin_id:
+                continue
+            await websocket.send_json(row)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(queue)
+
+#  WEBSOCKET FOR ALERTS (pushed by the engine, no polling)
+@router.websocket("/ws/alerts")
+async def websocket_alerts(websocket: WebSocket, twin_id: str = None):
+    await websocket.accept()
+    queue = hub.subscribe()
+    try:
+        while True:
+            event = await queue.get()
+            if twin_id and event.get("twin_id") != twin_id:
+                continue
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(queue)
@@ -0,0 +1,122 @@
+import os
+from datetime import timedelta
+from sqlalchemy import text
+from api.database import engine, Base
+from api import models  # noqa: F401  (registers the tables on Base.metadata)
+
+# Storage tiers (all configurable from the environment)
+EXPECTED_TWINS = int(os.getenv("EXPECTED_TWINS", "1"))
+TICK_HZ = float(os.getenv("TICK_HZ", "1.0"))
+CHUNK_TARGET_MB = float(os.getenv("CHUNK_TARGET_MB", "256"))
+COMPRESS_AFTER_DAYS = int(os.getenv("COMPRESS_AFTER_DAYS", "7"))
+RAW_RETENTION_DAYS = int(os.getenv("RAW_RETENTION_DAYS", "30"))
+
+# Average on-disk size of one uncompressed heart_metrics row (heap + time index)
+HEART_ROW_BYTES = 160
+
+# Arbitrary constant so API and engine never migrate at the same time
+SCHEMA_LOCK_ID = 52_027
+
+MIN_CHUNK = timedelta(hours=1)
+MAX_CHUNK = timedelta(days=7)
+
+
+def chunk_interval_for_ingest(rows_per_second: float, row_bytes: int = HEART_ROW_BYTES,
+                              target_mb: float = CHUNK_TARGET_MB) -> timedelta:
+    """
+    Size the chunks so that one chunk holds ~target_mb of raw data
+    (Timescale guideline: recent chunks + indexes must fit in memory).
+    """
+    if rows_per_second <= 0:
+        return MAX_CHUNK
+    seconds = (target_mb * 1024 * 1024) / (rows_per_second * row_bytes)
+    return max(MIN_CHUNK, min(MAX_CHUNK, timedelta(seconds=seconds)))
+
+
+def _interval(td: timedelta) -> str:
+    return f"{int(td.total_seconds())} seconds"
+
+
+def _compression_enabled(conn, table):
+    return conn.execute(text(
+        "SELECT compression_enabled FROM timescaledb_information.hypertables "
+        "WHERE hypertable_name = :t"), {"t": table}).scalar()
+
+
+def _setup_hypertable(conn, table, chunk, segment_by=None):
+    conn.execute(text(
+        f"SELECT create_hypertable('{table}', 'time', chunk_time_interval => INTERVAL '{_interval(chunk)}', "
+        "if_not_exists => TRUE, migrate_data => TRUE)"))
+    # Applies to new chunks when the ingest rate (and therefore the interval) changes
+    conn.execute(text(f"SELECT set_chunk_time_interval('{table}', INTERVAL '{_interval(chunk)}')"))
+
+    if not _compression_enabled(conn, table):
+        options = "timescaledb.compress, timescaledb.compress_orderby = 'time DESC'"
+        if segment_by:
+            options += f", timescaledb.compress_segmentby = '{segment_by}'"
+        conn.execute(text(f"ALTER TABLE {table} SET ({options})"))
+
+    # remove + add: a changed N in the environment replaces the old policy
+    conn.execute(text(f"SELECT remove_compression_policy('{table}', if_exists => TRUE)"))
+    conn.execute(text(f"SELECT add_compression_policy('{table}', INTERVAL '{COMPRESS_AFTER_DAYS} days')"))
+    conn.execute(text(f"SELECT remove_retention_policy('{table}', if_exists => TRUE)"))
+    conn.execute(text(f"SELECT add_retention_policy('{table}', INTERVAL '{RAW_RETENTION_DAYS} days')"))
+
+
+def _setup_rollups(conn):
+    """1-minute rollup per twin. It has no retention policy: rollups are kept forever."""
+    conn.execute(text("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS heart_metrics_1m
+        WITH (timescaledb.continuous) AS
+        SELECT time_bucket(INTERVAL '1 minute', time) AS bucket,
+               twin_id,
+               avg(bpm)            AS bpm_avg,
+               min(bpm)            AS bpm_min,
+               max(bpm)            AS bpm_max,
+               max(trimp)          AS trimp,
+               max(eccentric_load) AS eccentric_load,
+               avg(intensity)      AS intensity_avg,
+               avg(slope)          AS slope_avg,
+               count(*)            AS samples
+        FROM heart_metrics
+        GROUP BY bucket, twin_id
+        WITH NO DATA
+    """))
+    # The refresh window stays far inside the raw retention, so dropped raw
+    # chunks never erase materialized minutes
+    conn.execute(text("""
+        SELECT add_continuous_aggregate_policy('heart_metrics_1m',
+            start_offset => INTERVAL '3 hours',
+            end_offset => INTERVAL '1 minute',
+            schedule_interval => INTERVAL '5 minutes',
+            if_not_exists => TRUE)
+    """))
+
+
+def apply_schema(bind=engine):
+    """Idempotent schema step owned by the application (tables, hypertables, tiers)."""
+    rows_per_second = EXPECTED_TWINS * TICK_HZ
+    chunk = chunk_interval_for_ingest(rows_per_second)
+
+    # Continuous aggregates can't be created inside a transaction block
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": SCHEMA_LOCK_ID})
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+            Base.metadata.create_all(bind=conn)
+            # Databases created by the old init scripts don't have the twin column yet
+            conn.execute(text(
+                "ALTER TABLE heart_metrics ADD COLUMN IF NOT EXISTS twin_id VARCHAR(64) NOT NULL DEFAULT 'default'"))
+
+            _setup_hypertable(conn, "heart_metrics", chunk, segment_by="twin_id")
+            _setup_hypertable(conn, "environmental_metrics", MAX_CHUNK)
+            _setup_rollups(conn)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCHEMA_LOCK_ID})
+
+    print(f"🗄️  Schema ready: chunk={chunk}, compress after {COMPRESS_AFTER_DAYS}d, "
+          f"raw retention {RAW_RETENTION_DAYS}d, rollups kept forever.")
+
+
+if __name__ == "__main__":
+    apply_schema()
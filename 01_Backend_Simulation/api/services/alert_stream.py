@@ -0,0 +1,58 @@
+import os
+import sys
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../05_Data_Ingestion')))
+from message_bus import build_transport, decode
+
+MQTT_HOST = os.getenv("MQTT_HOST", "mqtt_broker")
+ALERT_SUBSCRIPTION = "heart/alerts/#"
+METRICS_SUBSCRIPTION = "heart/metrics/#"
+
+# Per-client buffer: a slow WebSocket loses its oldest alerts, never blocks the others
+CLIENT_QUEUE_SIZE = 100
+
+
+class AlertHub:
+    """Single bus subscription per stream (alerts, live metrics) fanned out to every WebSocket client of the API."""
+    def __init__(self, transport=None):
+        self.loop = None
+        self.clients = {"alerts": set(), "metrics": set()}
+        self.transport = transport or build_transport("HeartBrain_Alerts", host=MQTT_HOST)
+        self.transport.subscribe(ALERT_SUBSCRIPTION, self._receiver("alerts"), qos=1)
+        self.transport.subscribe(METRICS_SUBSCRIPTION, self._receiver("metrics"))
+
+    def start(self, loop=None):
+        self.loop = loop or self.loop
+        # wait=False: the API boots even if the broker is still down
+        self.transport.start(wait=False)
+
+    def stop(self):
+        self.transport.stop()
+
+    def _receiver(self, stream):
+        def on_message(topic, payload):
+            event = decode(payload)
+            if isinstance(event, dict) and self.loop is not None:
+                self.loop.call_soon_threadsafe(self._dispatch, stream, event)
+        return on_message
+
+    def _dispatch(self, stream, event):
+        for queue in self.clients[stream]:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def subscribe(self, stream="alerts"):
+        # Loop of the server, if start() was called before it existed (embedded runs)
+        self.loop = self.loop or asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.clients[stream].add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        for clients in self.clients.values():
+            clients.discard(queue)
+
+
+hub = AlertHub()
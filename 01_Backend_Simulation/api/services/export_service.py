@@ -0,0 +1,176 @@
+import queue
+import threading
+import argparse
+from datetime import datetime, timezone
+import pyarrow as pa
+import pyarrow.parquet as pq
+from api.database import engine
+
+EXPORT_COLUMNS = ("time", "twin_id", "bpm", "trimp", "eccentric_load", "hrr", "hrrpt",
+                  "sd1", "sd2", "zone", "intensity", "slope", "color")
+
+PARQUET_SCHEMA = pa.schema([
+    ("time", pa.timestamp("us", tz="UTC")),
+    ("twin_id", pa.string()),
+    ("bpm", pa.float64()),
+    ("trimp", pa.float64()),
+    ("eccentric_load", pa.float64()),
+    ("hrr", pa.float64()),
+    ("hrrpt", pa.float64()),
+    ("sd1", pa.float64()),
+    ("sd2", pa.float64()),
+    ("zone", pa.string()),
+    ("intensity", pa.float64()),
+    ("slope", pa.float64()),
+    ("color", pa.string()),
+])
+
+# One Parquet row group / one server-side cursor fetch
+CHUNK_ROWS = 100_000
+# Bounded hand-off between COPY and the HTTP response (~64 KB blocks)
+PIPE_DEPTH = 32
+
+
+def _select_sql(cursor, start, end, twin_id=None):
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM heart_metrics WHERE time >= %s AND time < %s"
+    params = [start, end]
+    if twin_id:
+        sql += " AND twin_id = %s"
+        params.append(twin_id)
+    sql += " ORDER BY time"
+    return cursor.mogrify(sql, params).decode()
+
+
+class _CopyPipe:
+    """File-like sink for copy_expert that hands blocks to a consumer through a bounded queue."""
+    def __init__(self, depth=PIPE_DEPTH):
+        self.blocks = queue.Queue(maxsize=depth)
+        self.closed = threading.Event()
+
+    def write(self, data):
+        # Back-pressure: COPY waits while the client is slower than the database
+        while True:
+            if self.closed.is_set():
+                raise IOError("export cancelled by the consumer")
+            try:
+                self.blocks.put(bytes(data), timeout=0.5)
+                return len(data)
+            except queue.Full:
+                continue
+
+
+def iter_csv(raw_conn, start, end, twin_id=None):
+    """Stream `COPY ... TO STDOUT` as CSV blocks; memory is bounded by the pipe depth."""
+    cursor = raw_conn.cursor()
+    sql = f"COPY ({_select_sql(cursor, start, end, twin_id)}) TO STDOUT WITH CSV HEADER"
+    pipe = _CopyPipe()
+    done = object()
+
+    def producer():
+        try:
+            cursor.copy_expert(sql, pipe)
+            result = done
+        except Exception as e:
+            result = e
+        while not pipe.closed.is_set():
+            try:
+                pipe.blocks.put(result, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            block = pipe.blocks.get()
+            if block is done:
+                break
+            if isinstance(block, Exception):
+                raise block
+            yield block
+    finally:
+        pipe.closed.set()
+        thread.join()
+        cursor.close()
+
+
+class _ChunkSink:
+    """Write-only file object: ParquetWriter output is drained after every row group."""
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def iter_parquet(raw_conn, start, end, twin_id=None, chunk_rows=CHUNK_ROWS):
+    """Stream Parquet bytes, one row group per server-side cursor fetch."""
+    # Named cursor = server-side: Postgres keeps the result set, we pull chunk_rows at a time
+    cursor = raw_conn.cursor(name="heart_metrics_export")
+    cursor.itersize = chunk_rows
+    try:
+        cursor.execute(_select_sql(cursor, start, end, twin_id))
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, PARQUET_SCHEMA, compression="zstd")
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, PARQUET_SCHEMA)],
+                schema=PARQUET_SCHEMA)
+            writer.write_batch(batch, row_group_size=chunk_rows)
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    finally:
+        cursor.close()
+
+
+EXPORTERS = {"csv": iter_csv, "parquet": iter_parquet}
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def stream_export(fmt, start, end, twin_id=None):
+    """Generator for StreamingResponse / CLI: owns one raw DBAPI connection."""
+    raw_conn = engine.raw_connection()
+    try:
+        for block in EXPORTERS[fmt](raw_conn, start, end, twin_id):
+            if block:
+                yield block
+    finally:
+        raw_conn.close()
+
+
+def _parse_time(value):
+    t = datetime.fromisoformat(value)
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export heart_metrics to CSV/Parquet")
+    parser.add_argument("--from", dest="start", required=True, help="ISO start (inclusive)")
+    parser.add_argument("--to", dest="end", required=True, help="ISO end (exclusive)")
+    parser.add_argument("--format", choices=sorted(EXPORTERS), default="parquet")
+    parser.add_argument("--twin-id", default=None)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    written = 0
+    with open(args.output, "wb") as f:
+        for block in stream_export(args.format, _parse_time(args.start), _parse_time(args.end), args.twin_id):
+            f.write(block)
+            written += len(block)
+    print(f"💾 Exported {written / 1024 / 1024:.1f} MB to {args.output}")
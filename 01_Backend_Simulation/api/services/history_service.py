@@ -0,0 +1,65 @@
+import os
+from datetime import timedelta, timezone
+from sqlalchemy.orm import Session
+from api.models import HeartLog
+
+# Columns returned by the history endpoint (same contract as /metrics)
+HISTORY_FIELDS = ("bpm", "trimp", "eccentric_load", "hrr", "hrrpt", "sd1", "sd2",
+                  "zone", "intensity", "slope", "color")
+
+# The keyframe policy writes a row at least every KEYFRAME_SECONDS while the engine runs:
+# a row older than that (plus a margin) means the engine was down, not that nothing changed
+KEYFRAME_SECONDS = float(os.getenv("KEYFRAME_SECONDS", "60"))
+HOLD_MARGIN_SECONDS = float(os.getenv("HOLD_MARGIN_SECONDS", "5"))
+MAX_HOLD_SECONDS = KEYFRAME_SECONDS + HOLD_MARGIN_SECONDS
+
+
+def reconstruct_series(rows, start, end, step: float = 1.0, max_hold: float = MAX_HOLD_SECONDS):
+    """
+    Sample-and-hold reconstruction of a sparse (keyframe + deadband) series.
+    `rows` must be sorted by time; the last row before `start` seeds the hold.
+    A row is held for at most `max_hold` seconds: past that there is a gap (no points).
+    Works unchanged on dense (one row per tick) data.
+    """
+    series = []
+    idx = 0
+    current = None
+    t = start
+    delta = timedelta(seconds=step)
+    hold = timedelta(seconds=max_hold)
+
+    while t < end:
+        while idx < len(rows) and rows[idx].time <= t:
+            current = rows[idx]
+            idx += 1
+        if current is not None and t - current.time <= hold:
+            point = {"time": t}
+            for field in HISTORY_FIELDS:
+                point[field] = getattr(current, field)
+            series.append(point)
+        t += delta
+
+    return series
+
+
+def get_history(db: Session, start, end, step: float = 1.0, twin_id: str = None):
+    """Return the reconstructed [start, end) series from heart_metrics."""
+    # heart_metrics stores TIMESTAMPTZ: naive query bounds are taken as UTC
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+
+    query = db.query(HeartLog)
+    if twin_id:
+        query = query.filter(HeartLog.twin_id == twin_id)
+
+    seed = (query
+            .filter(HeartLog.time <= start)
+            .order_by(HeartLog.time.desc())
+            .first())
+    rows = (query
+            .filter(HeartLog.time > start, HeartLog.time < end)
+            .order_by(HeartLog.time.asc())
+            .all())
+    if seed is not None:
+        rows.insert(0, seed)
+    return reconstruct_series(rows, start, end, step)
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+# On-demand sampling profiler: while idle there is no thread, no hook and nothing recorded
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+
+class ProfilerBusy(RuntimeError):
+    """A profile is already running in this process."""
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of every thread (sys._current_frames) every `interval_ms`
+    from a short-lived thread and aggregates them as collapsed stacks:
+    "thread;outer (file:line);...;inner (file:line) count", the input of flamegraph.pl / speedscope.
+    """
+    def __init__(self, max_seconds=PROFILER_MAX_SECONDS):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._labels = {}
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _sample(self, stacks, skip_ident):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_ident:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(self._label(frame.f_code))
+                frame = frame.f_back
+            frames.append(names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(frames))] += 1
+
+    def profile(self, seconds, interval_ms=PROFILER_INTERVAL_MS):
+        """Sample all threads for `seconds` (blocking). Raises ProfilerBusy if one is already running."""
+        seconds = max(0.0, min(float(seconds), self.max_seconds))
+        interval = max(float(interval_ms), 0.5) / 1000.0
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            stacks = Counter()
+            result = {}
+
+            def sampler():
+                me = threading.get_ident()
+                start = time.perf_counter()
+                deadline, samples = start + seconds, 0
+                next_at = start
+                while next_at < deadline:
+                    self._sample(stacks, me)
+                    samples += 1
+                    next_at += interval
+                    time.sleep(max(0.0, next_at - time.perf_counter()))
+                result.update(samples=samples, elapsed_s=time.perf_counter() - start)
+
+            # Own thread: the caller may be one of the sampled threads (paho loop, API worker)
+            thread = threading.Thread(target=sampler, daemon=True, name="sampling-profiler")
+            thread.start()
+            thread.join()
+            self._labels.clear()
+        finally:
+            self._lock.release()
+
+        return {
+            "seconds": round(result["elapsed_s"], 3),
+            "interval_ms": interval * 1000.0,
+            "samples": result["samples"],
+            "collapsed": collapse(stacks),
+        }
+
+    @property
+    def running(self):
+        return self._lock.locked()
+
+
+def collapse(stacks):
+    """Counter of stacks -> collapsed-stack text, heaviest first."""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,17 @@
+import os
+from simulation_engine.scenario_runner import forecast_scenario, load_scenario
+from core_logic.ensemble import BANDS, PERCENTILES
+
+# Planned-session forecasts for the coaches: ensemble bands, no database
+ENSEMBLE_MAX_MEMBERS = int(os.getenv("ENSEMBLE_MAX_MEMBERS", "5000"))
+
+
+def forecast(scenario_name, members=1000, step=1.0, seed=None):
+    """p5 / p50 / p95 of bpm, TRIMP and HRRPT, one point every `step` seconds."""
+    scenario = load_scenario(scenario_name)
+    bands = forecast_scenario(scenario, members, seed=seed)
+    stride = max(1, int(round(step / scenario.dt)))
+    result = {"scenario": scenario.name, "members": members, "t": bands["t"][::stride].tolist()}
+    for name in BANDS:
+        result[name] = {f"p{p}": bands[name][j, ::stride].round(2).tolist() for j, p in enumerate(PERCENTILES)}
+    return result
@@ -0,0 +1,53 @@
+import sys
+import os
+import time
+import random
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core_logic.physio_model import HeartModel
+from simulation_engine.alerts import AlertEngine
+
+TWINS = int(os.getenv("BENCH_TWINS", "10000"))
+TICKS = int(os.getenv("BENCH_TICKS", "30"))
+
+
+def record_metric_streams(n_streams=50, ticks=TICKS):
+    """Real model output (intervals + recoveries), shared round-robin by the twins."""
+    streams = []
+    for s in range(n_streams):
+        model = HeartModel(age=20 + s % 40, sex='male', resting_hr=55, max_hr=190)
+        stream = []
+        for t in range(ticks):
+            intensity = 1.0 if (t + s) % 20 < 12 else 0.0
+            stream.append(model.simulate_step(intensity=intensity, dt=1.0))
+        streams.append(stream)
+    return streams
+
+
+def run_benchmark():
+    streams = record_metric_streams()
+    engine = AlertEngine()
+    twin_ids = [f"twin_{i}" for i in range(TWINS)]
+    random.seed(7)
+
+    events = 0
+    start = time.perf_counter()
+    worst_tick = 0.0
+    for t in range(TICKS):
+        tick_start = time.perf_counter()
+        for i, twin_id in enumerate(twin_ids):
+            events += len(engine.evaluate(twin_id, streams[i % len(streams)][t], float(t)))
+        worst_tick = max(worst_tick, time.perf_counter() - tick_start)
+    elapsed = time.perf_counter() - start
+
+    evaluations = TWINS * TICKS
+    print(f"🚨 {len(engine.rules)} rules x {TWINS} twins x {TICKS} ticks")
+    print(f"   ⚡ {evaluations / elapsed:,.0f} twin-ticks/s ({elapsed / TICKS * 1000:.1f} ms per 1 Hz tick, "
+          f"worst {worst_tick * 1000:.1f} ms)")
+    print(f"   📨 {events:,} events emitted")
+    verdict = "✅ keeps up" if worst_tick < 1.0 else "❌ falls behind"
+    print(f"   {verdict} with {TWINS} twins at 1 Hz on one core")
+
+
+if __name__ == "__main__":
+    run_benchmark()
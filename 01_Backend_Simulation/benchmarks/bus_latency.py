@@ -0,0 +1,102 @@
+import sys
+import os
+import time
+import socket
+import threading
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from message_bus import build_transport, LocalTransport, LocalBus
+
+# End-to-end latency: sensor publish -> engine input + one tick -> live row -> API WebSocket client.
+# One sample in flight at a time, so each measure is a full round through both transports.
+SAMPLES = int(os.getenv("BENCH_SAMPLES", "500"))
+WARMUP = 20
+PORT = int(os.getenv("BENCH_PORT", "8765"))
+MQTT_HOST = os.getenv("MQTT_HOST", "localhost")
+
+
+class NullSession:
+    def add(self, obj):
+        pass
+
+    def commit(self):
+        pass
+
+
+def broker_reachable(host, port=1883):
+    try:
+        socket.create_connection((host, port), timeout=1).close()
+        return True
+    except OSError:
+        return False
+
+
+def start_api(hub):
+    """API in a background uvicorn server (no lifespan: no Postgres) with `hub` behind /ws/live."""
+    import uvicorn
+    from api.main import app
+    from api.routes import heart_routes
+    heart_routes.hub = hub
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, lifespan="off", log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def measure(kind):
+    from api.services.alert_stream import AlertHub
+    from simulation_engine.worker import HeartEngineWorker
+    from websockets.sync.client import connect
+
+    def transport(name):
+        if kind == "local":
+            return LocalTransport(name, bus=bus)
+        return build_transport(f"bench_{name}", kind="mqtt", host=MQTT_HOST)
+
+    bus = LocalBus()
+    hub = AlertHub(transport("api"))
+    hub.start()
+    server = start_api(hub)
+
+    worker = HeartEngineWorker(seed=1, verbose=False, transport=transport("engine"))
+    db = NullSession()
+    # Tick as soon as the input is applied (the real engine ticks every dt; that wait is not the transport's)
+    worker.client.subscribe("heart/sensor/data", lambda topic, payload: worker.step(db))
+    worker.client.start()
+    sensor = transport("sensor")
+    sensor.start()
+    time.sleep(0.5)   # MQTT subscriptions acknowledged
+
+    latencies = []
+    with connect(f"ws://127.0.0.1:{PORT}/ws/live?twin_id={worker.twin_id}") as ws:
+        time.sleep(0.2)
+        for i in range(SAMPLES + WARMUP):
+            start = time.perf_counter()
+            sensor.publish("heart/sensor/data", {"bpm": 60.0 + i % 90, "timestamp": time.time()})
+            ws.recv(timeout=5)
+            if i >= WARMUP:
+                latencies.append(time.perf_counter() - start)
+
+    for t in (sensor, worker.client, hub.transport):
+        t.stop()
+    server.should_exit = True
+    time.sleep(0.3)
+    return np.asarray(latencies) * 1000.0
+
+
+def run_benchmark():
+    modes = ["local"] + (["mqtt"] if broker_reachable(MQTT_HOST) else [])
+    print(f"⏱️ Sensor -> WebSocket latency, {SAMPLES} samples per mode")
+    for kind in modes:
+        ms = measure(kind)
+        print(f"   {kind:>5}: p50 {np.percentile(ms, 50):6.2f} ms | p95 {np.percentile(ms, 95):6.2f} ms "
+              f"| p99 {np.percentile(ms, 99):6.2f} ms | max {ms.max():6.2f} ms")
+    if "mqtt" not in modes:
+        print(f"   mqtt: skipped (no broker on {MQTT_HOST}:1883; start mqtt_broker and set MQTT_HOST)")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,89 @@
+import sys
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core_logic.anesthesia_inference import AnesthesiaInference, MODEL_PATH
+
+SAMPLES = int(os.getenv("BENCH_SAMPLES", "2000"))
+TWINS = int(os.getenv("BENCH_TWINS", "500"))
+
+
+def start_stand_in_server(model_path=MODEL_PATH):
+    """Local stand-in for the Rust /predict service: JSON in, one (1, 2) run per request."""
+    import onnxruntime as ort
+    session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True   # otherwise delayed ACKs cap keep-alive at ~25 req/s
+
+        def do_POST(self):
+            data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            X = np.array([[data["bpm"], data["rmssd"]]], dtype=np.float32)
+            body = json.dumps({"depth_score": float(session.run(None, {input_name: X})[0][0, 0])}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_benchmark():
+    rng = np.random.default_rng(0)
+    bpm = rng.uniform(45, 130, SAMPLES)
+    rmssd = rng.uniform(3, 90, SAMPLES)
+
+    server = start_stand_in_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/predict"
+    session = requests.Session()
+    start = time.perf_counter()
+    for b, r in zip(bpm, rmssd):
+        session.post(url, json={"bpm": float(b), "rmssd": float(r)}).json()
+    http_rate = SAMPLES / (time.perf_counter() - start)
+    server.shutdown()
+
+    # Micro-batching: TWINS clinical twins submit in the same tick, then wait for their futures
+    cold = AnesthesiaInference(memo_size=0)
+    start = time.perf_counter()
+    for tick in range(0, SAMPLES, TWINS):
+        futures = [cold.submit(b, r) for b, r in zip(bpm[tick:tick + TWINS], rmssd[tick:tick + TWINS])]
+        for future in futures:
+            future.result()
+    batched_rate = SAMPLES / (time.perf_counter() - start)
+    batches = cold.stats["batches"]
+    cold.close()
+
+    # Same traffic again with the LRU memo: twins with a steady state repeat their inputs
+    warm = AnesthesiaInference()
+    warm.predict_many(bpm, rmssd)
+    start = time.perf_counter()
+    for tick in range(0, SAMPLES, TWINS):
+        futures = [warm.submit(b, r) for b, r in zip(bpm[tick:tick + TWINS], rmssd[tick:tick + TWINS])]
+        for future in futures:
+            future.result()
+    memo_rate = SAMPLES / (time.perf_counter() - start)
+    warm.close()
+
+    print(f"🧪 {SAMPLES:,} predictions, {TWINS} twins per tick")
+    print(f"   HTTP per sample (keep-alive): {http_rate:>10,.0f} pred/s")
+    print(f"   In-process micro-batched:     {batched_rate:>10,.0f} pred/s ({batches} batches)")
+    print(f"   In-process, memo hits:        {memo_rate:>10,.0f} pred/s")
+    print(f"   Speed-up vs HTTP: x{batched_rate / http_rate:.0f} (cold) / x{memo_rate / http_rate:.0f} (memo)")
+
+
+if __name__ == "__main__":
+    run_benchmark()
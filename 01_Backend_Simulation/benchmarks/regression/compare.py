@@ -0,0 +1,109 @@
+import sys
+import os
+import json
+import argparse
+import subprocess
+import tempfile
+
+# Performance regression gate: runs the pytest-benchmark suite of this folder and
+# compares it with a baseline saved on this machine (--save on the reference commit).
+# Absolute times only mean something on the machine that measured them, so the
+# baseline is not committed. Noise: the suite runs BENCH_REPEATS times and every
+# benchmark keeps its best median; each median is also divided by the calibration
+# benchmark of its own run, so a machine that is busier as a whole is not a regression.
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.getenv("BENCH_BASELINE") or os.path.join(HERE, "baseline.json")
+THRESHOLD_PCT = float(os.getenv("BENCH_REGRESSION_PCT", "50"))   # back-to-back runs differ by up to ~40%
+REPEATS = int(os.getenv("BENCH_REPEATS", "3"))
+MIN_ROUNDS = int(os.getenv("BENCH_MIN_ROUNDS", "50"))
+CALIBRATION = "test_bench_calibration.py::test_calibration"
+
+
+def _run_once(extra_args):
+    with tempfile.TemporaryDirectory() as tmp:
+        report = os.path.join(tmp, "bench.json")
+        command = [sys.executable, "-m", "pytest", HERE, "-q", "-p", "no:cacheprovider",
+                   f"--benchmark-json={report}", f"--benchmark-min-rounds={MIN_ROUNDS}", *extra_args]
+        result = subprocess.run(command, cwd=os.path.dirname(os.path.dirname(HERE)))
+        if result.returncode != 0:
+            raise SystemExit(f"❌ Benchmark suite failed (exit {result.returncode})")
+        with open(report) as f:
+            data = json.load(f)
+    return {os.path.basename(b["fullname"]): b["stats"] for b in data["benchmarks"]}
+
+
+def run_suite(extra_args=(), repeats=REPEATS, keyword=None):
+    """
+    Run the suite `repeats` times; returns {benchmark name: stats} in seconds, each one the
+    best of the runs. "relative" is the best median over the best calibration median.
+    """
+    if keyword:
+        extra_args = [*extra_args, "-k", f"({keyword}) or test_calibration"]
+    best = {}
+    for _ in range(max(1, repeats)):
+        for name, values in _run_once(extra_args).items():
+            run = {"median": values["median"], "min": values["min"]}
+            if name in best:
+                run = {key: min(value, best[name][key]) for key, value in run.items()}
+            best[name] = run
+    calibration = best[CALIBRATION]["median"]
+    for stats in best.values():
+        stats["relative"] = stats["median"] / calibration
+    return best
+
+
+def compare(current, baseline, threshold_pct=THRESHOLD_PCT):
+    """
+    Rows (name, baseline median, current median, change %, status); status is ok / REGRESSION / new.
+    The change is calibrated ("relative") when both runs have it.
+    """
+    rows = []
+    for name, stats in sorted(current.items()):
+        reference = baseline.get(name)
+        if name == CALIBRATION:
+            continue
+        if reference is None:
+            rows.append((name, None, stats["median"], None, "new"))
+            continue
+        key = "relative" if "relative" in stats and "relative" in reference else "median"
+        change = (stats[key] / reference[key] - 1.0) * 100.0
+        rows.append((name, reference["median"], stats["median"], change,
+                     "REGRESSION" if change > threshold_pct else "ok"))
+    return rows
+
+
+def _us(seconds):
+    return "-" if seconds is None else f"{seconds * 1e6:,.1f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the hot path benchmarks against the baseline of this machine")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline (on the reference commit)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD_PCT, help="max calibrated median slowdown in %%")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="suite runs, best median kept")
+    parser.add_argument("-k", dest="keyword", default=None, help="only benchmarks matching this pytest expression")
+    args = parser.parse_args()
+
+    current = run_suite(repeats=args.repeats, keyword=args.keyword)
+    if args.save:
+        with open(BASELINE, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline with {len(current)} benchmarks saved to {BASELINE}")
+        sys.exit(0)
+
+    if not os.path.exists(BASELINE):
+        sys.exit(f"❌ No baseline at {BASELINE}: check out the reference commit and run with --save first")
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+
+    rows = compare(current, baseline, args.threshold)
+    print(f"\n{'benchmark':<64} {'base µs':>12} {'now µs':>12} {'change':>8}")
+    for name, base, now, change, status in rows:
+        delta = "-" if change is None else f"{change:+.1f}%"
+        print(f"{name:<64} {_us(base):>12} {_us(now):>12} {delta:>8}  {status}")
+
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0f}% (calibrated)")
+        sys.exit(1)
+    print(f"\n✅ No regression above {args.threshold:.0f}%")
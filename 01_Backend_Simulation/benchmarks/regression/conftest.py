@@ -0,0 +1,87 @@
+import sys
+import os
+import operator
+from datetime import datetime, timedelta, timezone
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from sqlalchemy.sql import operators
+from api.models import HeartLog
+
+# In-memory stand-ins for Postgres and Mosquitto: the benchmarks time our code, not the I/O
+
+_OPERATORS = {operators.eq: operator.eq, operators.lt: operator.lt, operators.le: operator.le,
+              operators.gt: operator.gt, operators.ge: operator.ge}
+
+
+class FakeQuery:
+    """The subset of Query used by the routes: filter / order_by / first / all on a list of rows."""
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *conditions):
+        rows = self.rows
+        for condition in conditions:
+            compare = _OPERATORS[condition.operator]
+            key, value = condition.left.key, condition.right.value
+            rows = [row for row in rows if compare(getattr(row, key), value)]
+        return FakeQuery(rows)
+
+    def order_by(self, clause):
+        descending = getattr(clause, "modifier", None) is operators.desc_op
+        column = getattr(clause, "element", clause).key
+        return FakeQuery(sorted(self.rows, key=lambda row: getattr(row, column), reverse=descending))
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def all(self):
+        return list(self.rows)
+
+
+class FakeSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.added = 0
+
+    def query(self, model):
+        return FakeQuery(self.rows)
+
+    def add(self, obj):
+        self.added += 1
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeMQTTClient:
+    def __init__(self):
+        self.published = 0
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published += 1
+
+
+def heart_rows(n, twin_id="default", start=None, interval_s=5.0):
+    """Sparse HeartLog rows, one every `interval_s` seconds (keyframe/deadband density)."""
+    start = start or datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [HeartLog(time=start + timedelta(seconds=i * interval_s), twin_id=twin_id, bpm=60.0 + i % 90,
+                     trimp=i * 0.01, eccentric_load=0.0, hrr=12.0, hrrpt=40.0, sd1=20.0, sd2=45.0,
+                     zone="Zone 2 (Light)", intensity=0.3, slope=0.0, color="#10B981")
+            for i in range(n)]
+
+
+@pytest.fixture
+def fake_session():
+    return FakeSession()
+
+
+@pytest.fixture
+def fake_mqtt():
+    return FakeMQTTClient()
@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from api.routes.heart_routes import get_db
+from conftest import FakeSession, heart_rows
+
+# Routes served in-process (no lifespan: no Postgres, no MQTT) over a seeded fake session
+
+ROWS = heart_rows(720)      # one hour at one row every 5 s
+
+
+@pytest.fixture(scope="module")
+def client():
+    app.dependency_overrides[get_db] = lambda: FakeSession(ROWS)
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+def test_root(benchmark, client):
+    response = benchmark(client.get, "/")
+    assert response.status_code == 200
+
+
+def test_metrics_latest(benchmark, client):
+    response = benchmark(client.get, "/metrics", params={"twin_id": "default"})
+    assert response.status_code == 200
+    assert response.json()["bpm"] == ROWS[-1].bpm
+
+
+def test_history_one_hour(benchmark, client):
+    params = {"start": "2026-01-01T00:00:00+00:00", "end": "2026-01-01T01:00:00+00:00", "step": 1.0}
+    response = benchmark(client.get, "/history", params=params)
+    assert response.status_code == 200
+    assert len(response.json()) == 3600
@@ -0,0 +1,19 @@
+import numpy as np
+
+# Reference workload for compare.py: every median is divided by this one, measured in the same
+# run, so a machine that is slower or busier as a whole does not read as a regression.
+# Python arithmetic and small numpy calls, the same mix as the hot paths.
+
+
+def _workload():
+    total = 0.0
+    for i in range(2000):
+        total += (i * 0.5) ** 0.5
+    values = np.arange(256, dtype=np.float64)
+    for _ in range(50):
+        values = np.sqrt(values + 1.0)
+    return total + float(values.sum())
+
+
+def test_calibration(benchmark):
+    assert benchmark(_workload) > 0
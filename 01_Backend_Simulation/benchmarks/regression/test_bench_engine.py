@@ -0,0 +1,24 @@
+import pytest
+from simulation_engine.worker import HeartEngineWorker
+
+# Worker tick with the database session and the MQTT client replaced by in-memory fakes
+
+
+@pytest.fixture
+def worker(fake_mqtt):
+    worker = HeartEngineWorker(seed=42, verbose=False)
+    worker.client = fake_mqtt
+    return worker
+
+
+def test_worker_tick(benchmark, worker):
+    metrics, row = benchmark(worker.tick)
+    assert row["bpm"] > 0
+
+
+def test_worker_step(benchmark, worker, fake_session):
+    """tick + persistence policy + alert rules, as in one iteration of simulation_loop."""
+    worker.current_intensity = 0.8
+    row = benchmark(worker.step, fake_session)
+    assert row["bpm"] > 0
+    assert fake_session.added > 0
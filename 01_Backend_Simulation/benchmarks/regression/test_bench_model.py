@@ -0,0 +1,79 @@
+import copy
+import numpy as np
+import pytest
+from core_logic.physio_model import HeartModel
+
+# HeartModel hot paths: one call per engine tick and per twin
+
+
+def warmed_model(intensity, steps=120):
+    model = HeartModel(age=25, sex='male', resting_hr=50, max_hr=195, vo2_max=55.0, seed=42)
+    for _ in range(steps):
+        model.simulate_step(intensity=intensity, dt=1.0, temperature=20.0)
+    return model
+
+
+def test_simulate_step_steady(benchmark):
+    model = warmed_model(0.5)
+    metrics = benchmark(model.simulate_step, 0.5, 1.0, 20.0, 0.0)
+    assert not metrics["is_recovering"]
+
+
+@pytest.mark.parametrize("recovery_s", [60, 600])
+def test_simulate_step_recovery(benchmark, recovery_s):
+    """One step `recovery_s` seconds into a recovery: HRRPT runs over the curve so far (up to HRRPT_WINDOW_S)."""
+    model = warmed_model(0.9, steps=300)
+    for _ in range(recovery_s):
+        model.simulate_step(intensity=0.0, dt=1.0, temperature=20.0)
+
+    def setup():
+        return (copy.deepcopy(model),), {}
+
+    metrics = benchmark.pedantic(lambda m: m.simulate_step(0.0, 1.0, 20.0, 0.0), setup=setup, rounds=300)
+    assert metrics["is_recovering"]
+
+
+def test_hrv_metrics(benchmark):
+    model = warmed_model(0.5)
+    rmssd, sd1, sd2 = benchmark(model._calculate_hrv_metrics)
+    assert rmssd > 0
+
+
+def test_get_metrics(benchmark):
+    model = warmed_model(0.5)
+    metrics = benchmark(model.get_metrics, model.current_hr)
+    assert "zone" in metrics
+
+
+def test_ensemble_1000_members_10_min(benchmark):
+    """Forecast bands: 1,000 twins x 600 steps as one vectorized batch."""
+    from core_logic.ensemble import run_ensemble
+    intensity = np.r_[np.full(420, 0.8), np.full(180, 0.05)]
+    bands = benchmark.pedantic(run_ensemble, args=(intensity,), kwargs={"members": 1000, "seed": 1},
+                               rounds=5, iterations=1)
+    assert bands["bpm"].shape == (3, 600)
+
+
+def test_ensemble_1000_members_long_cool_down(benchmark):
+    """1 h of work then a 1 h cool-down: the recovery curve must not make the run quadratic."""
+    from core_logic.ensemble import run_ensemble
+    intensity = np.r_[np.full(3600, 0.8), np.full(3600, 0.0)]
+    bands = benchmark.pedantic(run_ensemble, args=(intensity,), kwargs={"members": 1000, "seed": 1},
+                               rounds=3, iterations=1)
+    assert bands["hrrpt"][1, -1] > 0
+
+
+def test_observer_step_1000_twins(benchmark):
+    """EnKF cycle (predict + assimilate) for 1,000 twins that all sent a sample."""
+    from core_logic.state_observer import EnsembleObserver
+    observer = EnsembleObserver(seed=1)
+    for key in range(1000):
+        observer.add(key, hr=60, resting_hr=50, max_hr=190)
+
+    def cycle():
+        for key in range(1000):
+            observer.observe(key, 120)
+        return observer.step(1.0)
+
+    updated = benchmark(cycle)
+    assert len(updated) == 1000
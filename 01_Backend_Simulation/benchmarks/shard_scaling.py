@@ -0,0 +1,50 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from simulation_engine.supervisor import ShardSupervisor, parse_twin_ids
+
+# Aggregate engine throughput vs shard count on this machine. Shards free-run (no 1 s
+# sleep), no DB, in-process bus per shard: the measure is twin steps per second of CPU.
+TWINS = int(os.getenv("BENCH_TWINS", "256"))
+WARMUP_S = 2.0
+MEASURE_S = float(os.getenv("BENCH_SECONDS", "5"))
+
+
+def measure(shards, twin_ids, checkpoint_dir, pin=True):
+    supervisor = ShardSupervisor(twin_ids, shards=shards, pin=pin, transport="local", persist=False,
+                                 realtime=False, verbose=False, checkpoint_dir=checkpoint_dir)
+    supervisor.start()
+    try:
+        time.sleep(WARMUP_S)
+        before, t0 = supervisor.stats(), time.perf_counter()
+        time.sleep(MEASURE_S)
+        after, t1 = supervisor.stats(), time.perf_counter()
+        rate = sum(after[s]["steps"] - before[s]["steps"] for s in after) / (t1 - t0)
+        _, pause = supervisor.add_shard()
+        return rate, pause, supervisor.last_handoff["twins"] if supervisor.last_handoff else 0
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    parser = argparse.ArgumentParser(description="Engine shard scaling curve")
+    parser.add_argument("--shards", type=int, nargs="+", default=sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1))))
+    parser.add_argument("--twins", type=int, default=TWINS)
+    parser.add_argument("--no-pin", action="store_true")
+    args = parser.parse_args()
+
+    twin_ids = parse_twin_ids(args.twins)
+    print(f"📈 {args.twins} twins | {cpus} cpus available | {MEASURE_S:g}s per point\n")
+    print(f"{'shards':>6} {'steps/s':>12} {'speedup':>8} {'efficiency':>10} {'handoff (+1 shard)':>20}")
+    base = None
+    for shards in args.shards:
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            rate, pause, moved = measure(shards, twin_ids, checkpoint_dir, pin=not args.no_pin)
+        base = base or rate
+        print(f"{shards:>6} {rate:>12,.0f} {rate / base:>7.2f}x {rate / base / shards:>9.0%} "
+              f"{f'{moved} twins / {pause * 1000:.0f} ms':>20}")
@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from api.database import engine
+from api.schema import chunk_interval_for_ingest, _interval
+
+# Scratch hypertable: the real heart_metrics is never touched
+BENCH_TABLE = "heart_metrics_bench"
+TWINS = int(os.getenv("BENCH_TWINS", "10"))
+DAYS = int(os.getenv("BENCH_DAYS", "7"))
+
+RANGE_QUERIES = {
+    "1 twin, 1 hour (raw)": f"""
+        SELECT time, bpm FROM {BENCH_TABLE}
+        WHERE twin_id = 'twin_3' AND time >= NOW() - INTERVAL '2 days'
+          AND time < NOW() - INTERVAL '2 days' + INTERVAL '1 hour'""",
+    "1 twin, 1 day (avg per min)": f"""
+        SELECT time_bucket('1 minute', time) AS b, avg(bpm) FROM {BENCH_TABLE}
+        WHERE twin_id = 'twin_3' AND time >= NOW() - INTERVAL '3 days'
+          AND time < NOW() - INTERVAL '2 days' GROUP BY b""",
+    "all twins, 1 day (max trimp)": f"""
+        SELECT twin_id, max(trimp) FROM {BENCH_TABLE}
+        WHERE time >= NOW() - INTERVAL '3 days' AND time < NOW() - INTERVAL '2 days'
+        GROUP BY twin_id""",
+}
+
+
+def measure(conn, label):
+    size = conn.execute(text(f"SELECT hypertable_size('{BENCH_TABLE}')")).scalar()
+    print(f"\n📦 {label}: {size / 1024 / 1024:.1f} MB on disk")
+    for name, sql in RANGE_QUERIES.items():
+        conn.execute(text(sql)).fetchall()  # warm the cache
+        start = time.perf_counter()
+        for _ in range(5):
+            conn.execute(text(sql)).fetchall()
+        elapsed = (time.perf_counter() - start) / 5 * 1000
+        print(f"   ⏱️ {name:<30} {elapsed:8.1f} ms")
+
+
+def run_benchmark():
+    chunk = chunk_interval_for_ingest(TWINS * 1.0)
+    print(f"🧪 {TWINS} twins x {DAYS} days at 1 Hz ({TWINS * DAYS * 86400:,} rows), chunk={chunk}")
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {BENCH_TABLE}"))
+        conn.execute(text(f"CREATE TABLE {BENCH_TABLE} (LIKE heart_metrics INCLUDING DEFAULTS)"))
+        conn.execute(text(
+            f"SELECT create_hypertable('{BENCH_TABLE}', 'time', chunk_time_interval => INTERVAL '{_interval(chunk)}')"))
+        conn.execute(text(f"CREATE INDEX ON {BENCH_TABLE} (twin_id, time DESC)"))
+
+        # Server-side generation: a smooth workout-like signal plus noise per twin
+        conn.execute(text(f"""
+            INSERT INTO {BENCH_TABLE} (time, twin_id, bpm, trimp, eccentric_load, hrr, hrrpt,
+                                       sd1, sd2, zone, intensity, slope, color)
+            SELECT t, 'twin_' || tw,
+                   110 + 40 * sin(extract(epoch FROM t) / 600.0 + tw) + random() * 2,
+                   extract(epoch FROM t - (NOW() - INTERVAL '{DAYS} days')) / 600.0,
+                   0.0, 25.0, 60.0, 20 + random() * 5, 45 + random() * 5,
+                   'Zone 3 (Moderate)', 0.6, 0.0, '#F59E0B'
+            FROM generate_series(NOW() - INTERVAL '{DAYS} days', NOW(), INTERVAL '1 second') AS t,
+                 generate_series(1, {TWINS}) AS tw
+        """))
+        conn.execute(text(f"ANALYZE {BENCH_TABLE}"))
+        measure(conn, "Before (uncompressed)")
+
+        conn.execute(text(
+            f"ALTER TABLE {BENCH_TABLE} SET (timescaledb.compress, "
+            "timescaledb.compress_segmentby = 'twin_id', timescaledb.compress_orderby = 'time DESC')"))
+        conn.execute(text(f"SELECT compress_chunk(c, if_not_compressed => TRUE) FROM show_chunks('{BENCH_TABLE}') c"))
+        conn.execute(text(f"ANALYZE {BENCH_TABLE}"))
+        measure(conn, "After (compressed, segmentby twin_id)")
+
+        conn.execute(text(f"DROP TABLE {BENCH_TABLE}"))
+
+
+if __name__ == "__main__":
+    run_benchmark()
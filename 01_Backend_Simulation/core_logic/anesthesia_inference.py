@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+
+DEFAULT_MODEL = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data_processing/anesthesia_model.onnx"))
+MODEL_PATH = os.getenv("ANESTHESIA_MODEL_PATH", DEFAULT_MODEL)
+BATCH_WINDOW_MS = float(os.getenv("INFERENCE_WINDOW_MS", "2"))
+MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "512"))
+MEMO_SIZE = int(os.getenv("INFERENCE_MEMO_SIZE", "8192"))
+# Inputs are snapped to this grid (BPM, RMSSD ms): well below the model's sensitivity, and repeats hit the memo
+QUANTUM = (0.5, 0.5)
+
+
+class AnesthesiaInference:
+    """
+    In-process ONNX runner for the anesthesia depth model (scaler included in the graph).
+    Requests from every clinical twin are gathered for up to `window_ms` and run as one batch.
+    """
+    def __init__(self, model_path=MODEL_PATH, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH,
+                 memo_size=MEMO_SIZE, quantum=QUANTUM):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.window_s = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.quantum = np.asarray(quantum, dtype=np.float64)
+
+        self.memo = OrderedDict()
+        self.memo_size = memo_size
+        self.stats = {"requests": 0, "memo_hits": 0, "batches": 0, "rows": 0}
+
+        self.pending = []              # (key, future)
+        self.cond = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._batch_loop, daemon=True, name="anesthesia-batcher")
+        self.thread.start()
+
+    def _key(self, bpm, rmssd):
+        return (int(round(bpm / self.quantum[0])), int(round(rmssd / self.quantum[1])))
+
+    def _infer(self, keys):
+        """One session.run for the given quantized inputs. Called without the lock held."""
+        X = (np.asarray(keys, dtype=np.float64) * self.quantum).astype(np.float32)
+        return self.session.run(None, {self.input_name: X})[0].ravel()
+
+    def _remember(self, keys, scores):
+        """Memo + stats of one batch (lock held)."""
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(keys)
+        for key, score in zip(keys, scores):
+            self.memo[key] = float(score)
+            if len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+
+    def _lookup(self, key):
+        score = self.memo.get(key)
+        if score is not None:
+            self.memo.move_to_end(key)
+            self.stats["memo_hits"] += 1
+        return score
+
+    def predict_many(self, bpm, rmssd):
+        """Synchronous batch: depth score (0-100) for arrays of inputs."""
+        keys = [self._key(b, r) for b, r in zip(np.atleast_1d(bpm), np.atleast_1d(rmssd))]
+        with self.cond:
+            self.stats["requests"] += len(keys)
+            scores = [self._lookup(key) for key in keys]
+        missing = list(dict.fromkeys(k for k, s in zip(keys, scores) if s is None))
+        if missing:
+            computed = self._infer(missing)
+            with self.cond:
+                self._remember(missing, computed)
+            fresh = dict(zip(missing, computed))
+            scores = [float(fresh[k]) if s is None else s for k, s in zip(keys, scores)]
+        return np.asarray(scores)
+
+    def submit(self, bpm, rmssd):
+        """Queue one prediction; the Future resolves after the next batch (or at once on a memo hit)."""
+        future = Future()
+        key = self._key(bpm, rmssd)
+        with self.cond:
+            self.stats["requests"] += 1
+            score = self._lookup(key)
+            if score is not None:
+                future.set_result(score)
+                return future
+            self.pending.append((key, future))
+            if len(self.pending) == 1 or len(self.pending) >= self.max_batch:
+                self.cond.notify()
+        return future
+
+    def predict(self, bpm, rmssd, timeout=1.0):
+        return self.submit(bpm, rmssd).result(timeout)
+
+    def _batch_loop(self):
+        while True:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.running and not self.pending:
+                    return
+                # Short window to gather the other twins' requests of this tick
+                deadline = time.perf_counter() + self.window_s
+                while len(self.pending) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch, self.pending = self.pending[:self.max_batch], self.pending[self.max_batch:]
+
+            # The session runs without the lock: submit() (memo hits included) and the
+            # queueing of the next batch never wait for an inference
+            keys = list(dict.fromkeys(key for key, _ in batch))
+            try:
+                computed = self._infer(keys)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self.cond:
+                self._remember(keys, computed)
+            scores = dict(zip(keys, computed))
+            for key, future in batch:
+                future.set_result(float(scores[key]))
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout=2)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_inference():
+    """Process-wide runner: all clinical twins of a worker share one batcher and one memo."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = AnesthesiaInference()
+        return _shared
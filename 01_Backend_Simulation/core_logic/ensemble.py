@@ -0,0 +1,137 @@
+import numpy as np
+from core_logic.recovery_analytics import hrrpt_index
+from core_logic.physio_model import (effective_intensity, heat_drift, hr_step, TAU_UP_S, TAU_DOWN_S,
+                                     MAX_EFFECTIVE_INTENSITY, HRRPT_WINDOW_S)
+
+# Monte Carlo ensemble of HeartModel (athlete profile): K twins stepped as one batch,
+# one vector per state variable. At every step only the percentiles across members
+# are kept, so memory is O(members + steps), never a (members x steps) matrix.
+#
+# HeartModel's AR(1) HRV noise only moves the displayed BPM: TRIMP and HRRPT follow the
+# noise-free HR. Their spread comes from the day-to-day variability of the twin (PARAM_SD,
+# one draw per member): HR kinetics (tau, s) and the effort a planned intensity costs
+# (multiplier). Resting / max HR alone would not do: TRIMP uses the HR reserve fraction,
+# which does not depend on them. param_sd={} keeps the HRV noise only.
+PERCENTILES = (5, 50, 95)
+BANDS = ("bpm", "trimp", "hrrpt")
+PARAM_SD = {"resting_hr": 3.0, "max_hr": 4.0, "tau_up": 4.0, "tau_down": 1.0, "effort": 0.05}
+HRRPT_EVERY_S = 10.0        # HRRPT is re-evaluated on this cadence (and when a recovery ends)
+NOISE_BLOCK = 256           # steps of HRV innovations drawn per call
+PHI = 0.8                   # same AR(1) as HeartModel._get_stochastic_hrv
+
+
+def _series(value, n):
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+
+
+def run_ensemble(intensity, temperature=20.0, slope=0.0, dt=1.0, members=1000, age=25, sex="male",
+                 resting_hr=50, max_hr=None, param_sd=None, seed=None, hrrpt_every_s=HRRPT_EVERY_S):
+    """
+    p5 / p50 / p95 of bpm, TRIMP and HRRPT over `members` twins for a planned session
+    (inputs: one value per step, or a constant). Returns {"t": (n,), band: (3, n)}.
+    """
+    intensity = np.asarray(intensity, dtype=np.float64)
+    n = len(intensity)
+    temperature, slope = _series(temperature, n), _series(slope, n)
+    param_sd = PARAM_SD if param_sd is None else param_sd
+    rng = np.random.default_rng(seed)
+
+    # Member parameters (one draw each)
+    rest = resting_hr + rng.normal(0.0, param_sd.get("resting_hr", 0.0), members)
+    top = (max_hr if max_hr else 208 - 0.7 * age) + rng.normal(0.0, param_sd.get("max_hr", 0.0), members)
+    span = top - rest
+    trimp_span = np.maximum(1.0, span)
+    tau_up = np.maximum(1.0, TAU_UP_S + rng.normal(0.0, param_sd.get("tau_up", 0.0), members))
+    tau_down = np.maximum(1.0, TAU_DOWN_S + rng.normal(0.0, param_sd.get("tau_down", 0.0), members))
+    effort = np.maximum(0.0, 1.0 + rng.normal(0.0, param_sd.get("effort", 0.0), members))
+
+    # Shared inputs -> per-step scalars, computed once for the whole session (HeartModel.simulate_step)
+    effective = effective_intensity(intensity, slope)
+    heat = heat_drift(temperature)
+    y_factor = 1.92 if sex.lower() == 'male' else 1.67
+    trimp_scale = (dt / 60.0) * 0.64
+    noise_sd = 0.5 * max(0.2, 1.0 - age / 100)
+    every = max(1, int(round(hrrpt_every_s / dt)))
+    window = max(1, int(HRRPT_WINDOW_S / dt + 1e-9))   # samples of a recovery HRRPT looks at
+
+    # target = rest + span * min(effective * effort, MAX_EFFECTIVE_INTENSITY) + heat
+    span_effort, span_cap = span * effort, span * MAX_EFFECTIVE_INTENSITY
+    inverse_span = 1.0 / trimp_span
+    recovery_floor = rest + 20
+
+    hr = rest.copy()
+    trimp = np.zeros(members)
+    variation = np.zeros(members)
+    recovering = np.zeros(members, dtype=bool)
+    any_recovering = False
+    length = np.zeros(members, dtype=np.int64)
+    evaluated = np.zeros(members, dtype=np.int64)   # curve length at the last HRRPT evaluation
+    hrrpt = np.zeros(members)
+    curve = np.empty((members, window))      # recovery curves: a full one is never re-evaluated
+
+    bands = {name: np.empty((len(PERCENTILES), n)) for name in BANDS}
+    # Linear-interpolated percentiles (as np.percentile) from one partial sort per step
+    position = np.asarray(PERCENTILES) / 100.0 * (members - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, members - 1)
+    weight = position - low
+    kth = np.unique(np.concatenate([low, high]))
+
+    def quantiles(values):
+        ordered = np.partition(values, kth, axis=-1)
+        return ordered[..., low] * (1 - weight) + ordered[..., high] * weight
+
+    stacked = np.empty((2, members))         # bpm, trimp: new values every step
+    hrrpt_band = quantiles(hrrpt)            # changes only when HRRPT is re-evaluated
+    noise = None
+
+    for i in range(n):
+        previous = hr
+        target = np.minimum(span_effort * effective[i], span_cap)
+        target += rest
+        target += heat[i]
+        hr = hr_step(previous, target, dt, tau_up, tau_down)
+
+        fraction = hr - rest
+        fraction *= inverse_span
+        np.maximum(fraction, 0.0, out=fraction)
+        trimp += trimp_scale * fraction * np.exp(y_factor * fraction)
+
+        # Recovery: starts per member (its own HR), ends for all (the intensity is shared)
+        if intensity[i] < 0.1:
+            starting = (previous > recovery_floor) & ~recovering
+            if starting.any():
+                recovering |= starting
+                length[starting] = 0
+                evaluated[starting] = 0
+                any_recovering = True
+        if any_recovering:
+            filling = np.flatnonzero(recovering & (length < window))
+            curve[filling, length[filling]] = hr[filling]
+            length[filling] += 1
+            ending = intensity[i] > 0.2
+            # Every `every` steps, at the end of the recovery, and when a curve reaches the window
+            if ending or i % every == 0 or (len(filling) and length[filling].max() == window):
+                ready = np.flatnonzero(recovering & (length > 30) & (length != evaluated))
+                if len(ready):
+                    width = int(length[ready].max())
+                    hrrpt[ready] = (hrrpt_index(curve[ready, :width], length[ready], dt) + 1) * dt
+                    evaluated[ready] = length[ready]
+                    hrrpt_band = quantiles(hrrpt)
+            if ending:
+                recovering[:] = False
+                any_recovering = False
+
+        if i % NOISE_BLOCK == 0:
+            noise = rng.normal(0.0, noise_sd, (NOISE_BLOCK, members))
+        variation *= PHI
+        variation += noise[i % NOISE_BLOCK]
+
+        np.add(hr, variation, out=stacked[0])
+        stacked[1] = trimp
+        band = quantiles(stacked)
+        bands["bpm"][:, i] = band[0]
+        bands["trimp"][:, i] = band[1]
+        bands["hrrpt"][:, i] = hrrpt_band
+
+    return {"t": np.arange(n) * dt, **bands}
@@ -1,12 +1,18 @@
+import os
 import numpy as np
 import random
 from collections import deque
+from core_logic.recovery_analytics import hrrpt_index
 
 
 class HeartProfile:
     """Base class for the Digital Twin contexts."""
     def update_metrics(self, current_hr, resting_hr, max_hr, dt, intensity):
         pass
+
+    def observe_hrv(self, bpm, rmssd):
+        """Called every step with the displayed BPM and the current RMSSD."""
+        pass
     
     def get_state(self):
         return {}
@@ -43,25 +49,89 @@ class AthleteProfile(HeartProfile):
 
 
 class ClinicalProfile(HeartProfile):
-    """ Profile for VitalDB surgical patients with Machine Learning in Rust."""
-    def __init__(self):
+    """ Profile for VitalDB surgical patients, anesthesia depth from the ONNX model."""
+    def __init__(self, inference=None, update_every_s: float = None):
         self.systemic_stress = 0.0
         self.anesthesia_depth = 0.0
+        # Shared in-process batcher (core_logic/anesthesia_inference.py), created on first use
+        self.inference = inference
+        self.update_every_s = update_every_s if update_every_s is not None else float(os.getenv("ANESTHESIA_UPDATE_S", "5"))
+        self.since_update = self.update_every_s
+        self.pending = None
     
-    def update_metrics(self, current_hr, resting_hr, max_hr, dt, intensity):
+    def update_metrics(self, current_hr, resting_hr, max_hr, dt, intensity, slope_percent=0.0):
         # Here will go the pathological stress logic in the future
-        pass
+        self.since_update += dt
+
+    def observe_hrv(self, bpm, rmssd):
+        # Never block the tick: the prediction lands on a later step
+        if self.pending is not None and self.pending.done():
+            if self.pending.exception() is None:
+                self.anesthesia_depth = float(self.pending.result())
+            self.pending = None
+        if self.pending is None and rmssd > 0 and self.since_update >= self.update_every_s:
+            if self.inference is None:
+                from core_logic.anesthesia_inference import get_inference
+                self.inference = get_inference()
+            self.pending = self.inference.submit(bpm, rmssd)
+            self.since_update = 0.0
 
     def get_state(self):
-        return {"clinical_stress": self.systemic_stress}
+        return {"clinical_stress": self.systemic_stress,
+                "anesthesia_depth": float(round(self.anesthesia_depth, 1))}
+
+
+
+
+# HR KINETICS: one definition for HeartModel, the ensemble (core_logic/ensemble.py) and the
+# state observer (core_logic/state_observer.py). Plain floats stay plain floats (the per-tick
+# path of HeartModel); numpy arrays are computed element-wise.
+TAU_UP_S = 25.0             # HR rising towards the target
+TAU_DOWN_S = 5.0            # HR falling towards the target
+MAX_EFFECTIVE_INTENSITY = 1.2
+SLOPE_COST = 0.015          # intensity added per |slope %| ** 1.5 (half of it removed downhill)
+HEAT_THRESHOLD_C = 25.0
+HEAT_BPM_PER_C = 1.2
+# HRRPT looks at the first HRRPT_WINDOW_S of a recovery (its turn comes within the first minute):
+# the curve stops growing there, so a long cool-down costs the same as a short one
+HRRPT_WINDOW_S = 300.0
+
+
+def _where(condition, if_true, if_false):
+    if isinstance(condition, (bool, np.bool_)):
+        return if_true if condition else if_false
+    return np.where(condition, if_true, if_false)
 
 
+def effective_intensity(intensity, slope_percent=0.0):
+    """Intensity after the terrain: uphill costs more, downhill a little less."""
+    slope_impact = (abs(slope_percent) ** 1.5) * SLOPE_COST
+    effective = _where(slope_percent < 0, intensity - (slope_impact * 0.5), intensity + slope_impact)
+    if isinstance(effective, float):
+        return max(0.0, min(MAX_EFFECTIVE_INTENSITY, effective))
+    return np.clip(effective, 0.0, MAX_EFFECTIVE_INTENSITY)
+
+
+def heat_drift(temperature):
+    """BPM added to the target above HEAT_THRESHOLD_C."""
+    return _where(temperature > HEAT_THRESHOLD_C, (temperature - HEAT_THRESHOLD_C) * HEAT_BPM_PER_C, 0.0)
+
+
+def target_hr(resting_hr, max_hr, intensity, temperature=20.0, slope_percent=0.0):
+    """Steady-state HR for the inputs."""
+    return resting_hr + (max_hr - resting_hr) * effective_intensity(intensity, slope_percent) + heat_drift(temperature)
+
+
+def hr_step(current_hr, target, dt, tau_up=TAU_UP_S, tau_down=TAU_DOWN_S):
+    """First-order response of the HR to its target over dt seconds (slower up than down)."""
+    step = target - current_hr
+    return current_hr + step * (1 - np.exp(-dt / _where(step >= 0, tau_up, tau_down)))
 
 
 # PHYSIOLOGICAL MOTOR BASE (The Heart)
 
 class HeartModel:
-    def __init__(self, age: int, sex: str, resting_hr: int, max_hr: int = None, vo2_max: float = 40.0, profile: HeartProfile = None):
+    def __init__(self, age: int, sex: str, resting_hr: int, max_hr: int = None, vo2_max: float = 40.0, profile: HeartProfile = None, seed: int = None):
         self.age = age
         self.resting_hr = resting_hr
         self.max_hr = max_hr if max_hr else (208 - 0.7 * age)
@@ -69,6 +139,8 @@ class HeartModel:
         self.current_hr = float(resting_hr)
         self.profile = profile if profile else AthleteProfile(sex)
         
+        # Private generator for the HRV noise: a fixed seed makes a run reproducible
+        self.rng = random.Random(seed)
         self.prev_variation = 0.0
         self.is_recovering = False
         self.recovery_start_hr = 0
@@ -84,7 +156,7 @@ class HeartModel:
     def _get_stochastic_hrv(self):
         age_factor = max(0.2, 1.0 - (self.age / 100))
         phi = 0.8 
-        innovation = random.normalvariate(0, 0.5 * age_factor)
+        innovation = self.rng.normalvariate(0, 0.5 * age_factor)
         self.prev_variation = (phi * self.prev_variation) + innovation
         return self.prev_variation
 
@@ -115,25 +187,8 @@ class HeartModel:
     def simulate_step(self, intensity: float, dt: float = 1.0, temperature: float = 20.0, slope_percent: float = 0.0):
         previous_hr = self.current_hr
 
-        slope_impact = (abs(slope_percent) ** 1.5) * 0.015
-        if slope_percent < 0:
-            effective_intensity = intensity - (slope_impact * 0.5)
-        else:
-            effective_intensity = intensity + slope_impact
-
-        effective_intensity = max(0.0, min(1.2, effective_intensity))
-        target_hr = self.resting_hr + (self.max_hr - self.resting_hr) * effective_intensity
-
-        if temperature > 25.0:
-            target_hr += (temperature - 25.0) * 1.2
-        
-        if target_hr >= self.current_hr:
-            tau = 25.0 
-        else:
-            tau = 5.0 
-            
-        alpha = 1 - np.exp(-dt / tau)
-        self.current_hr += (target_hr - self.current_hr) * alpha
+        target = target_hr(self.resting_hr, self.max_hr, intensity, temperature, slope_percent)
+        self.current_hr = hr_step(self.current_hr, target, dt)
 
         self.profile.update_metrics(self.current_hr, self.resting_hr, self.max_hr, dt, intensity, slope_percent)
         self._update_recovery_metrics(intensity, dt, previous_hr)
@@ -156,7 +211,9 @@ class HeartModel:
             
         if self.is_recovering:
             self.seconds_since_recovery_start += dt
-            self.recovery_curve.append((self.seconds_since_recovery_start, self.current_hr))
+            in_window = self.seconds_since_recovery_start <= HRRPT_WINDOW_S
+            if in_window:
+                self.recovery_curve.append((self.seconds_since_recovery_start, self.current_hr))
 
             # Calculate standard HRR at 1 minute
             if 60.0 <= self.seconds_since_recovery_start <= 60.0 + dt:
@@ -164,23 +221,11 @@ class HeartModel:
             
             # Calculate HRRPT using the maximum perpendicular distance algorithm
             # Based on Bartels et al. (2018). Expect to have enough points (e.g. 30s)
-            if len(self.recovery_curve) > 30:
-                p_start = np.array(self.recovery_curve[0])
-                p_end = np.array(self.recovery_curve[-1])
-                
-                max_dist = -1
-                hrrpt_candidate = 0.0
-                
-                # Find the farthest point from the straight line between the start and end
-                for point in self.recovery_curve:
-                    p = np.array(point)
-                    # Distance formula from a point to a line
-                    dist = np.linalg.norm(np.cross(p_end - p_start, p_start - p)) / np.linalg.norm(p_end - p_start)
-                    if dist > max_dist:
-                        max_dist = dist
-                        hrrpt_candidate = point[0] # The time (seconds) of that point
-                
-                self.hrrpt_time = hrrpt_candidate
+            if in_window and len(self.recovery_curve) > 30:
+                # Vectorized (shared with the dataset analytics) instead of a Python loop per point
+                curve = np.asarray(self.recovery_curve)
+                index = hrrpt_index(curve[None, :, 1], dt=dt)[0]
+                self.hrrpt_time = float(curve[index, 0])
 
             # If the athlete accelerates again, end in the recovery phase
             if intensity > 0.2:
@@ -190,6 +235,7 @@ class HeartModel:
     def get_metrics(self, current_hr_display):
         zone_name, zone_color = self._get_training_zone(current_hr_display)
         rmssd, sd1, sd2 = self._calculate_hrv_metrics() # Llamamos a la nueva función
+        self.profile.observe_hrv(current_hr_display, rmssd)
         
         metrics = {
             "bpm": float(round(current_hr_display, 1)),
@@ -199,7 +245,8 @@ class HeartModel:
             "sd1": sd1,      
             "sd2": sd2,      
             "zone": zone_name,
-            "color": zone_color  
+            "color": zone_color,
+            "is_recovering": self.is_recovering
         }
         metrics.update(self.profile.get_state())
         return metrics
@@ -0,0 +1,98 @@
+import numpy as np
+from scipy.signal import savgol_filter
+
+# Heart rate recovery analytics for many curves at once.
+# Curves are rows of a padded 2-D array (n_curves, max_len) sampled every `dt`
+# seconds from the start of the recovery; `lengths` says how many samples are real.
+
+SAVGOL_WINDOW = 15
+SAVGOL_ORDER = 3
+
+
+def pad_curves(curves, fill=np.nan):
+    """List of 1-D curves -> (padded 2-D float array, lengths)."""
+    lengths = np.array([len(c) for c in curves], dtype=np.int64)
+    padded = np.full((len(curves), int(lengths.max()) if len(curves) else 0), fill, dtype=np.float64)
+    for i, curve in enumerate(curves):
+        padded[i, :len(curve)] = curve
+    return padded, lengths
+
+
+def _lengths(curves, lengths):
+    if lengths is None:
+        return np.full(curves.shape[0], curves.shape[1], dtype=np.int64)
+    return np.asarray(lengths, dtype=np.int64)
+
+
+def smooth_curves(curves, lengths=None, window=SAVGOL_WINDOW, order=SAVGOL_ORDER):
+    """
+    Savitzky-Golay along axis 1. Curves of the same length are filtered in one call,
+    so each one keeps its own edge fit (identical to filtering it alone).
+    """
+    curves = np.asarray(curves, dtype=np.float64)
+    lengths = _lengths(curves, lengths)
+    smoothed = np.full(curves.shape, np.nan)
+    for length in np.unique(lengths):
+        rows = np.flatnonzero(lengths == length)
+        w = min(window, int(length))
+        if w % 2 == 0:
+            w -= 1
+        if w <= order:
+            smoothed[rows, :length] = curves[rows, :length]  # too short to filter
+            continue
+        smoothed[rows, :length] = savgol_filter(curves[rows, :length], w, order, axis=1)
+    return smoothed
+
+
+def hrr_at(curves, lengths=None, lag_s=60.0, dt=1.0):
+    """HR drop from the start to `lag_s` seconds later; NaN when the curve is shorter."""
+    curves = np.asarray(curves, dtype=np.float64)
+    lengths = _lengths(curves, lengths)
+    idx = int(round(lag_s / dt))
+    if idx >= curves.shape[1]:
+        return np.full(curves.shape[0], np.nan)
+    return np.where(lengths > idx, curves[:, 0] - curves[:, idx], np.nan)
+
+
+def hrrpt_index(curves, lengths=None, dt=1.0):
+    """
+    HRRPT (Bartels et al., 2018): the sample farthest from the straight line
+    joining the first and last point of each curve. -1 for curves under 3 samples.
+    """
+    curves = np.asarray(curves, dtype=np.float64)
+    lengths = _lengths(curves, lengths)
+    n, width = curves.shape
+    if width == 0:
+        return np.full(n, -1, dtype=np.int64)
+
+    last = np.maximum(lengths - 1, 0)
+    x = np.arange(width) * dt
+    x2 = last * dt
+    y1 = curves[:, :1]
+    y2 = curves[np.arange(n), last][:, None]
+    dx, dy = x2[:, None], y2 - y1
+
+    # |(y2 - y1) x - (x2 - x1) y + x2 y1 - y2 x1| / |p2 - p1|, with x1 = 0
+    norm = np.sqrt(dx ** 2 + dy ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        distances = np.abs(dy * x - dx * curves + dx * y1) / norm
+    distances = np.where(np.arange(width) < lengths[:, None], distances, -np.inf)
+    distances = np.nan_to_num(distances, nan=-np.inf)
+
+    index = np.argmax(distances, axis=1)
+    return np.where(lengths >= 3, index, -1)
+
+
+def analyze_curves(curves, lengths=None, dt=1.0, smooth=True):
+    """HRR60, HRR120 and HRRPT (index and seconds) for every curve in one pass."""
+    curves = np.asarray(curves, dtype=np.float64)
+    lengths = _lengths(curves, lengths)
+    filtered = smooth_curves(curves, lengths) if smooth else curves
+    index = hrrpt_index(filtered, lengths, dt)
+    return {
+        "filtered": filtered,
+        "hrr_60": hrr_at(curves, lengths, 60.0, dt),
+        "hrr_120": hrr_at(curves, lengths, 120.0, dt),
+        "hrrpt_index": index,
+        "hrrpt_s": np.where(index >= 0, index * dt, np.nan),
+    }
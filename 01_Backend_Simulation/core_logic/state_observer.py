@@ -0,0 +1,197 @@
+import os
+import threading
+import numpy as np
+from core_logic.physio_model import target_hr, hr_step, MAX_EFFECTIVE_INTENSITY
+
+# Ensemble Kalman filter over the hidden state (hr, intensity) of many twins at once.
+# State arrays are (twins, members). Process model: HeartModel's HR kinetics driven by an
+# intensity that random-walks; observation: the sensor BPM with Gaussian noise.
+# Sensor samples are queued as they arrive and assimilated together on the next step,
+# so the cost per message is a dict update and the filter runs vectorized across twins.
+# A twin is only predicted when it has a sample to assimilate: until then its lag grows and
+# the next prediction covers all of it (with the inputs of that moment), so twins without a
+# sensor cost nothing per step.
+MEMBERS = int(os.getenv("OBSERVER_MEMBERS", "32"))
+SENSOR_NOISE_BPM = float(os.getenv("SENSOR_NOISE_BPM", "3.0"))
+INTENSITY_WALK = 0.03          # intensity sd added per sqrt(second)
+HR_PROCESS_SD = 1.0            # model error, BPM per sqrt(second)
+INITIAL_INTENSITY_SD = 0.2
+MAX_INTENSITY = MAX_EFFECTIVE_INTENSITY
+
+
+class EnsembleObserver:
+    """
+    Rows are twins (keyed by twin id), columns ensemble members. observe() queues a
+    sensor sample; step() advances the clock by dt and assimilates the queue, predicting
+    only the twins that have a sample (up to now).
+    """
+    def __init__(self, members=MEMBERS, sensor_sd=SENSOR_NOISE_BPM, seed=None):
+        self.members = members
+        self.sensor_sd = sensor_sd
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()   # samples come from the network thread, steps from the simulation
+        self.rows = {}                 # twin id -> row
+        self.keys = []
+        self.hr = np.empty((0, members))
+        self.intensity = np.empty((0, members))
+        self.resting = np.empty(0)
+        self.max_hr = np.empty(0)
+        self.temperature = np.empty(0)
+        self.slope = np.empty(0)
+        self.lag = np.empty(0)         # seconds since each twin was last predicted
+        self.pending = {}              # twin id -> [sum of BPM, count, sensor sd]
+        self.updated = set()           # twins assimilated by the last step
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def add(self, key, hr, resting_hr, max_hr, intensity=0.1, temperature=20.0, slope=0.0):
+        """New twin, ensemble spread around `hr` (sensor noise) and `intensity`."""
+        hr_members = hr + self.rng.normal(0.0, self.sensor_sd, self.members)
+        intensity_members = np.clip(intensity + self.rng.normal(0.0, INITIAL_INTENSITY_SD, self.members), 0.0, MAX_INTENSITY)
+        with self.lock:
+            if key in self.rows:
+                row = self.rows[key]
+                self.hr[row], self.intensity[row] = hr_members, intensity_members
+                self.resting[row], self.max_hr[row] = resting_hr, max_hr
+                self.temperature[row], self.slope[row] = temperature, slope
+                self.lag[row] = 0.0
+                return
+            self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            self.hr = np.vstack([self.hr, hr_members])
+            self.intensity = np.vstack([self.intensity, intensity_members])
+            self.resting = np.append(self.resting, resting_hr)
+            self.max_hr = np.append(self.max_hr, max_hr)
+            self.temperature = np.append(self.temperature, temperature)
+            self.slope = np.append(self.slope, slope)
+            self.lag = np.append(self.lag, 0.0)
+
+    def remove(self, key):
+        """Drop a twin (the last row takes its place)."""
+        with self.lock:
+            row = self.rows.pop(key, None)
+            if row is None:
+                return
+            self.pending.pop(key, None)
+            last = len(self.keys) - 1
+            if row != last:
+                moved = self.keys[last]
+                self.keys[row] = moved
+                self.rows[moved] = row
+                for array in (self.hr, self.intensity, self.resting, self.max_hr, self.temperature, self.slope, self.lag):
+                    array[row] = array[last]
+            self.keys.pop()
+            self.hr, self.intensity = self.hr[:last], self.intensity[:last]
+            self.resting, self.max_hr = self.resting[:last], self.max_hr[:last]
+            self.temperature, self.slope, self.lag = self.temperature[:last], self.slope[:last], self.lag[:last]
+
+    def set_inputs(self, key, temperature=None, slope=None):
+        with self.lock:
+            row = self.rows[key]
+            if temperature is not None:
+                self.temperature[row] = temperature
+            if slope is not None:
+                self.slope[row] = slope
+
+    def observe(self, key, bpm, sensor_sd=None):
+        """Queue one sensor sample; several in one step are averaged (variance / n)."""
+        with self.lock:
+            if key not in self.rows:
+                return
+            entry = self.pending.get(key)
+            if entry is None:
+                self.pending[key] = [float(bpm), 1, sensor_sd or self.sensor_sd]
+            else:
+                entry[0] += float(bpm)
+                entry[1] += 1
+
+    def step(self, dt=1.0):
+        """Advance dt and assimilate the queued samples. Returns the updated twins."""
+        with self.lock:
+            self.lag += dt
+            self._assimilate()
+            return self.updated
+
+    def predict(self, dt=1.0):
+        """Advance dt and predict every twin now, observed or not."""
+        with self.lock:
+            self.lag += dt
+            self._predict(np.arange(len(self.keys)))
+
+    def assimilate(self):
+        with self.lock:
+            self._assimilate()
+            return self.updated
+
+    def _predict(self, rows):
+        """Bring `rows` up to now: each one over its own lag (HeartModel's kinetics, per member)."""
+        rows = rows[self.lag[rows] > 0]
+        if not len(rows):
+            return
+        dt = self.lag[rows][:, None]
+        self.lag[rows] = 0.0
+        shape = (len(rows), self.members)
+        intensity = self.intensity[rows] + self.rng.normal(0.0, 1.0, shape) * (INTENSITY_WALK * np.sqrt(dt))
+        np.clip(intensity, 0.0, MAX_INTENSITY, out=intensity)
+        self.intensity[rows] = intensity
+
+        target = target_hr(self.resting[rows, None], self.max_hr[rows, None], intensity,
+                           self.temperature[rows, None], self.slope[rows, None])
+        hr = hr_step(self.hr[rows], target, dt)
+        hr += self.rng.normal(0.0, 1.0, shape) * (HR_PROCESS_SD * np.sqrt(dt))
+        self.hr[rows] = hr
+
+    def _assimilate(self):
+        """Stochastic EnKF update (perturbed observations), H = [1, 0], all observed twins at once."""
+        pending, self.pending = self.pending, {}
+        self.updated = set(pending)
+        if not pending:
+            return
+        rows = np.fromiter((self.rows[key] for key in pending), dtype=np.int64, count=len(pending))
+        self._predict(rows)
+        samples = np.array(list(pending.values()))
+        y = samples[:, 0] / samples[:, 1]
+        variance = samples[:, 2] ** 2 / samples[:, 1]
+
+        hr, intensity = self.hr[rows], self.intensity[rows]
+        hr_dev = hr - hr.mean(axis=1, keepdims=True)
+        intensity_dev = intensity - intensity.mean(axis=1, keepdims=True)
+        var_hr = (hr_dev * hr_dev).sum(axis=1) / (self.members - 1)
+        cov_intensity_hr = (intensity_dev * hr_dev).sum(axis=1) / (self.members - 1)
+        denominator = var_hr + variance
+
+        perturbed = y[:, None] + self.rng.normal(0.0, 1.0, hr.shape) * np.sqrt(variance)[:, None]
+        innovation = perturbed - hr
+        self.hr[rows] = hr + (var_hr / denominator)[:, None] * innovation
+        self.intensity[rows] = np.clip(intensity + (cov_intensity_hr / denominator)[:, None] * innovation, 0.0, MAX_INTENSITY)
+
+    def estimate(self, key):
+        """Posterior mean and sd of one twin's hr and intensity (as of its last prediction)."""
+        with self.lock:
+            row = self.rows[key]
+            hr, intensity = self.hr[row], self.intensity[row]
+            return {"hr": float(hr.mean()), "hr_sd": float(hr.std(ddof=1)),
+                    "intensity": float(intensity.mean()), "intensity_sd": float(intensity.std(ddof=1))}
+
+    def estimates(self):
+        """Every twin at once: {"keys", "hr", "hr_sd", "intensity", "intensity_sd"} (arrays by row)."""
+        with self.lock:
+            return {"keys": list(self.keys),
+                    "hr": self.hr.mean(axis=1), "hr_sd": self.hr.std(axis=1, ddof=1),
+                    "intensity": self.intensity.mean(axis=1), "intensity_sd": self.intensity.std(axis=1, ddof=1)}
+
+    def export_state(self, key):
+        with self.lock:
+            row = self.rows[key]
+            return {"hr": self.hr[row].copy(), "intensity": self.intensity[row].copy(), "lag": float(self.lag[row])}
+
+    def import_state(self, key, saved):
+        with self.lock:
+            row = self.rows[key]
+            if saved and len(saved["hr"]) == self.members:
+                self.hr[row], self.intensity[row] = saved["hr"], saved["intensity"]
+                self.lag[row] = saved.get("lag", 0.0)
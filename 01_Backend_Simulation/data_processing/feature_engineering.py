@@ -1,18 +1,21 @@
-import vitaldb
 import pandas as pd
 import numpy as np
 import os
+import sys
+
+# VitalDB tracks are read through the shared on-disk cache (05_Data_Ingestion/vitaldb_cache.py)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from vitaldb_cache import load_frame
 
 def prepare_training_data(case_id=3):
     print(f"⚙️ Starting Feature Engineering - Patient #{case_id}")
     track_names = ['Solar8000/HR', 'Orchestra/PPF20_CE']
     
     try:
-        # 1. Download raw data
-        vf = vitaldb.VitalFile(case_id, track_names)
-        df = vf.to_pandas(track_names, 1.0).dropna()
+        # 1. Raw data (downloaded only the first time, then from the local cache)
+        df = load_frame(case_id, track_names, 1.0).dropna()
         
-        print(f"📥 Raw data downloaded: {len(df)} rows.")
+        print(f"📥 Raw data loaded: {len(df)} rows.")
         
         # 2. FEATURE ENGINEERING: Creating the RMSSD
         print("🧮 Calculating RMSSD (30-second moving window)...")
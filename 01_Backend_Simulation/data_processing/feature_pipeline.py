@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from vitaldb_cache import load_tracks, find_cases
+
+TRACKS = ['Solar8000/HR', 'Orchestra/PPF20_CE']
+HRV_WINDOW = 30            # RR samples, same as HeartModel.rr_history
+CHUNK_ROWS = int(os.getenv("FEATURE_CHUNK_ROWS", "8192"))
+CASES_PER_SHARD = int(os.getenv("FEATURE_CASES_PER_SHARD", "8"))
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "features")
+
+FEATURE_SCHEMA = pa.schema([
+    ("case_id", pa.int32()),
+    ("t", pa.float32()),
+    ("BPM", pa.float32()),
+    ("RR_ms", pa.float32()),
+    ("RMSSD", pa.float32()),
+    ("SD1", pa.float32()),
+    ("SD2", pa.float32()),
+    ("Propofol_Level", pa.float32()),
+])
+
+
+class HRVWindow:
+    """
+    Rolling RMSSD / SD1 / SD2 over the last HRV_WINDOW RR intervals, as in
+    HeartModel._calculate_hrv_metrics, computed chunk by chunk: only the
+    last HRV_WINDOW - 1 RR values are carried to the next chunk.
+    """
+    def __init__(self, window=HRV_WINDOW):
+        self.window = window
+        self.tail = np.empty(0)
+
+    def update(self, rr):
+        """Features for every RR of the chunk (NaN until the window is full)."""
+        series = pd.Series(np.concatenate((self.tail, rr)))
+        sq_diffs = series.diff() ** 2
+        rmssd = np.sqrt(sq_diffs.rolling(self.window - 1).mean())
+        sdrr = series.rolling(self.window).std(ddof=0)
+        sd1 = rmssd / np.sqrt(2)
+        sd2 = np.sqrt(np.maximum(0.0, 2 * sdrr ** 2 - sd1 ** 2))
+
+        carried = len(self.tail)
+        self.tail = series.to_numpy()[-(self.window - 1):]
+        return (rmssd.to_numpy()[carried:], sd1.to_numpy()[carried:], sd2.to_numpy()[carried:])
+
+
+def iter_case_features(case_id, values, interval=1.0, chunk_rows=CHUNK_ROWS):
+    """Feature tables of one case, `chunk_rows` input rows at a time."""
+    hrv = HRVWindow()
+    for start in range(0, len(values), chunk_rows):
+        chunk = values[start:start + chunk_rows]
+        t = (start + np.arange(len(chunk))) * interval
+        # Monitor off (NaN / 0 BPM) or no infusion track: dropped as in a dropna() of the whole case
+        keep = ~np.isnan(chunk).any(axis=1) & (chunk[:, 0] > 0)
+        if not keep.any():
+            continue
+        bpm, propofol, t = chunk[keep, 0], chunk[keep, 1], t[keep]
+
+        rr = 60000.0 / bpm.astype(np.float64)
+        rmssd, sd1, sd2 = hrv.update(rr)
+        full = ~np.isnan(sd2)
+        if not full.any():
+            continue
+        yield pa.table({
+            "case_id": np.full(int(full.sum()), case_id, dtype=np.int32),
+            "t": t[full].astype(np.float32),
+            "BPM": bpm[full],
+            "RR_ms": rr[full].astype(np.float32),
+            "RMSSD": rmssd[full].astype(np.float32),
+            "SD1": sd1[full].astype(np.float32),
+            "SD2": sd2[full].astype(np.float32),
+            "Propofol_Level": propofol[full],
+        }, schema=FEATURE_SCHEMA)
+
+
+def _process_shard(args):
+    """One worker task: a few cases -> one Parquet shard, written row group by row group."""
+    shard_path, case_ids, tracks, interval, chunk_rows, cache_dir, source_dir = args
+    rows, seconds, done, failed = 0, 0.0, [], {}
+    with pq.ParquetWriter(shard_path, FEATURE_SCHEMA, compression="zstd") as writer:
+        for case_id in case_ids:
+            try:
+                values = load_tracks(case_id, tracks, interval, cache_dir=cache_dir, source_dir=source_dir)
+            except Exception as e:
+                failed[case_id] = str(e)
+                continue
+            for table in iter_case_features(case_id, values, interval, chunk_rows):
+                writer.write_table(table)
+                rows += table.num_rows
+            seconds += len(values) * interval
+            done.append(case_id)
+    return {"path": os.path.basename(shard_path), "cases": done, "rows": rows,
+            "case_hours": round(seconds / 3600.0, 3), "failed": failed}
+
+
+def run_pipeline(case_ids, output_dir=DEFAULT_OUTPUT, tracks=TRACKS, interval=1.0, workers=None,
+                 cases_per_shard=CASES_PER_SHARD, chunk_rows=CHUNK_ROWS, cache_dir=None, source_dir=None):
+    """Featurize many cases in a process pool into sharded Parquet + manifest.json."""
+    from vitaldb_cache import VITALDB_CACHE_DIR
+    cache_dir = cache_dir or VITALDB_CACHE_DIR
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    case_ids = list(case_ids)
+    tasks = [(os.path.join(output_dir, f"part-{i:05d}.parquet"), case_ids[start:start + cases_per_shard],
+              list(tracks), interval, chunk_rows, cache_dir, source_dir)
+             for i, start in enumerate(range(0, len(case_ids), cases_per_shard))]
+
+    start = time.perf_counter()
+    if workers == 1:
+        shards = [_process_shard(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_process_shard, tasks))
+    elapsed = time.perf_counter() - start
+
+    case_hours = sum(s["case_hours"] for s in shards)
+    manifest = {
+        "tracks": list(tracks),
+        "interval": interval,
+        "hrv_window": HRV_WINDOW,
+        "columns": FEATURE_SCHEMA.names,
+        "rows": sum(s["rows"] for s in shards),
+        "case_hours": round(case_hours, 3),
+        "elapsed_s": round(elapsed, 3),
+        "case_hours_per_s": round(case_hours / max(elapsed, 1e-9), 2),
+        "shards": shards,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(output_dir=DEFAULT_OUTPUT):
+    with open(os.path.join(output_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    manifest["paths"] = [os.path.join(output_dir, s["path"]) for s in manifest["shards"]]
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-case VitalDB feature pipeline (sharded Parquet)")
+    parser.add_argument("case_ids", nargs="*", type=int)
+    parser.add_argument("--limit", type=int, default=200, help="cases when no ids are given")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    case_ids = args.case_ids or find_cases(TRACKS)[:args.limit]
+    print(f"⚙️ Feature pipeline: {len(case_ids)} cases -> {args.output}")
+    manifest = run_pipeline(case_ids, args.output, workers=args.workers)
+    failed = sum(len(s["failed"]) for s in manifest["shards"])
+    print(f"✅ {manifest['rows']:,} rows in {len(manifest['shards'])} shards ({failed} cases failed)")
+    print(f"⏱️ {manifest['case_hours']:.1f} case-hours in {manifest['elapsed_s']:.1f}s "
+          f"= {manifest['case_hours_per_s']:.1f} case-hours/s")
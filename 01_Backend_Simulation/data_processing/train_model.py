@@ -1,13 +1,127 @@
 import pandas as pd
 import numpy as np
 import os
+import time
+import argparse
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.neural_network import MLPRegressor
+from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_squared_error, r2_score
 from skl2onnx import convert_sklearn
 from skl2onnx.common.data_types import FloatTensorType
 
+FEATURES = ['BPM', 'RMSSD']
+ONNX_PATH = os.path.join(os.path.dirname(__file__), 'anesthesia_model.onnx')
+BATCH_ROWS = int(os.getenv("TRAIN_BATCH_ROWS", "4096"))
+EPOCHS = int(os.getenv("TRAIN_EPOCHS", "20"))
+HOLDOUT_EVERY = 5          # every 5th case is kept for evaluation (no leakage between patients)
+
+
+def export_onnx(scaler, model, onnx_path=ONNX_PATH):
+    """Scaler + MLP as ONNX graph: consumers feed raw BPM / RMSSD, any batch size."""
+    pipeline = Pipeline([("scaler", scaler), ("mlp", model)])
+    initial_type = [('float_input', FloatTensorType([None, len(FEATURES)]))]
+    # div: Sub/Div nodes instead of the ai.onnx.ml Scaler op, which tract (Rust) does not run
+    onnx_model = convert_sklearn(pipeline, initial_types=initial_type, options={StandardScaler: {"div": "div"}})
+    with open(onnx_path, "wb") as f:
+        f.write(onnx_model.SerializeToString())
+    return pipeline
+
+
+def check_onnx_parity(pipeline, onnx_path=ONNX_PATH, batch_sizes=(1, 32, 1024), repeats=20, seed=0):
+    """Max |sklearn - ONNX| and median latency per batch size (inputs in the clinical range)."""
+    import onnxruntime as ort
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+    rng = np.random.default_rng(seed)
+
+    report = {}
+    for batch in batch_sizes:
+        X = np.column_stack((rng.uniform(40, 140, batch), rng.uniform(2, 120, batch))).astype(np.float32)
+        expected = pipeline.predict(X)
+        got = session.run(None, {input_name: X})[0].ravel()
+
+        timings = {"sklearn": [], "onnx": []}
+        for _ in range(repeats):
+            start = time.perf_counter()
+            pipeline.predict(X)
+            timings["sklearn"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            session.run(None, {input_name: X})
+            timings["onnx"].append(time.perf_counter() - start)
+
+        report[batch] = {
+            "max_abs_diff": float(np.max(np.abs(expected - got))),
+            "sklearn_ms": float(np.median(timings["sklearn"]) * 1000),
+            "onnx_ms": float(np.median(timings["onnx"]) * 1000),
+        }
+    return report
+
+
+def iter_batches(paths, batch_rows=BATCH_ROWS):
+    """(case_id, X, propofol) batches streamed from the Parquet shards of the feature pipeline."""
+    import pyarrow.parquet as pq
+    for path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=["case_id"] + FEATURES + ["Propofol_Level"]):
+            case_id = batch.column("case_id").to_numpy()
+            X = np.column_stack([batch.column(name).to_numpy() for name in FEATURES]).astype(np.float64)
+            yield case_id, X, batch.column("Propofol_Level").to_numpy().astype(np.float64)
+
+
+def train_streaming(feature_dir, epochs=EPOCHS, batch_rows=BATCH_ROWS, onnx_path=ONNX_PATH, seed=42):
+    """
+    Out-of-core training on the sharded features: memory is one batch,
+    whatever the number of cases. Returns (pipeline, metrics).
+    """
+    from data_processing.feature_pipeline import read_manifest
+    paths = read_manifest(feature_dir)["paths"]
+
+    # Pass 1: scaler statistics and target range, on the training cases only
+    scaler = StandardScaler()
+    max_propofol, train_rows = 0.0, 0
+    for case_id, X, propofol in iter_batches(paths, batch_rows):
+        train = case_id % HOLDOUT_EVERY != 0
+        if train.any():
+            scaler.partial_fit(X[train])
+            max_propofol = max(max_propofol, float(propofol[train].max()))
+            train_rows += int(train.sum())
+    if train_rows == 0 or max_propofol <= 0:
+        raise ValueError(f"No usable training rows in {feature_dir}")
+    print(f"📊 Streaming {train_rows:,} training samples from {len(paths)} shards")
+
+    # Depth Score 0-100 relative to the highest dose seen
+    model = MLPRegressor(hidden_layer_sizes=(16, 8), random_state=seed)
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        for case_id, X, propofol in iter_batches(paths, batch_rows):
+            train = case_id % HOLDOUT_EVERY != 0
+            if not train.any():
+                continue
+            order = rng.permutation(int(train.sum()))
+            model.partial_fit(scaler.transform(X[train][order]), (propofol[train][order] / max_propofol) * 100.0)
+        print(f"⚙️ Epoch {epoch + 1}/{epochs} (loss {model.loss_:.2f})")
+
+    # Held-out cases, streamed: R2 from running sums
+    n, sse, sum_y, sum_y2 = 0, 0.0, 0.0, 0.0
+    for case_id, X, propofol in iter_batches(paths, batch_rows):
+        test = case_id % HOLDOUT_EVERY == 0
+        if not test.any():
+            continue
+        y = (propofol[test] / max_propofol) * 100.0
+        pred = model.predict(scaler.transform(X[test]))
+        n += len(y)
+        sse += float(((y - pred) ** 2).sum())
+        sum_y += float(y.sum())
+        sum_y2 += float((y ** 2).sum())
+    sst = sum_y2 - sum_y ** 2 / n if n else 0.0
+    metrics = {"train_rows": train_rows, "test_rows": n, "max_propofol": max_propofol,
+               "mse": sse / n if n else None, "r2": 1 - sse / sst if sst > 0 else None}
+
+    pipeline = export_onnx(scaler, model, onnx_path)
+    return pipeline, metrics
+
+
 def train_anesthesia_model():
     print("🧠 Starting the Artificial Intelligence Laboratory...")
     
@@ -27,7 +141,7 @@ def train_anesthesia_model():
     print(f"📊 Data loaded: {len(df)} samples.")
     
     # 2. Define Features and Target
-    X = df[['BPM', 'RMSSD']].values
+    X = df[FEATURES].values
     y = df['Depth_Score'].values
     
     # Separate into Training (80%) and Test (20%)
@@ -55,20 +169,32 @@ def train_anesthesia_model():
     
     # 5. Export the AI to ONNX (The universal standard for carrying to Rust)
     print("\n📦 Packing the AI into a universal format (ONNX)...")
-    
-    # Specify that the input is 2 floating point numbers (BPM and RMSSD)
-    initial_type = [('float_input', FloatTensorType([None, 2]))]
-    
-    # Note: In a strict production environment we would also export the 'scaler', 
-    # but for the base architecture we export the model pure.
-    onnx_model = convert_sklearn(model, initial_types=initial_type)
-    
-    onnx_path = os.path.join(os.path.dirname(__file__), 'anesthesia_model.onnx')
-    with open(onnx_path, "wb") as f:
-        f.write(onnx_model.SerializeToString())
+    # Scaler included in the graph: Rust sends raw BPM / RMSSD
+    pipeline = export_onnx(scaler, model)
         
-    print(f"🚀 Model exported successfully to {onnx_path}")
+    print(f"🚀 Model exported successfully to {ONNX_PATH}")
     print("Este archivo .onnx es el 'cerebro' que inyectaremos en Rust.")
+    return pipeline
+
+
+def print_parity(report):
+    for batch, row in report.items():
+        print(f"   batch {batch:>5}: max |Δ| {row['max_abs_diff']:.2e} | sklearn {row['sklearn_ms']:.3f} ms | onnx {row['onnx_ms']:.3f} ms")
+
 
 if __name__ == "__main__":
-    train_anesthesia_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the anesthesia depth model and export it to ONNX")
+    parser.add_argument("--features", help="feature_pipeline output dir (streaming training); default: training_data.csv")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    args = parser.parse_args()
+
+    if args.features:
+        pipeline, metrics = train_streaming(args.features, epochs=args.epochs)
+        r2 = f"{metrics['r2']:.2f}" if metrics['r2'] is not None else "n/a"
+        print(f"✅ Streaming training done: R2 {r2} on {metrics['test_rows']:,} held-out samples")
+    else:
+        pipeline = train_anesthesia_model()
+
+    if pipeline is not None:
+        print("🔬 sklearn vs ONNX parity:")
+        print_parity(check_onnx_parity(pipeline))
@@ -1,7 +1,9 @@
-import vitaldb
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from vitaldb_cache import find_cases, load_frame
 
 def find_and_explore_case():
     print("🔍 Starting Smart VitalDB Radar...")
@@ -10,7 +12,7 @@ def find_and_explore_case():
     
     try:
         print("🌐 Consulting the VitalDB master index in South Korea...")
-        case_ids = vitaldb.find_cases(track_names)
+        case_ids = find_cases(track_names)
         
         if not case_ids:
             print("❌ No cases found with these signals in the entire database.")
@@ -22,8 +24,7 @@ def find_and_explore_case():
         case_id = case_ids[0]
         
         print(f"🏥 Downloading vital signs for patient #{case_id}...")
-        vf = vitaldb.VitalFile(case_id, track_names)
-        df = vf.to_pandas(track_names, 1.0)
+        df = load_frame(case_id, track_names, 1.0)
         
         # Clean empty data (moments where the monitor was off)
         df = df.dropna()
@@ -0,0 +1,127 @@
+import os
+import json
+
+# Declarative rules evaluated on every tick, for every twin.
+#  - threshold: raised when `field` goes above `above`, cleared only when it falls
+#               below `clear_below` (hysteresis; defaults to `above`)
+#  - change:    fires when `field` changes (by more than `min_delta` if numeric)
+# `cooldown_s` delays repeated raised / changed events of the same rule for the same twin
+# (never a cleared one).
+DEFAULT_RULES = [
+    {"id": "zone_change", "type": "change", "field": "zone"},
+    {"id": "hr_above_limit", "type": "threshold", "field": "bpm", "above": 180.0, "clear_below": 175.0},
+    {"id": "recovery_start", "type": "threshold", "field": "is_recovering", "above": 0.5},
+    {"id": "hrrpt_detected", "type": "change", "field": "hrrpt", "min_delta": 5.0, "cooldown_s": 60.0},
+    {"id": "trimp_budget_exceeded", "type": "threshold", "field": "trimp", "above": 150.0},
+]
+
+ALERT_TOPIC = "heart/alerts"
+
+
+def _compile_threshold(rule):
+    field = rule["field"]
+    above = float(rule["above"])
+    clear_below = float(rule.get("clear_below", above))
+
+    def check(metrics, active):
+        value = metrics.get(field)
+        if value is None:
+            return active, None
+        if not active and value > above:
+            return True, ("raised", value)
+        if active and value < clear_below:
+            return False, ("cleared", value)
+        return active, None
+
+    return check
+
+
+def _compile_change(rule):
+    field = rule["field"]
+    min_delta = float(rule.get("min_delta", 0.0))
+
+    def check(metrics, last):
+        value = metrics.get(field)
+        if value is None or value == last:
+            return last, None
+        if last is None:
+            # First sample of a twin: baseline only, nothing changed yet
+            return value, None
+        if min_delta and abs(value - last) <= min_delta:
+            return last, None
+        return value, ("changed", value)
+
+    return check
+
+
+COMPILERS = {"threshold": _compile_threshold, "change": _compile_change}
+
+
+class AlertEngine:
+    """
+    Evaluates precompiled rules per twin. State is one slot per (twin, rule), so
+    the cost per tick is O(rules) and independent of how many clients listen.
+    """
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self._checks = [COMPILERS[rule["type"]](rule) for rule in self.rules]
+        self._cooldowns = [float(rule.get("cooldown_s", 0.0)) for rule in self.rules]
+        self._state = {}      # twin_id -> [rule state]
+        self._last_fired = {}  # twin_id -> [last event time]
+
+    def evaluate(self, twin_id, metrics: dict, now: float):
+        """Return the list of events produced by this tick (usually empty)."""
+        state = self._state.get(twin_id)
+        if state is None:
+            state = self._state[twin_id] = [None] * len(self._checks)
+            self._last_fired[twin_id] = [None] * len(self._checks)
+        last_fired = self._last_fired[twin_id]
+
+        events = []
+        for i, check in enumerate(self._checks):
+            new_state, hit = check(metrics, state[i])
+            if hit is None:
+                state[i] = new_state
+                continue
+            if hit[0] != "cleared":
+                # Cooldown: a suppressed raise / change leaves the state (and the change
+                # baseline) untouched, so it fires once the cooldown is over if still true.
+                # A clear is never suppressed: clients must not keep a stale raised alert.
+                cooldown = self._cooldowns[i]
+                if cooldown and last_fired[i] is not None and now - last_fired[i] < cooldown:
+                    continue
+                last_fired[i] = now
+            state[i] = new_state
+            rule = self.rules[i]
+            events.append({
+                "twin_id": twin_id,
+                "rule": rule["id"],
+                "field": rule["field"],
+                "state": hit[0],
+                "value": hit[1],
+                "time": now,
+            })
+        return events
+
+    def export_state(self, twin_id):
+        """Rule state of one twin (plain lists), for a checkpoint."""
+        return {"state": self._state.get(twin_id), "last_fired": self._last_fired.get(twin_id)}
+
+    def import_state(self, twin_id, saved):
+        if saved and saved.get("state") is not None and len(saved["state"]) == len(self._checks):
+            self._state[twin_id] = list(saved["state"])
+            self._last_fired[twin_id] = list(saved["last_fired"])
+
+    def forget(self, twin_id):
+        """Drop the state of a twin that left this engine."""
+        self._state.pop(twin_id, None)
+        self._last_fired.pop(twin_id, None)
+
+
+def load_rules():
+    """Rules from the JSON file in ALERT_RULES_PATH, or the defaults."""
+    path = os.getenv("ALERT_RULES_PATH")
+    if not path:
+        return DEFAULT_RULES
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,75 @@
+import os
+import time
+import numpy as np
+
+# Ingest accounting for load tests: fleet messages carry "run", "sensor_id", "seq" and
+# "sent_at" (sender's time.time()); plain sensor messages are not tracked at all.
+INGEST_TOPIC = "heart/admin/ingest"
+INGEST_REPORT_S = float(os.getenv("INGEST_REPORT_S", "5"))
+LATENCY_WINDOW = 100_000     # latest latencies kept for the percentiles
+
+
+class IngestStats:
+    """Per-run counters as seen by the engine: received, lost (sequence gaps), out of order, latency."""
+    def __init__(self, report_every_s=INGEST_REPORT_S, clock=time.time):
+        self.report_every_s = report_every_s
+        self.clock = clock
+        self.run = None
+        self._reset(None)
+
+    def _reset(self, run):
+        self.run = run
+        self.received = 0
+        self.lost = 0
+        self.out_of_order = 0
+        self.last_seq = {}
+        self.latencies = None    # allocated by the first tracked message (engines host many twins)
+        self.n_latencies = 0
+        self.started = self.clock()
+        self.last_report = self.started
+
+    def record(self, data):
+        """Account one fleet message; True when a periodic report is due."""
+        now = self.clock()
+        if data.get("run") != self.run:
+            self._reset(data.get("run"))
+        self.received += 1
+
+        source, seq = data.get("sensor_id"), int(data["seq"])
+        last = self.last_seq.get(source)
+        if last is None or seq > last:
+            if last is not None:
+                self.lost += seq - last - 1
+            self.last_seq[source] = seq
+        else:
+            # Late arrival of a sequence number already counted as lost
+            self.out_of_order += 1
+            self.lost = max(0, self.lost - 1)
+
+        if self.latencies is None:
+            self.latencies = np.empty(LATENCY_WINDOW)
+        self.latencies[self.n_latencies % LATENCY_WINDOW] = now - float(data["sent_at"])
+        self.n_latencies += 1
+
+        if now - self.last_report >= self.report_every_s:
+            self.last_report = now
+            return True
+        return False
+
+    def snapshot(self, final=False):
+        latencies = self.latencies[:min(self.n_latencies, LATENCY_WINDOW)] * 1000.0 if self.n_latencies else np.empty(0)
+        elapsed = max(self.clock() - self.started, 1e-9)
+        report = {
+            "run": self.run,
+            "final": final,
+            "received": self.received,
+            "lost": self.lost,
+            "out_of_order": self.out_of_order,
+            "sources": len(self.last_seq),
+            "rate_msg_s": round(self.received / elapsed, 1),
+        }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            report["latency_ms"] = {"p50": round(float(p50), 2), "p95": round(float(p95), 2),
+                                    "p99": round(float(p99), 2), "max": round(float(latencies.max()), 2)}
+        return report
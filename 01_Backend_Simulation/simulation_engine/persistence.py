@@ -0,0 +1,88 @@
+import os
+
+
+# Fields compared against the last persisted row and their default deadbands
+# (same units as the HeartLog columns: BPM, TRIMP units, %, ms...)
+DEFAULT_DEADBANDS = {
+    "bpm": 2.0,
+    "trimp": 0.5,
+    "eccentric_load": 0.5,
+    "hrr": 1.0,
+    "hrrpt": 1.0,
+    "sd1": 5.0,
+    "sd2": 5.0,
+    "intensity": 0.02,
+    "slope": 0.5,
+}
+
+# Categorical fields: any change forces a write
+CATEGORICAL_FIELDS = ("zone", "color")
+
+
+class PersistencePolicy:
+    """Base policy: every tick is stored (the historical behaviour)."""
+    def should_persist(self, row: dict, now: float) -> bool:
+        return True
+
+
+class KeyframeDeadbandPolicy(PersistencePolicy):
+    """
+    Change-aware persistence. A full row (keyframe) is written every
+    `keyframe_interval` seconds; in between, a row is written only when a
+    numeric field leaves its deadband or the zone changes.
+    Readers rebuild the 1 Hz series with sample-and-hold (see history_service).
+    """
+    def __init__(self, keyframe_interval: float = 60.0, deadbands: dict = None):
+        self.keyframe_interval = keyframe_interval
+        self.deadbands = dict(DEFAULT_DEADBANDS)
+        if deadbands:
+            self.deadbands.update(deadbands)
+        self.last_row = None
+        self.last_write_time = None
+
+    def should_persist(self, row: dict, now: float) -> bool:
+        if self.last_row is None or (now - self.last_write_time) >= self.keyframe_interval:
+            self._remember(row, now)
+            return True
+
+        for field in CATEGORICAL_FIELDS:
+            if row.get(field) != self.last_row.get(field):
+                self._remember(row, now)
+                return True
+
+        for field, band in self.deadbands.items():
+            new, old = row.get(field), self.last_row.get(field)
+            if new is None or old is None:
+                if new is not old:
+                    self._remember(row, now)
+                    return True
+                continue
+            if abs(new - old) > band:
+                self._remember(row, now)
+                return True
+
+        return False
+
+    def _remember(self, row, now):
+        self.last_row = dict(row)
+        # Every write re-anchors the keyframe clock, so no value is held longer
+        # than keyframe_interval seconds
+        self.last_write_time = now
+
+
+def build_persistence_policy():
+    """Build the policy from the environment (PERSISTENCE_POLICY=every_tick|deadband)."""
+    mode = os.getenv("PERSISTENCE_POLICY", "every_tick").lower()
+    if mode != "deadband":
+        return PersistencePolicy()
+
+    deadbands = {}
+    for field in DEFAULT_DEADBANDS:
+        value = os.getenv(f"DEADBAND_{field.upper()}")
+        if value is not None:
+            deadbands[field] = float(value)
+
+    return KeyframeDeadbandPolicy(
+        keyframe_interval=float(os.getenv("KEYFRAME_SECONDS", "60")),
+        deadbands=deadbands,
+    )
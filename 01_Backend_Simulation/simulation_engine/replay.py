@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import struct
+import hashlib
+import secrets
+import argparse
+import threading
+
+# Recording format (one session per file, records appended, little endian):
+#   MAGIC + one JSON metadata line (seed, dt, twin_id, ticks, started_at)
+#   records: <d t><H topic_len><I payload_len> topic payload
+# A record with the TICK_TOPIC pseudo-topic marks one simulation step, so a
+# replay reproduces the exact interleaving of messages and ticks.
+MAGIC = b"HRTREC1\n"
+RECORD_HEADER = struct.Struct("<dHI")
+TICK_TOPIC = "__tick__"
+
+ENGINE_TOPICS = ("heart/sensor/data", "heart/env/terrain", "heart/env/temperature", "heart/physio/intensity")
+
+
+def new_seed():
+    """Seed of a session recorded without one: stored in the header, so the replay still reproduces it."""
+    return secrets.randbits(32)
+
+
+def next_free_path(path):
+    """`path` if it holds no recording yet, else the first free `<stem>-<n><ext>` next to it."""
+    stem, ext = os.path.splitext(path)
+    candidate, n = path, 1
+    while os.path.exists(candidate) and os.path.getsize(candidate) > 0:
+        candidate, n = f"{stem}-{n}{ext}", n + 1
+    return candidate
+
+
+class InputRecorder:
+    """
+    Thread-safe recorder of one engine session. Refuses a file that already holds a
+    recording: appending would replay the new inputs under the old header's seed/dt/twin.
+    """
+    def __init__(self, path, seed=None, dt=1.0, twin_id="default", ticks=True):
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            raise FileExistsError(f"{path} already holds a recording (use next_free_path)")
+        self.seed = seed if seed is not None else new_seed()
+        self.file = open(path, "wb")
+        self.lock = threading.Lock()
+        meta = {"seed": self.seed, "dt": dt, "twin_id": twin_id, "ticks": ticks, "started_at": time.time()}
+        self.file.write(MAGIC + json.dumps(meta).encode() + b"\n")
+        self.file.flush()
+
+    def record(self, topic: str, payload: bytes, t: float = None):
+        topic_bytes = topic.encode()
+        header = RECORD_HEADER.pack(time.time() if t is None else t, len(topic_bytes), len(payload))
+        with self.lock:
+            self.file.write(header + topic_bytes + payload)
+
+    def mark_tick(self, t: float = None):
+        self.record(TICK_TOPIC, b"", t)
+        # One flush per tick: at most one tick of inputs is lost on a crash
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_recording(path):
+    """Return (metadata, iterator of (t, topic, payload)). A truncated tail is ignored."""
+    f = open(path, "rb")
+    if f.read(len(MAGIC)) != MAGIC:
+        f.close()
+        raise ValueError(f"{path} is not an engine recording")
+    meta = json.loads(f.readline())
+
+    def records():
+        with f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                t, topic_len, payload_len = RECORD_HEADER.unpack(header)
+                body = f.read(topic_len + payload_len)
+                if len(body) < topic_len + payload_len:
+                    return
+                yield t, body[:topic_len].decode(), body[topic_len:]
+
+    return meta, records()
+
+
+def _synthesize_ticks(records, dt):
+    """Broker-only captures have no tick marks: insert one every dt of recorded time."""
+    next_tick = None
+    for t, topic, payload in records:
+        if next_tick is None:
+            next_tick = t + dt
+        while t >= next_tick:
+            yield next_tick, TICK_TOPIC, b""
+            next_tick += dt
+        yield t, topic, payload
+
+
+class ReplayDriver:
+    """
+    Feeds a recording into a HeartEngineWorker without broker or database.
+    speed=1.0 is real time, N is N x faster, None/0 is as fast as possible.
+    """
+    def __init__(self, path, seed=None, speed=None):
+        self.path = path
+        self.meta, self.records = read_recording(path)
+        self.seed = seed if seed is not None else self.meta.get("seed")
+        self.speed = speed
+
+    def run(self, worker=None, on_tick=None):
+        """Replay every record; return (ticks, sha256 of the outputs)."""
+        if worker is None:
+            from simulation_engine.worker import HeartEngineWorker
+            worker = HeartEngineWorker(seed=self.seed, verbose=False, twin_id=self.meta.get("twin_id"))
+
+        digest = hashlib.sha256()
+        ticks = 0
+        first_t = None
+        wall_start = time.perf_counter()
+
+        records = self.records
+        if not self.meta.get("ticks", True):
+            records = _synthesize_ticks(records, self.meta.get("dt", 1.0))
+
+        for t, topic, payload in records:
+            if self.speed:
+                first_t = t if first_t is None else first_t
+                delay = (t - first_t) / self.speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            if topic == TICK_TOPIC:
+                metrics, row = worker.tick()
+                digest.update(repr(sorted(row.items())).encode())
+                ticks += 1
+                if on_tick:
+                    on_tick(metrics, row)
+            else:
+                worker.apply_input(topic, payload)
+
+        return ticks, digest.hexdigest()
+
+
+def record_from_broker(path, host, seed=None):
+    """Capture the engine topics straight from the broker (no engine needed)."""
+    import paho.mqtt.client as mqtt
+    path = next_free_path(path)
+    recorder = InputRecorder(path, seed=seed, ticks=False)
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, "HeartEngine_Recorder")
+    client.on_connect = lambda c, u, f, rc, p=None: [c.subscribe(topic) for topic in ENGINE_TOPICS]
+    client.on_message = lambda c, u, msg: recorder.record(msg.topic, msg.payload)
+    client.connect(host, 1883, 60)
+    print(f"🎙️ Recording {', '.join(ENGINE_TOPICS)} to {path} (Ctrl+C to stop)")
+    try:
+        client.loop_forever()
+    except KeyboardInterrupt:
+        recorder.close()
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    parser = argparse.ArgumentParser(description="Record / replay engine input streams")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("path")
+    rec.add_argument("--host", default=os.getenv("MQTT_HOST", "localhost"))
+    rec.add_argument("--seed", type=int, default=None)
+    rep = sub.add_parser("replay")
+    rep.add_argument("path")
+    rep.add_argument("--speed", type=float, default=0.0, help="1 = real time, N = N x, 0 = max")
+    rep.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_from_broker(args.path, args.host, args.seed)
+    else:
+        start = time.perf_counter()
+        ticks, digest = ReplayDriver(args.path, seed=args.seed, speed=args.speed).run()
+        elapsed = time.perf_counter() - start
+        print(f"⏯️ Replayed {ticks} ticks in {elapsed:.2f}s ({ticks / max(elapsed, 1e-9):,.0f} ticks/s)")
+        print(f"🔐 Output digest: {digest}")
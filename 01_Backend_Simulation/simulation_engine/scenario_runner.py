@@ -0,0 +1,89 @@
+import sys
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from core_logic.physio_model import HeartModel
+from core_logic.ensemble import run_ensemble, BANDS, PERCENTILES
+from scenario_compiler import load_scenario
+
+# Offline batch simulation: a compiled scenario run by many twins, no broker, no database
+OUTPUTS = ("bpm", "hrr_1min", "hrrpt", "rmssd", "sd1", "sd2")
+ENGINE_PATIENT = {"age": 25, "sex": "male", "resting_hr": 50, "max_hr": 195, "vo2_max": 55.0}
+
+
+def _run_twins(args):
+    scenario, seeds, patient = args
+    out = {name: np.empty((len(seeds), len(scenario))) for name in OUTPUTS}
+    intensity, temperature, slope = scenario.intensity.tolist(), scenario.temperature.tolist(), scenario.slope.tolist()
+    for k, seed in enumerate(seeds):
+        twin = HeartModel(**patient, seed=None if seed is None else int(seed))
+        rows = [twin.simulate_step(intensity=intensity[i], dt=scenario.dt, temperature=temperature[i],
+                                   slope_percent=slope[i]) for i in range(len(scenario))]
+        for name in OUTPUTS:
+            out[name][k] = [row[name] for row in rows]
+    return out
+
+
+def run_scenario(scenario, seeds=(0,), patient=None, workers=1):
+    """{output: (n_twins, n_steps) array}, one twin per seed, twins split over a process pool."""
+    patient = patient or ENGINE_PATIENT
+    seeds = list(seeds)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(seeds)))
+    tasks = [(scenario, part, patient) for part in np.array_split(seeds, workers) if len(part)]
+    if workers == 1:
+        parts = [_run_twins(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_twins, tasks))
+    return {name: np.concatenate([part[name] for part in parts]) for name in OUTPUTS}
+
+
+def forecast_scenario(scenario, members=1000, patient=None, seed=None, param_sd=None):
+    """p5 / p50 / p95 bands of a compiled scenario from one vectorized ensemble (core_logic/ensemble.py)."""
+    patient = patient or ENGINE_PATIENT
+    return run_ensemble(scenario.intensity, scenario.temperature, scenario.slope, dt=scenario.dt, members=members,
+                        age=patient["age"], sex=patient["sex"], resting_hr=patient["resting_hr"],
+                        max_hr=patient.get("max_hr"), param_sd=param_sd, seed=seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a workout scenario offline for many twins")
+    parser.add_argument("scenario", help="scenario name (05_Data_Ingestion/scenarios/<name>.json) or path")
+    parser.add_argument("--twins", type=int, default=10)
+    parser.add_argument("--dt", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="save the arrays as .npz")
+    parser.add_argument("--ensemble", type=int, default=0, help="K members: percentile bands instead of twins")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario, args.dt)
+    if args.ensemble:
+        start = time.perf_counter()
+        bands = forecast_scenario(scenario, args.ensemble, seed=0)
+        elapsed = time.perf_counter() - start
+        print(f"✅ {scenario.name}: ensemble of {args.ensemble:,} x {len(scenario):,} steps in {elapsed:.2f}s")
+        labels = " / ".join(f"p{p}" for p in PERCENTILES)
+        print(f"❤️ BPM peak {labels}: {' / '.join(f'{v:.1f}' for v in bands['bpm'].max(axis=1))}")
+        print(f"🔥 TRIMP end {labels}: {' / '.join(f'{v:.1f}' for v in bands['trimp'][:, -1])}")
+        print(f"⏱️ HRRPT last {labels}: {' / '.join(f'{v:.0f}s' for v in bands['hrrpt'][:, -1])}")
+        if args.output:
+            np.savez_compressed(args.output, t=bands["t"], percentiles=PERCENTILES, **{name: bands[name] for name in BANDS})
+            print(f"💾 Saved to {args.output}")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    results = run_scenario(scenario, seeds=range(args.twins), workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    steps = args.twins * len(scenario)
+    print(f"✅ {scenario.name}: {args.twins} twins x {len(scenario):,} steps in {elapsed:.2f}s ({steps / elapsed:,.0f} steps/s)")
+    bpm = results["bpm"]
+    print(f"❤️ BPM mean {bpm.mean():.1f} | peak {bpm.max(axis=1).mean():.1f} | end {bpm[:, -1].mean():.1f}")
+    if args.output:
+        np.savez_compressed(args.output, t=scenario.t, intensity=scenario.intensity, **results)
+        print(f"💾 Saved to {args.output}")
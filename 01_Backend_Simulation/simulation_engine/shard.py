@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import queue
+import hashlib
+import threading
+from simulation_engine.worker import HeartEngineWorker, INPUT_TOPICS, OBSERVER
+from core_logic.state_observer import EnsembleObserver
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from message_bus import build_transport, decode
+
+# One engine process = one shard hosting many twins (see supervisor.py).
+# Checkpoints: <SHARD_CHECKPOINT_DIR>/<twin_id>.ckpt, written every CHECKPOINT_EVERY_S and on handoff.
+CHECKPOINT_DIR = os.getenv("SHARD_CHECKPOINT_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints")
+CHECKPOINT_EVERY_S = float(os.getenv("CHECKPOINT_EVERY_S", "10"))
+
+
+def checkpoint_path(twin_id, directory=CHECKPOINT_DIR):
+    return os.path.join(directory, f"{twin_id}.ckpt")
+
+
+def twin_seed(seed, name):
+    """Seed of one twin (or one shard's observer) derived from ENGINE_SEED: reproducible, never shared."""
+    if seed is None:
+        return None
+    return int.from_bytes(hashlib.md5(f"{seed}:{name}".encode()).digest()[:4], "big")
+
+
+class NullSession:
+    """DB stand-in when persistence is off (scaling benchmarks)."""
+    def add(self, obj): pass
+    def commit(self): pass
+    def rollback(self): pass
+    def close(self): pass
+
+
+class EngineShard:
+    """
+    Many twins behind one transport: each input message is decoded once and routed
+    by its twin_id (no twin_id = every twin of the shard); one thread ticks them all,
+    after one vectorized state-observer step for the whole shard (OBSERVER=enkf).
+    """
+    def __init__(self, shard_id, twin_ids=(), transport=None, seed=None, verbose=False, checkpoint_dir=CHECKPOINT_DIR):
+        self.shard_id = shard_id
+        self.seed = seed
+        self.verbose = verbose
+        self.checkpoint_dir = checkpoint_dir
+        self.twins = {}
+        self.lock = threading.Lock()         # self.twins (routing vs adopt / release)
+        self.tick_lock = threading.Lock()    # a released twin is never in the middle of a step
+        self.save_lock = threading.Lock()    # checkpoints: periodic save_all (simulation) vs release (commands)
+        self.steps = 0
+        self.observer = EnsembleObserver(seed=twin_seed(seed, f"observer-{shard_id}")) if OBSERVER == "enkf" else None
+
+        self.client = transport or build_transport(f"HeartEngine_Shard_{shard_id}", host=os.getenv("MQTT_HOST", "localhost"))
+        for topic in INPUT_TOPICS:
+            self.client.subscribe(topic, self.route)
+        for twin_id in twin_ids:
+            self.adopt(twin_id)
+
+    def adopt(self, twin_id):
+        """Host a twin, resumed from its checkpoint when there is one. Returns True if restored."""
+        twin = HeartEngineWorker(seed=twin_seed(self.seed, twin_id), verbose=self.verbose, transport=self.client,
+                                 twin_id=twin_id, subscribe=False, observer=self.observer)
+        path = checkpoint_path(twin_id, self.checkpoint_dir)
+        restored = os.path.exists(path)
+        if restored:
+            with open(path, "rb") as f:
+                twin.restore(f.read())
+        with self.lock:
+            self.twins[twin_id] = twin
+        return restored
+
+    def release(self, twin_id):
+        """Stop hosting a twin; its final checkpoint is what the next owner resumes from."""
+        with self.tick_lock:
+            with self.lock:
+                twin = self.twins.pop(twin_id, None)
+        if twin is not None:
+            self.save(twin, hosted=False)
+            if self.observer is not None:
+                self.observer.remove(twin_id)
+
+    def save(self, twin, hosted=True):
+        """
+        Write a twin's checkpoint. hosted=True (periodic saves): skipped once the twin was
+        released, its final checkpoint is already written and may belong to its next owner.
+        """
+        with self.save_lock:
+            if hosted and self.twins.get(twin.twin_id) is not twin:
+                return
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            path = checkpoint_path(twin.twin_id, self.checkpoint_dir)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(twin.checkpoint())
+            os.replace(tmp_path, path)
+
+    def save_all(self):
+        with self.lock:
+            twins = list(self.twins.values())
+        for twin in twins:
+            self.save(twin)
+
+    def route(self, topic, payload):
+        data = decode(payload)
+        twin_id = data.get("twin_id") if isinstance(data, dict) else None
+        counter = None
+        with self.lock:
+            if twin_id is None:
+                targets = list(self.twins.values())
+            else:
+                targets = [self.twins[twin_id]] if twin_id in self.twins else []
+                if not targets and self.twins:
+                    counter = next(iter(self.twins.values()))
+        if counter is not None:
+            # Fleet load tests address twins nobody hosts: still counted (loss / latency)
+            counter.track_ingest(data)
+        for twin in targets:
+            twin.handle(topic, data)
+
+    def step_all(self, db):
+        """One tick of every hosted twin."""
+        with self.tick_lock:
+            with self.lock:
+                twins = list(self.twins.values())
+            if twins and self.observer is not None:
+                self.observer.step(twins[0].dt)
+            for twin in twins:
+                twin.step(db)
+            self.steps += len(twins)
+        return len(twins)
+
+
+def _simulation_loop(shard, stop, persist, realtime, dt):
+    if persist:
+        from api.database import SessionLocal, init_db
+        init_db()
+    last_checkpoint = time.monotonic()
+    while not stop.is_set():
+        started = time.monotonic()
+        db = SessionLocal() if persist else NullSession()
+        try:
+            shard.step_all(db)
+            if started - last_checkpoint >= CHECKPOINT_EVERY_S:
+                last_checkpoint = started
+                shard.save_all()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ [SHARD {shard.shard_id}] Error Loop: {e}")
+        finally:
+            db.close()
+        if realtime:
+            # Late ticks are not made up: the shard is overloaded, the supervisor stats show it
+            stop.wait(max(0.0, dt - (time.monotonic() - started)))
+
+
+def run_shard(shard_id, twin_ids, cpu, commands, events, options):
+    """
+    Shard process entry point (supervisor.py). Commands on `commands`:
+    ("adopt", ids) / ("release", ids) / ("stats",) / ("stop",); answers on `events`.
+    """
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+    transport = build_transport(f"HeartEngine_Shard_{shard_id}_{os.getpid()}", options.get("transport"),
+                                host=os.getenv("MQTT_HOST", "localhost"))
+    shard = EngineShard(shard_id, twin_ids, transport=transport, seed=options.get("seed"),
+                        verbose=options.get("verbose", False),
+                        checkpoint_dir=options.get("checkpoint_dir", CHECKPOINT_DIR))
+    transport.start(wait=True)
+
+    stop = threading.Event()
+    sim_thread = threading.Thread(target=_simulation_loop, daemon=True, name="heart-simulation",
+                                  args=(shard, stop, options.get("persist", True), options.get("realtime", True),
+                                        options.get("dt", 1.0)))
+    sim_thread.start()
+    events.put(("ready", shard_id, os.getpid()))
+    print(f"🧩 [SHARD {shard_id}] {len(shard.twins)} twins | cpu {cpu} | pid {os.getpid()}")
+
+    while True:
+        if not sim_thread.is_alive():
+            # Twins no longer tick: exit so the supervisor restarts the shard from its checkpoints
+            print(f"💥 [SHARD {shard_id}] simulation thread died: exiting for a restart")
+            transport.stop(flush=False)
+            raise SystemExit(1)
+        try:
+            command, *args = commands.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        if command == "adopt":
+            restored = sum(shard.adopt(twin_id) for twin_id in args[0])
+            events.put(("adopted", shard_id, list(args[0]), restored))
+        elif command == "release":
+            for twin_id in args[0]:
+                shard.release(twin_id)
+            events.put(("released", shard_id, list(args[0])))
+        elif command == "stats":
+            events.put(("stats", shard_id, shard.steps, len(shard.twins)))
+        elif command == "stop":
+            stop.set()
+            sim_thread.join(5)
+            shard.save_all()
+            transport.stop()
+            events.put(("stopped", shard_id))
+            return
@@ -0,0 +1,238 @@
+import os
+import time
+import queue
+import bisect
+import hashlib
+import argparse
+import multiprocessing as mp
+from collections import defaultdict
+from simulation_engine.shard import run_shard, CHECKPOINT_DIR
+
+# K engine shard processes (one GIL each), pinned to cores, twins placed by consistent hashing.
+ENGINE_SHARDS = int(os.getenv("ENGINE_SHARDS", "0")) or os.cpu_count() or 1
+TWIN_IDS = os.getenv("TWIN_IDS", "default")
+VNODES = 64                 # points per shard on the ring: smooths the twin spread
+POLL_S = float(os.getenv("SUPERVISOR_POLL_S", "1.0"))
+REPLY_TIMEOUT_S = 30.0
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hashing: a twin belongs to the first shard point clockwise from its hash.
+    Adding or removing a shard only moves the twins of the arcs it takes or frees.
+    """
+    def __init__(self, shards=(), vnodes=VNODES):
+        self.vnodes = vnodes
+        self.shards = set()
+        self.keys, self.owners = [], []
+        for shard in shards:
+            self.add(shard)
+
+    def _rebuild(self):
+        points = sorted((_hash(f"shard-{shard}#{v}"), shard) for shard in self.shards for v in range(self.vnodes))
+        self.keys = [key for key, _ in points]
+        self.owners = [shard for _, shard in points]
+
+    def add(self, shard):
+        self.shards.add(shard)
+        self._rebuild()
+
+    def remove(self, shard):
+        self.shards.discard(shard)
+        self._rebuild()
+
+    def owner(self, twin_id):
+        if not self.keys:
+            raise ValueError("Empty hash ring")
+        return self.owners[bisect.bisect(self.keys, _hash(twin_id)) % len(self.keys)]
+
+    def assign(self, twin_ids):
+        """{shard: [twin ids]} for every shard of the ring, empty ones included."""
+        assignment = {shard: [] for shard in sorted(self.shards)}
+        for twin_id in twin_ids:
+            assignment[self.owner(twin_id)].append(twin_id)
+        return assignment
+
+
+def parse_twin_ids(value=TWIN_IDS):
+    """'a,b,c' or a count ('1000' -> twin_0000 ... twin_0999)."""
+    value = str(value).strip()
+    if value.isdigit():
+        return [f"twin_{i:04d}" for i in range(int(value))]
+    return [twin_id.strip() for twin_id in value.split(",") if twin_id.strip()]
+
+
+class ShardSupervisor:
+    """
+    Starts the shard processes, restarts the dead ones (their twins resume from the
+    last checkpoint) and rebalances twins when shards are added or removed. During a
+    handoff a moving twin is hosted nowhere: its inputs in that window are dropped.
+    transport="local" gives every shard process its own LocalBus that nothing publishes
+    to: only for benchmarks/shard_scaling.py (ticks without inputs). Real runs use mqtt.
+    """
+    def __init__(self, twin_ids, shards=ENGINE_SHARDS, pin=True, **options):
+        self.twin_ids = list(twin_ids)
+        self.ctx = mp.get_context("spawn")     # no fork of a process with network threads
+        self.options = {"checkpoint_dir": CHECKPOINT_DIR, **options}
+        self.ring = HashRing(range(shards))
+        self.cpus = sorted(os.sched_getaffinity(0)) if pin and hasattr(os, "sched_getaffinity") else None
+        self.processes = {}                    # shard -> (process, command queue)
+        self.events = {}                       # shard -> its event queue
+        self.restarts = 0
+        self.last_handoff = None
+
+    def assignment(self):
+        return self.ring.assign(self.twin_ids)
+
+    def _spawn(self, shard, twin_ids):
+        cpu = self.cpus[shard % len(self.cpus)] if self.cpus else None
+        # Fresh queues per process: a shard killed mid-put can leave its queue locked,
+        # a shared one would then block the replies of every other shard
+        commands, events = self.ctx.Queue(), self.ctx.Queue()
+        process = self.ctx.Process(target=run_shard, name=f"engine-shard-{shard}", daemon=True,
+                                   args=(shard, list(twin_ids), cpu, commands, events, self.options))
+        process.start()
+        self.processes[shard] = (process, commands)
+        self.events[shard] = events
+
+    def send(self, shard, *command):
+        self.processes[shard][1].put(command)
+
+    def _wait(self, kind, shards, timeout=REPLY_TIMEOUT_S):
+        """{shard: reply fields} once every shard in `shards` has answered `kind`."""
+        pending, replies = set(shards), {}
+        deadline = time.monotonic() + timeout
+        while pending:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No '{kind}' from shards {sorted(pending)}")
+            for shard in sorted(pending):
+                try:
+                    event = self.events[shard].get(timeout=0.01)
+                except queue.Empty:
+                    continue
+                if event[0] == kind:
+                    pending.discard(shard)
+                    replies[shard] = event[2:]
+        return replies
+
+    def start(self):
+        for shard, twin_ids in self.assignment().items():
+            self._spawn(shard, twin_ids)
+        self._wait("ready", self.processes)
+        print(f"🚀 {len(self.processes)} engine shards | {len(self.twin_ids)} twins | cpus {self.cpus}")
+
+    def watch(self):
+        """Restart every shard process that died. Returns the restarted shards."""
+        assignment = self.assignment()
+        restarted = []
+        for shard, (process, _) in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            print(f"💥 Shard {shard} died (exit {process.exitcode}): restarting {len(assignment[shard])} twins from their checkpoints")
+            self._spawn(shard, assignment[shard])
+            restarted.append(shard)
+        if restarted:
+            self._wait("ready", restarted)
+            self.restarts += len(restarted)
+        return restarted
+
+    def rebalance(self, previous):
+        """Move the twins whose owner changed: release (final checkpoint) first, then adopt."""
+        owner_before = {twin_id: shard for shard, twin_ids in previous.items() for twin_id in twin_ids}
+        releases, adopts = defaultdict(list), defaultdict(list)
+        for shard, twin_ids in self.assignment().items():
+            for twin_id in twin_ids:
+                before = owner_before.get(twin_id)
+                if before == shard:
+                    continue
+                if before in self.processes:
+                    releases[before].append(twin_id)
+                adopts[shard].append(twin_id)
+        if not adopts:
+            return 0.0
+
+        started = time.perf_counter()
+        for shard, twin_ids in releases.items():
+            self.send(shard, "release", twin_ids)
+        self._wait("released", releases)
+        for shard, twin_ids in adopts.items():
+            self.send(shard, "adopt", twin_ids)
+        self._wait("adopted", adopts)
+        pause = time.perf_counter() - started
+
+        moved = sum(len(twin_ids) for twin_ids in adopts.values())
+        self.last_handoff = {"twins": moved, "pause_s": pause}
+        print(f"🔀 {moved} twins moved, handoff pause {pause * 1000:.0f} ms")
+        return pause
+
+    def add_shard(self):
+        """New shard process; it takes over its arcs of the ring. Returns (shard id, handoff pause)."""
+        previous = self.assignment()
+        shard = max(self.processes, default=-1) + 1
+        self._spawn(shard, [])
+        self._wait("ready", [shard])
+        self.ring.add(shard)
+        return shard, self.rebalance(previous)
+
+    def remove_shard(self, shard):
+        """Hand the shard's twins to the remaining ones, then stop it. Returns the handoff pause."""
+        previous = self.assignment()
+        self.ring.remove(shard)
+        pause = self.rebalance(previous)
+        self._stop_shards([shard])
+        return pause
+
+    def stats(self):
+        for shard in self.processes:
+            self.send(shard, "stats")
+        replies = self._wait("stats", self.processes)
+        return {shard: {"steps": steps, "twins": twins} for shard, (steps, twins) in sorted(replies.items())}
+
+    def _stop_shards(self, shards):
+        for shard in shards:
+            self.send(shard, "stop")
+        try:
+            self._wait("stopped", shards, timeout=10)
+        except TimeoutError as e:
+            print(f"⚠️ {e}: terminating")
+        for shard in shards:
+            process, _ = self.processes.pop(shard)
+            self.events.pop(shard)
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+
+    def stop(self):
+        self._stop_shards(list(self.processes))
+
+    def run(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(POLL_S)
+                self.watch()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the simulation engine as K shard processes")
+    parser.add_argument("--shards", type=int, default=ENGINE_SHARDS)
+    parser.add_argument("--twins", default=TWIN_IDS, help="comma-separated twin ids, or a count")
+    parser.add_argument("--no-pin", action="store_true", help="let the OS schedule the shards")
+    parser.add_argument("--transport", default=None, help="mqtt (default: TRANSPORT)")
+    args = parser.parse_args()
+    transport = args.transport or os.getenv("TRANSPORT", "mqtt")
+    if transport != "mqtt":
+        # Each spawned shard would get its own in-process bus: no input would ever reach it
+        parser.error(f"--transport {transport}: shards are separate processes, only mqtt reaches them")
+
+    seed = os.getenv("ENGINE_SEED")
+    ShardSupervisor(parse_twin_ids(args.twins), shards=args.shards, pin=not args.no_pin,
+                    transport=transport, seed=int(seed) if seed else None).run()
@@ -1,59 +1,125 @@
+import sys
 import time
 import os
-import json
+import pickle
 import threading
 from datetime import datetime, timezone
-import paho.mqtt.client as mqtt
 from api.database import SessionLocal, init_db
 from api.models import HeartLog
 from core_logic.physio_model import HeartModel
+from core_logic.state_observer import EnsembleObserver
+from simulation_engine.persistence import build_persistence_policy
+from simulation_engine.alerts import AlertEngine, ALERT_TOPIC, load_rules
+from simulation_engine.replay import InputRecorder, new_seed, next_free_path
+from simulation_engine.ingest_stats import IngestStats, INGEST_TOPIC
+from api.services.profiler import profiler, ProfilerBusy, PROFILER_INTERVAL_MS
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from message_bus import build_transport, encode, decode
+
+# Admin command: {"seconds": 10, "interval_ms": 5, "twin_id": ...}; result on PROFILE_TOPIC/result/<twin_id>
+PROFILE_TOPIC = "heart/admin/profile"
+# Every tick's row, pushed to the API's live WebSocket (no DB polling)
+METRICS_TOPIC = "heart/metrics"
+INPUT_TOPICS = ("heart/sensor/data", "heart/env/terrain", "heart/env/temperature", "heart/physio/intensity")
+# Sensor BPM: enkf = assimilated by the state observer (core_logic/state_observer.py), direct = overwrites the HR
+OBSERVER = os.getenv("OBSERVER", "enkf")
 
 class HeartEngineWorker:
-    def __init__(self):
-        self.patient = HeartModel(age=25, sex='male', resting_hr=50, max_hr=195, vo2_max=55.0)
+    def __init__(self, seed: int = None, verbose: bool = True, record_path: str = None, transport=None,
+                 twin_id: str = None, subscribe: bool = True, observer: EnsembleObserver = None):
+        self.twin_id = twin_id or os.getenv("TWIN_ID", "default")
+        if record_path and seed is None:
+            seed = new_seed()   # a recorded session must be replayable: draw the seed and store it
+        self.seed = seed
+        self.patient = HeartModel(age=25, sex='male', resting_hr=50, max_hr=195, vo2_max=55.0, seed=seed)
+        self.verbose = verbose
         
         self.current_intensity = 0.1
         self.current_temperature = 20.0
         self.current_slope = 0.0
         self.dt = 1.0 
+        self.persistence = build_persistence_policy()
+        self.alerts = AlertEngine(load_rules())
+
+        # Inputs and ticks are applied under one lock so a recording keeps their real order
+        self.state_lock = threading.Lock()
+        self.recorder = None
+        if record_path:
+            # Never append to an older session (its header has another seed / dt / twin): new file instead
+            record_path = next_free_path(record_path)
+            self.recorder = InputRecorder(record_path, seed=seed, dt=self.dt, twin_id=self.twin_id)
+            if verbose:
+                print(f"🎙️ Recording inputs to {record_path} (seed {seed})")
+        self.ingest = IngestStats()
+
+        # Hidden (hr, intensity) estimated from the sensor (enkf only); a shard shares one observer between its twins and steps it
+        self.owns_observer = observer is None
+        self.observer = None
+        if OBSERVER == "enkf":
+            self.observer = observer if observer is not None else EnsembleObserver(seed=seed)
+            self.observer.add(self.twin_id, hr=self.patient.current_hr, resting_hr=self.patient.resting_hr,
+                              max_hr=self.patient.max_hr, intensity=self.current_intensity)
+        self.estimate = None
         
-        self.mqtt_host = os.getenv("MQTT_HOST", "localhost")
-        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, "HeartEngine_Core_V5")
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
-
-    def on_connect(self, client, userdata, flags, rc, properties=None):
-        if rc == 0:
-            print("✅ Engine Conectado. Escuchando realidad...")
-        
-            client.subscribe("heart/sensor/data")      
-            client.subscribe("heart/env/terrain")      
-            client.subscribe("heart/env/temperature")  
-            client.subscribe("heart/physio/intensity") 
-        else:
-            print(f"❌ Error MQTT: {rc}")
+        # MQTT (broker) or the in-process bus of single_node.py, chosen by TRANSPORT.
+        # subscribe=False: a shard (simulation_engine/shard.py) shares its transport and routes messages itself
+        self.client = transport or build_transport("HeartEngine_Core_V5", host=os.getenv("MQTT_HOST", "localhost"))
+        if subscribe:
+            for topic in INPUT_TOPICS + (PROFILE_TOPIC,):
+                self.client.subscribe(topic, self.handle)
+
+    def handle(self, topic, payload):
+        if topic == PROFILE_TOPIC:
+            self.start_profile(payload)   # admin command: not an input, never recorded
+            return
+        with self.state_lock:
+            if self.recorder:
+                self.recorder.record(topic, encode(payload))
+            self.apply_input(topic, payload)
 
     def on_message(self, client, userdata, msg):
+        """paho-style entry point (tests, replay tools)."""
+        self.handle(msg.topic, msg.payload)
+
+    def apply_input(self, topic, payload):
+        """Update the engine inputs from one message: MQTT bytes or a local object (also used by the replay driver)."""
         try:
-            raw = msg.payload.decode()
-            topic = msg.topic
-            data = json.loads(raw) if "{" in raw else raw
+            data = decode(payload)
+
+            # Counted before the twin filter: fleet devices carry their own twin ids
+            tracked = self.track_ingest(data)
+
+            # Environment / scenario services may serve many twins on one topic: keep only ours
+            if topic.startswith(("heart/env/", "heart/physio/")) and isinstance(data, dict) \
+                    and data.get("twin_id", self.twin_id) != self.twin_id:
+                return
 
             if topic == "heart/env/temperature":
                 # Si data es un dict buscamos la llave, si no, lo tomamos directo
                 val = data.get("temp_c") if isinstance(data, dict) else data
                 self.current_temperature = float(val) if val is not None else 20.0
-                print(f"🌡️ [ENV] ¡Dato de Ginebra recibido!: {self.current_temperature}°C")
+                if self.observer is not None:
+                    self.observer.set_inputs(self.twin_id, temperature=self.current_temperature)
+                if self.verbose:
+                    print(f"🌡️ [ENV] ¡Dato de Ginebra recibido!: {self.current_temperature}°C")
 
             elif topic == "heart/sensor/data":
                 val = data.get("bpm") if isinstance(data, dict) else data
                 if val:
-                    self.patient.current_hr = float(val)
-                    print(f"🔄 [REAL SYNC] BPM Actualizado: {val}")
+                    if self.observer is not None:
+                        # Weighed against the twin's own prediction on the next tick
+                        self.observer.observe(self.twin_id, float(val), data.get("noise_bpm") if isinstance(data, dict) else None)
+                    else:
+                        self.patient.current_hr = float(val)
+                    if self.verbose and not tracked:
+                        print(f"🔄 [REAL SYNC] BPM Actualizado: {val}")
 
             elif topic == "heart/env/terrain":
                 val = data.get("slope_percent") if isinstance(data, dict) else data
                 self.current_slope = float(val) if val is not None else 0.0
+                if self.observer is not None:
+                    self.observer.set_inputs(self.twin_id, slope=self.current_slope)
 
             elif topic == "heart/physio/intensity":
                 val = data.get("intensity") if isinstance(data, dict) else data
@@ -62,60 +128,140 @@ class HeartEngineWorker:
         except Exception as e:
             print(f"⚠️ Error en mensaje ({topic}): {e}")
 
+    def track_ingest(self, data):
+        """
+        Load tests (fleet_generator.py), any input topic: sequence + send time for loss / latency,
+        reported on INGEST_TOPIC. True when the message belongs to a fleet run.
+        """
+        tracked = isinstance(data, dict) and ("seq" in data or "fleet_end" in data)
+        if tracked and (data.get("fleet_end") or self.ingest.record(data)):
+            self.client.publish(f"{INGEST_TOPIC}/{self.twin_id}",
+                                self.ingest.snapshot(final=bool(data.get("fleet_end"))), qos=1)
+        return tracked
+
+    def start_profile(self, payload: bytes):
+        """Profile the simulation and paho threads in the background, publish the collapsed stacks."""
+        command = decode(payload or b"{}")
+        if not isinstance(command, dict):
+            command = {}
+        if command.get("twin_id", self.twin_id) != self.twin_id:
+            return
+        # Never block the network thread: it is one of the threads being sampled
+        threading.Thread(target=self._run_profile, daemon=True, name="profile-command",
+                         args=(command.get("seconds", 5), command.get("interval_ms", PROFILER_INTERVAL_MS))).start()
+
+    def _run_profile(self, seconds, interval_ms=PROFILER_INTERVAL_MS):
+        try:
+            result = profiler.profile(seconds, interval_ms)
+            result["twin_id"] = self.twin_id
+        except (ProfilerBusy, TypeError, ValueError) as e:
+            result = {"twin_id": self.twin_id, "error": str(e)}
+        self.client.publish(f"{PROFILE_TOPIC}/result/{self.twin_id}", result, qos=1)
+        if self.verbose:
+            print(f"🔬 [PROFILE] {result.get('samples', 0)} samples published ({result.get('error', 'ok')})")
+
+    def tick(self):
+        """One simulation step. Returns the model metrics and the HeartLog row."""
+        with self.state_lock:
+            if self.recorder:
+                self.recorder.mark_tick()
+            if self.observer is not None:
+                if self.owns_observer:
+                    self.observer.step(self.dt)   # cheap until a sensor sample is queued
+                if self.twin_id in self.observer.updated:
+                    # A sensor sample arrived: the twin continues from the filtered state, not the raw BPM
+                    self.estimate = self.observer.estimate(self.twin_id)
+                    self.patient.current_hr = self.estimate["hr"]
+                    self.current_intensity = self.estimate["intensity"]
+            # The model processes the impact of temperature, slope and intensity
+            metrics = self.patient.simulate_step(
+                intensity=self.current_intensity,
+                dt=self.dt,
+                temperature=self.current_temperature,
+                slope_percent=self.current_slope
+            )
+
+        # PERSISTENCE: Color and Data for Unity
+        row = {
+            "bpm": metrics["bpm"],
+            "trimp": metrics["trimp"],
+            "eccentric_load": metrics["eccentric_load"],
+            "hrr": metrics.get("hrr_1min"),
+            "hrrpt": metrics.get("hrrpt"),
+            "sd1": metrics.get("sd1"),
+            "sd2": metrics.get("sd2"),
+            "zone": metrics["zone"],
+            "color": metrics["color"],
+            "intensity": self.current_intensity,
+            "slope": self.current_slope,
+        }
+        return metrics, row
+
+    def checkpoint(self) -> bytes:
+        """Model, inputs and alert state as bytes: restored by a shard after a restart or a handoff."""
+        with self.state_lock:
+            return pickle.dumps({
+                "twin_id": self.twin_id,
+                "patient": self.patient,
+                "inputs": (self.current_intensity, self.current_temperature, self.current_slope),
+                "alerts": self.alerts.export_state(self.twin_id),
+                "observer": self.observer.export_state(self.twin_id) if self.observer is not None else None,
+                "saved_at": time.time(),
+            })
+
+    def restore(self, blob: bytes):
+        state = pickle.loads(blob)
+        with self.state_lock:
+            self.patient = state["patient"]
+            self.current_intensity, self.current_temperature, self.current_slope = state["inputs"]
+            self.alerts.import_state(self.twin_id, state["alerts"])
+            if self.observer is not None:
+                self.observer.import_state(self.twin_id, state.get("observer"))
+        return state["saved_at"]
+
     def run(self):
         # IMPORTANTE: 4 espacios de sangría en todo este bloque
-        import threading
         print("🚀 Lanzando hilo de simulación...")
-        sim_thread = threading.Thread(target=self.simulation_loop, daemon=True)
+        sim_thread = threading.Thread(target=self.simulation_loop, daemon=True, name="heart-simulation")
         sim_thread.start()
-        
-        connected = False
-        while not connected:
-            try:
-                self.client.connect(self.mqtt_host, 1883, 60)
-                connected = True
-                print("✅ Motor conectado al Broker MQTT.")
-            except Exception as e:
-                print(f"❌ Reintentando conexión MQTT: {e}")
-                time.sleep(2)
 
+        # Blocks: paho network loop (retries until the broker answers) or the local bus
         self.client.loop_forever()
 
 
 
+    def step(self, db):
+        """One full tick: simulation, persistence and alerts. Returns the HeartLog row."""
+        metrics, row = self.tick()
+        now = datetime.now(timezone.utc)
+
+        # The policy decides if this tick is worth a row (keyframe / deadband)
+        if self.persistence.should_persist(row, now.timestamp()):
+            db.add(HeartLog(time=now, twin_id=self.twin_id, **row))
+            db.commit()
+
+        # LIVE: every tick goes to the WebSocket clients, whether persisted or not
+        live = dict(row, time=now.timestamp(), twin_id=self.twin_id)
+        if self.estimate:
+            live["observer"] = self.estimate    # last assimilation: hr / intensity with their sd
+        self.client.publish(f"{METRICS_TOPIC}/{self.twin_id}", live)
+
+        # ALERTS: evaluated once here, pushed to every listener by the broker
+        for event in self.alerts.evaluate(self.twin_id, metrics, now.timestamp()):
+            self.client.publish(f"{ALERT_TOPIC}/{self.twin_id}", event, qos=1)
+            if self.verbose:
+                print(f"🚨 [ALERT] {event['rule']} {event['state']}: {event['value']}")
+        return row
+
     def simulation_loop(self):
         init_db()
         while True:
             db = SessionLocal()
             try:
-                # The model processes the impact of temperature, slope and intensity
-                metrics = self.patient.simulate_step(
-                    intensity=self.current_intensity,
-                    dt=self.dt,
-                    temperature=self.current_temperature,
-                    slope_percent=self.current_slope
-                )
-                
-                # PERSISTENCE: Color and Data for Unity
-                log = HeartLog(
-                    bpm=metrics["bpm"],
-                    trimp=metrics["trimp"],
-                    eccentric_load=metrics["eccentric_load"],
-                    hrr=metrics.get("hrr_1min"),  
-                    hrrpt=metrics.get("hrrpt"),
-                    sd1=metrics.get("sd1"),
-                    sd2=metrics.get("sd2"),   
-                    zone=metrics["zone"],
-                    color=metrics["color"], 
-                    intensity=self.current_intensity,
-                    slope=self.current_slope,
-                    time=datetime.now(timezone.utc)
-                )
-                db.add(log)
-                db.commit()
+                row = self.step(db)
                 
                 # Log de control
-                print(f"[TIC] BPM: {log.bpm:.1f} | {log.zone} | Color: {log.color} | Temp: {self.current_temperature}°C")
+                print(f"[TIC] BPM: {row['bpm']:.1f} | {row['zone']} | Color: {row['color']} | Temp: {self.current_temperature}°C")
                 
             except Exception as e:
                 db.rollback()
@@ -127,5 +273,6 @@ class HeartEngineWorker:
     
 
 if __name__ == "__main__":
-    worker = HeartEngineWorker()
+    seed = os.getenv("ENGINE_SEED")
+    worker = HeartEngineWorker(seed=int(seed) if seed else None, record_path=os.getenv("RECORD_PATH"))
     worker.run()
\ No newline at end of file
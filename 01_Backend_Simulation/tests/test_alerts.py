@@ -0,0 +1,37 @@
+from simulation_engine.alerts import AlertEngine
+
+
+def test_threshold_hysteresis_does_not_flap():
+    engine = AlertEngine([{"id": "hr", "type": "threshold", "field": "bpm", "above": 180, "clear_below": 175}])
+    states = []
+    for t, bpm in enumerate([170, 181, 179, 182, 178, 174, 181]):
+        states += [e["state"] for e in engine.evaluate("twin_1", {"bpm": bpm}, t)]
+    # 179/182/178 oscillate around the limit but stay inside the hysteresis band
+    assert states == ["raised", "cleared", "raised"]
+
+
+def test_change_rule_uses_first_sample_as_baseline_and_cooldown():
+    engine = AlertEngine([{"id": "zone", "type": "change", "field": "zone", "cooldown_s": 10}])
+    assert engine.evaluate("twin_1", {"zone": "Zone 1"}, 0) == []
+    assert len(engine.evaluate("twin_1", {"zone": "Zone 2"}, 1)) == 1
+    assert engine.evaluate("twin_1", {"zone": "Zone 3"}, 2) == []  # duplicate inside the cooldown
+    assert len(engine.evaluate("twin_1", {"zone": "Zone 4"}, 20)) == 1
+    # A suppressed change is not lost: the baseline stays at Zone 4, so Zone 5 fires after the cooldown
+    assert engine.evaluate("twin_1", {"zone": "Zone 5"}, 21) == []
+    assert [e["value"] for e in engine.evaluate("twin_1", {"zone": "Zone 5"}, 30)] == ["Zone 5"]
+
+
+def test_cooldown_never_swallows_a_clear():
+    engine = AlertEngine([{"id": "hr", "type": "threshold", "field": "bpm", "above": 180, "cooldown_s": 10}])
+    states = []
+    for t, bpm in enumerate([190, 170, 190, 190, 190, 190, 190, 190, 190, 190, 190, 190]):
+        states += [(t, e["state"]) for e in engine.evaluate("twin_1", {"bpm": bpm}, t)]
+    # Cleared right after raised; the second raise waits for the cooldown, then fires
+    assert states == [(0, "raised"), (1, "cleared"), (10, "raised")]
+
+
+def test_state_is_per_twin():
+    engine = AlertEngine([{"id": "hr", "type": "threshold", "field": "bpm", "above": 180}])
+    assert len(engine.evaluate("twin_1", {"bpm": 190}, 0)) == 1
+    assert len(engine.evaluate("twin_2", {"bpm": 190}, 0)) == 1
+    assert engine.evaluate("twin_1", {"bpm": 191}, 1) == []
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import Future
+import numpy as np
+import onnxruntime as ort
+from core_logic.anesthesia_inference import AnesthesiaInference, MODEL_PATH
+from core_logic.physio_model import HeartModel, ClinicalProfile
+
+
+def test_concurrent_requests_share_one_batch_and_match_onnx():
+    inference = AnesthesiaInference(window_ms=20)
+    try:
+        bpm = np.linspace(50, 120, 64)
+        rmssd = np.linspace(5, 80, 64)
+        futures = [inference.submit(b, r) for b, r in zip(bpm, rmssd)]
+        scores = np.array([f.result(timeout=2) for f in futures])
+        assert inference.stats["batches"] == 1
+
+        # Reference: the same quantized inputs straight through onnxruntime
+        session = ort.InferenceSession(MODEL_PATH, providers=["CPUExecutionProvider"])
+        X = np.column_stack((np.round(bpm * 2) / 2, np.round(rmssd * 2) / 2)).astype(np.float32)
+        expected = session.run(None, {session.get_inputs()[0].name: X})[0].ravel()
+        assert np.allclose(scores, expected, atol=1e-5)
+
+        # Repeats (after quantization) never reach the model again
+        assert inference.predict(bpm[3] + 0.1, rmssd[3] - 0.1) == scores[3]
+        assert np.allclose(inference.predict_many(bpm, rmssd), scores)
+        assert inference.stats["batches"] == 1 and inference.stats["memo_hits"] == 65
+    finally:
+        inference.close()
+
+
+def test_requests_queue_and_memo_hits_answer_while_a_batch_runs():
+    inference = AnesthesiaInference(window_ms=1)
+    try:
+        inference.predict(70, 40)                       # memo: (70, 40)
+        started, release = threading.Event(), threading.Event()
+        infer = inference._infer
+
+        def slow_infer(keys):
+            started.set()
+            release.wait(2)
+            return infer(keys)
+
+        inference._infer = slow_infer
+        first = inference.submit(90, 20)
+        assert started.wait(1)
+        # The session is busy: a memo hit resolves at once and a new request only queues
+        assert inference.submit(70, 40).done()
+        second = inference.submit(110, 10)
+        assert not second.done() and len(inference.pending) == 1
+        release.set()
+        assert first.result(timeout=2) > 0 and second.result(timeout=2) > 0
+    finally:
+        inference.close()
+
+
+class InstantInference:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, bpm, rmssd):
+        self.calls.append((bpm, rmssd))
+        future = Future()
+        future.set_result(42.0)
+        return future
+
+
+def test_clinical_profile_updates_depth_at_its_cadence():
+    inference = InstantInference()
+    model = HeartModel(age=60, sex='female', resting_hr=65, profile=ClinicalProfile(inference, update_every_s=5), seed=1)
+    states = [model.simulate_step(intensity=0.0, dt=1.0) for _ in range(20)]
+
+    assert states[0]["anesthesia_depth"] == 0.0
+    assert states[-1]["anesthesia_depth"] == 42.0
+    # 20 s at one prediction every 5 s (the first one needs two RR samples for the RMSSD)
+    assert 3 <= len(inference.calls) <= 4
@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from athlete_replay import select_athletes
+
+
+class Store:
+    def users(self):
+        return [1503960366, 1624580081, 1644430081, 12]
+
+
+def test_counts_are_explicit_and_short_ids_stay_ids():
+    store = Store()
+    assert select_athletes(store, "all") == store.users()
+    assert select_athletes(store, "first:2") == [1503960366, 1624580081]
+    assert select_athletes(store, "first:1000000") == store.users()
+    # A bare number is an athlete id, however short
+    assert select_athletes(store, "12") == [12]
+    assert select_athletes(store, "1503960366,12") == [1503960366, 12]
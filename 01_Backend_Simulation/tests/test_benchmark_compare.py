@@ -0,0 +1,27 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../benchmarks/regression')))
+from compare import compare
+
+
+def test_regression_past_threshold_is_flagged():
+    baseline = {"a": {"median": 1.0}, "b": {"median": 1.0}}
+    current = {"a": {"median": 1.2}, "b": {"median": 1.5}, "c": {"median": 0.1}}
+    status = {row[0]: row[4] for row in compare(current, baseline, threshold_pct=25)}
+    assert status == {"a": "ok", "b": "REGRESSION", "c": "new"}
+
+
+def test_faster_run_is_ok():
+    rows = compare({"a": {"median": 0.5}}, {"a": {"median": 1.0}}, threshold_pct=10)
+    assert rows[0][3] == -50.0
+    assert rows[0][4] == "ok"
+
+
+def test_change_is_measured_against_the_calibration():
+    # The whole machine is twice as slow: raw medians doubled, calibrated ones did not move
+    baseline = {"a": {"median": 1.0, "relative": 10.0}, "test_bench_calibration.py::test_calibration": {"median": 0.1}}
+    current = {"a": {"median": 2.0, "relative": 10.0}, "test_bench_calibration.py::test_calibration": {"median": 0.2}}
+    rows = compare(current, baseline, threshold_pct=25)
+    assert [row[0] for row in rows] == ["a"]
+    assert rows[0][3] == 0.0 and rows[0][4] == "ok"
@@ -0,0 +1,97 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from climate_providers import ClimateCache, FileReplayProvider, OpenMeteoProvider
+from climate_fetcher import parse_locations, build_payloads
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingProvider:
+    name = "Counting"
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def fetch(self, cells):
+        self.calls.append(list(cells))
+        return {} if self.fail else {cell: 20.0 + cell[0] for cell in cells}
+
+
+def test_nearby_twins_share_one_lookup_and_ttl_is_respected():
+    clock = FakeClock()
+    provider = CountingProvider()
+    cache = ClimateCache(provider, ttl_s=600, decimals=1, clock=clock)
+    # 500 twins around Geneva + 500 around Zurich -> two cells
+    locations = {f"g{i}": (46.2 + i * 1e-5, 6.14) for i in range(500)}
+    locations.update({f"z{i}": (47.37, 8.54 + i * 1e-5) for i in range(500)})
+
+    assert cache.refresh(locations) == 2
+    assert len(provider.calls) == 1 and len(provider.calls[0]) == 2
+    clock.now += 300
+    assert cache.refresh(locations) == 0
+    clock.now += 300
+    assert cache.refresh(locations) == 2
+    assert len(provider.calls) == 2
+    assert len(build_payloads(cache, locations, "Counting")) == 1000
+
+
+def test_failed_refresh_keeps_serving_the_stale_value():
+    clock = FakeClock()
+    cache = ClimateCache(CountingProvider(), ttl_s=60, clock=clock)
+    locations = {"default": (46.2044, 6.1432)}
+    cache.refresh(locations)
+    cache.provider = CountingProvider(fail=True)
+    clock.now += 120
+    assert cache.refresh(locations) == 0   # the fetch failed: nothing was refreshed
+    payload = build_payloads(cache, locations, "Counting")[0]
+    assert payload["stale"] and payload["temp_c"] == 20.0 + 46.2
+
+
+def test_file_replay_follows_the_replay_clock(tmp_path):
+    path = tmp_path / "weather.csv"
+    path.write_text("timestamp,lat,lon,temp_c\n"
+                    "2024-07-01T12:00:00Z,46.2,6.1,25.0\n"
+                    "2024-07-01T13:00:00Z,46.2,6.1,27.5\n"
+                    "2024-07-01T12:00:00Z,47.4,8.5,22.0\n")
+    clock = FakeClock()
+    provider = FileReplayProvider(str(path), speed=60.0, clock=clock)
+    assert provider.fetch([(46.2, 6.1), (47.3, 8.6)]) == {(46.2, 6.1): 25.0, (47.3, 8.6): 22.0}
+    clock.now += 60  # one hour of weather at 60x
+    assert provider.fetch([(46.2, 6.1)]) == {(46.2, 6.1): 27.5}
+
+
+def test_open_meteo_batches_every_cell_in_one_request():
+    class Session:
+        def __init__(self):
+            self.requests = []
+
+        def get(self, url, params, timeout):
+            self.requests.append(params)
+            lats = params["latitude"].split(",")
+            body = [{"current": {"temperature_2m": float(lat)}} for lat in lats]
+            return type("Response", (), {"raise_for_status": lambda self: None, "json": lambda self: body})()
+
+    session = Session()
+    temps = OpenMeteoProvider(session).fetch([(46.2, 6.1), (47.4, 8.5), (45.8, 6.9)])
+    assert len(session.requests) == 1
+    assert temps[(47.4, 8.5)] == 47.4
+
+
+def test_locations_spec_and_engine_only_takes_its_own_twin():
+    assert parse_locations("a=46.2,6.1;b=47.4,8.5") == {"a": (46.2, 6.1), "b": (47.4, 8.5)}
+
+    from simulation_engine.worker import HeartEngineWorker
+    worker = HeartEngineWorker(seed=1, verbose=False)
+    worker.apply_input("heart/env/temperature", b'{"temp_c": 31.0, "twin_id": "someone_else"}')
+    assert worker.current_temperature == 20.0
+    worker.apply_input("heart/env/temperature", f'{{"temp_c": 31.0, "twin_id": "{worker.twin_id}"}}'.encode())
+    assert worker.current_temperature == 31.0
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from core_logic.ensemble import run_ensemble
+from core_logic.physio_model import HeartModel
+
+PATIENT = {"age": 25, "sex": "male", "resting_hr": 50, "max_hr": 195}
+
+
+def session():
+    # 5 min hard, 3 min easy (a recovery), with some heat and hills
+    intensity = np.r_[np.full(300, 0.85), np.full(180, 0.05)]
+    temperature = np.r_[np.full(200, 20.0), np.full(280, 29.0)]
+    slope = np.r_[np.full(100, 6.0), np.full(380, -3.0)]
+    return intensity, temperature, slope
+
+
+def test_without_parameter_spread_matches_the_scalar_model():
+    intensity, temperature, slope = session()
+    bands = run_ensemble(intensity, temperature, slope, members=64, param_sd={}, seed=1, hrrpt_every_s=1.0, **PATIENT)
+
+    model = HeartModel(**PATIENT, seed=1)
+    hr, trimp, hrrpt = [], [], []
+    for i in range(len(intensity)):
+        metrics = model.simulate_step(intensity[i], 1.0, temperature[i], slope[i])
+        hr.append(model.current_hr)
+        trimp.append(model.profile.cumulative_trimp)
+        hrrpt.append(metrics["hrrpt"])
+
+    # HRV noise only: TRIMP and HRRPT identical in every member, BPM centred on the noise-free HR
+    np.testing.assert_allclose(bands["trimp"], np.tile(trimp, (3, 1)), rtol=1e-9)
+    np.testing.assert_allclose(bands["hrrpt"][1], hrrpt)
+    assert np.abs(bands["bpm"][1] - hr).max() < 1.0
+    assert (bands["bpm"][2] - bands["bpm"][0]).mean() > 0.5
+
+
+def test_long_cool_down_hrrpt_stops_at_the_window_like_the_scalar_model():
+    # 2 min hard, then 10 min easy: twice HRRPT_WINDOW_S of recovery
+    intensity = np.r_[np.full(120, 0.9), np.full(600, 0.0)]
+    bands = run_ensemble(intensity, members=16, param_sd={}, seed=1, **PATIENT)
+
+    model = HeartModel(**PATIENT, seed=1)
+    hrrpt = [model.simulate_step(value, 1.0)["hrrpt"] for value in intensity]
+    assert len(model.recovery_curve) == 300
+    # Evaluated every 10 s and when the window fills: equal from there on
+    np.testing.assert_allclose(bands["hrrpt"][1, 420:], hrrpt[420:])
+    assert hrrpt[-1] == hrrpt[420] > 0
+
+
+def test_bands_are_ordered_reproducible_and_spread():
+    intensity, temperature, slope = session()
+    a = run_ensemble(intensity, temperature, slope, members=500, seed=7, **PATIENT)
+    b = run_ensemble(intensity, temperature, slope, members=500, seed=7, **PATIENT)
+    for name in ("bpm", "trimp", "hrrpt"):
+        np.testing.assert_array_equal(a[name], b[name])
+        assert (np.diff(a[name], axis=0) >= 0).all()
+    assert a["trimp"][2, -1] - a["trimp"][0, -1] > 0.5
+    assert a["hrrpt"][2, -1] > a["hrrpt"][0, -1] > 0
+    assert len(a["t"]) == len(intensity)
+
+
+def test_forecast_endpoint():
+    client = TestClient(app)
+    response = client.get("/forecast/sprint_recovery", params={"members": 200, "step": 10, "seed": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["bpm"]) == {"p5", "p50", "p95"}
+    assert len(body["t"]) == len(body["bpm"]["p50"]) and body["t"][1] - body["t"][0] == pytest.approx(10)
+    assert client.get("/forecast/no_such_session").status_code == 404
+    assert client.get("/forecast/sprint_recovery", params={"members": 0}).status_code == 422
@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from core_logic.physio_model import HeartModel
+from data_processing.feature_pipeline import iter_case_features, run_pipeline, read_manifest
+
+
+def synthetic_case(rows=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.empty((rows, 2), dtype=np.float32)
+    values[:, 0] = 70 + 10 * np.sin(np.arange(rows) / 300) + rng.normal(0, 2, rows)
+    values[:, 1] = np.linspace(0, 4, rows)
+    values[rng.choice(rows, rows // 25, replace=False), 0] = np.nan  # monitor gaps
+    return values
+
+
+def test_chunked_features_match_a_single_pass():
+    values = synthetic_case()
+    whole = pa.concat_tables(iter_case_features(7, values, chunk_rows=len(values)))
+    chunked = pa.concat_tables(iter_case_features(7, values, chunk_rows=333))
+    assert whole.num_rows == chunked.num_rows
+    for column in ("t", "RMSSD", "SD1", "SD2"):
+        assert np.allclose(whole[column].to_numpy(), chunked[column].to_numpy(), rtol=1e-5)
+
+
+def test_hrv_matches_the_heart_model_window():
+    values = synthetic_case(rows=200)
+    table = pa.concat_tables(iter_case_features(1, values, chunk_rows=64))
+
+    model = HeartModel(age=25, sex='male', resting_hr=50, max_hr=195, vo2_max=55.0)
+    model.rr_history.clear()
+    rr = table["RR_ms"].to_numpy()
+    # Last row: the model's 30-RR window is the last 30 RR values of the clean series
+    clean = values[~np.isnan(values).any(axis=1), 0]
+    model.rr_history.extend(60000.0 / clean[-30:].astype(np.float64))
+    rmssd, sd1, sd2 = model._calculate_hrv_metrics()
+    assert abs(table["RMSSD"][-1].as_py() - rmssd) < 0.01
+    assert abs(table["SD2"][-1].as_py() - sd2) < 0.01
+    assert abs(rr[-1] - 60000.0 / clean[-1]) < 1e-3
+
+
+def test_pipeline_writes_shards_and_manifest(tmp_path):
+    source = tmp_path / "cases"
+    source.mkdir()
+    for case_id in range(1, 6):
+        values = synthetic_case(rows=1200, seed=case_id)
+        lines = ["Time,Solar8000/HR,Orchestra/PPF20_CE"] + [
+            f"{t},{'' if np.isnan(h) else h},{p}" for t, (h, p) in enumerate(values)]
+        (source / f"{case_id}.csv").write_text("\n".join(lines))
+
+    output = str(tmp_path / "features")
+    manifest = run_pipeline(range(1, 7), output, workers=2, cases_per_shard=2,
+                            cache_dir=str(tmp_path / "cache"), source_dir=str(source))
+    assert len(manifest["shards"]) == 3
+    assert abs(manifest["case_hours"] - 5 * 1200 / 3600) < 1e-3
+    assert manifest["shards"][-1]["failed"].keys() == {6}
+
+    paths = read_manifest(output)["paths"]
+    total = sum(pq.ParquetFile(p).metadata.num_rows for p in paths)
+    assert total == manifest["rows"] and all(os.path.exists(p) for p in paths)
@@ -0,0 +1,38 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from fitbit_store import open_store
+
+
+def write_fitbit_csv(path):
+    rows = ["Id,Time,Value"]
+    # Two users, irregular sampling, file order not sorted by time
+    for user in (2022484408, 1503960366):
+        for second in (30, 0, 5, 15, 20, 55):
+            rows.append(f"{user},4/12/2016 1:40:{second:02d} PM,{100 + second}")
+    with open(path, "w") as f:
+        f.write("\n".join(rows) + "\n")
+
+
+def test_window_uses_half_open_interval(tmp_path):
+    csv_path = str(tmp_path / "heartrate_seconds_merged.csv")
+    write_fitbit_csv(csv_path)
+    store = open_store(csv_path)
+
+    assert store.users() == [1503960366, 2022484408]
+    times, values = store.window(2022484408, "2016-04-12 13:40:05", "2016-04-12 13:40:30")
+    assert np.all(np.diff(times) > 0)
+    assert values.tolist() == [105.0, 115.0, 120.0]
+
+
+def test_store_is_reused_until_the_csv_changes(tmp_path):
+    csv_path = str(tmp_path / "heartrate_seconds_merged.csv")
+    write_fitbit_csv(csv_path)
+    first = open_store(csv_path)
+    meta_mtime = os.path.getmtime(os.path.join(first.store_dir, "meta.json"))
+
+    second = open_store(csv_path)
+    assert os.path.getmtime(os.path.join(second.store_dir, "meta.json")) == meta_mtime
+    assert len(second.to_frame([1503960366])) == 6
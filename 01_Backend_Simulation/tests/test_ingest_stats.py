@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import asyncio
+from simulation_engine.ingest_stats import IngestStats, INGEST_TOPIC
+from simulation_engine.worker import HeartEngineWorker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from fleet_generator import Fleet
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def message(seq, sensor="A", run="r1", sent_at=999.99):
+    return {"bpm": 120, "sensor_id": sensor, "seq": seq, "sent_at": sent_at, "run": run}
+
+
+def test_gaps_out_of_order_and_latency():
+    stats = IngestStats(report_every_s=5, clock=Clock())
+    for seq in [0, 1, 3, 4, 2, 7]:
+        stats.record(message(seq))
+    stats.record(message(0, sensor="B"))
+    report = stats.snapshot()
+    # A: 5-6 never arrived, 2 arrived late
+    assert report["received"] == 7 and report["lost"] == 2 and report["out_of_order"] == 1
+    assert report["sources"] == 2
+    assert report["latency_ms"]["p50"] == 10.0
+
+
+def test_new_run_resets_and_report_is_due_periodically():
+    clock = Clock()
+    stats = IngestStats(report_every_s=5, clock=clock)
+    assert not stats.record(message(0))
+    clock.now += 6
+    assert stats.record(message(1))
+    stats.record(message(0, run="r2"))
+    report = stats.snapshot()
+    assert report["run"] == "r2" and report["received"] == 1 and report["lost"] == 0
+
+
+class RecordingClient:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload))
+
+
+def test_worker_publishes_final_report_on_fleet_end():
+    worker = HeartEngineWorker(seed=1, verbose=False)
+    worker.client = RecordingClient()
+    for seq in (0, 1, 3):
+        worker.handle("heart/sensor/data", json.dumps(message(seq, sent_at=0)).encode())
+    worker.handle("heart/sensor/data", json.dumps({"bpm": 90}).encode())   # untracked
+    worker.handle("heart/sensor/data", json.dumps({"run": "r1", "fleet_end": True}).encode())
+
+    reports = [p for t, p in worker.client.published if t == f"{INGEST_TOPIC}/default"]
+    assert len(reports) == 1
+    assert reports[0]["final"] and reports[0]["received"] == 3 and reports[0]["lost"] == 1
+    # The BPM reaches the twin through the state observer, on the next tick
+    assert worker.patient.current_hr == 50
+    worker.tick()
+    assert 80 < worker.estimate["hr"] < 125 and worker.patient.current_hr > 60
+
+
+def test_every_channel_is_counted_before_the_twin_filter():
+    worker = HeartEngineWorker(seed=1, verbose=False)
+    worker.client = RecordingClient()
+    for channel in ("intensity", "temperature", "terrain"):
+        fleet = Fleet(3, payload_format="json", channel=channel, run_id=channel)
+        for i in range(3):
+            worker.handle(fleet.topic, fleet.payload(i).encode())
+        worker.handle(fleet.topic, json.dumps({"run": channel, "fleet_end": True, "sensor_id": "fleet"}).encode())
+        report = worker.client.published[-1][1]
+        assert report["run"] == channel and report["final"] and report["received"] == 3
+
+    # Counted, but addressed to fleet_<i>: the inputs of this twin are untouched
+    assert (worker.current_intensity, worker.current_temperature, worker.current_slope) == (0.1, 20.0, 0.0)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, topic, payload, qos=0):
+        self.messages.append((topic, payload))
+        return 0
+
+
+def test_fleet_rate_bursts_and_sequences():
+    connections = [FakeConnection(), FakeConnection()]
+    fleet = Fleet(200, rate_hz=20, jitter=0.2, burst=2, payload_format="compact", run_id="t")
+    sent = asyncio.run(fleet.run(connections, 0.5))
+
+    # 200 devices x 20 Hz x 0.5 s, give or take the jitter and the random start
+    assert 1600 <= sent <= 2400
+    assert sent == sum(len(c.messages) for c in connections)
+    stats = IngestStats()
+    for topic, payload in connections[0].messages + connections[1].messages:
+        assert topic == "heart/sensor/data"
+        stats.record(json.loads(payload))
+    report = stats.snapshot()
+    assert report["run"] == "t" and report["lost"] == 0 and report["sources"] == 200
+
+    raw = Fleet(1, payload_format="raw")
+    assert float(raw.payload(0)) >= 55.0
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from simulation_engine.persistence import PersistencePolicy, KeyframeDeadbandPolicy
+from api.services.history_service import reconstruct_series
+
+
+def make_row(bpm, zone="Zone 1 (Very Light)"):
+    return {"bpm": bpm, "trimp": 0.0, "eccentric_load": 0.0, "hrr": 0.0, "hrrpt": 0.0,
+            "sd1": 10.0, "sd2": 20.0, "zone": zone, "color": "#3B82F6",
+            "intensity": 0.1, "slope": 0.0}
+
+
+def test_default_policy_stores_every_tick():
+    policy = PersistencePolicy()
+    assert all(policy.should_persist(make_row(60.0), t) for t in range(10))
+
+
+def test_deadband_skips_noise_and_keeps_keyframes():
+    policy = KeyframeDeadbandPolicy(keyframe_interval=30.0, deadbands={"bpm": 2.0})
+    writes = [t for t in range(90) if policy.should_persist(make_row(60.0 + (t % 2) * 0.5), t)]
+    # Only the first row and one keyframe every 30 s
+    assert writes == [0, 30, 60]
+
+
+def test_deadband_writes_on_change_and_zone_switch():
+    policy = KeyframeDeadbandPolicy(keyframe_interval=60.0)
+    assert policy.should_persist(make_row(60.0), 0)
+    assert not policy.should_persist(make_row(61.0), 1)
+    assert policy.should_persist(make_row(65.0), 2)  # left the deadband
+    assert policy.should_persist(make_row(65.0, zone="Zone 2 (Light)"), 3)
+
+
+def test_reconstruction_holds_last_value():
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [SimpleNamespace(time=t0, **make_row(60.0)),
+            SimpleNamespace(time=t0 + timedelta(seconds=3), **make_row(70.0))]
+    series = reconstruct_series(rows, t0, t0 + timedelta(seconds=5))
+    assert [p["bpm"] for p in series] == [60.0, 60.0, 60.0, 70.0, 70.0]
+
+
+def test_reconstruction_does_not_hold_across_an_outage():
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [SimpleNamespace(time=t0, **make_row(60.0)),
+            SimpleNamespace(time=t0 + timedelta(seconds=10), **make_row(70.0))]
+    series = reconstruct_series(rows, t0, t0 + timedelta(seconds=10), max_hold=3)
+    # Engine silent for longer than a keyframe interval: 6 s without points
+    assert [p["bpm"] for p in series] == [60.0, 60.0, 60.0, 60.0]
+
+    # Default: keyframe interval (60 s) + margin, so the 10 s row is held at 60 s but not at 120 s
+    series = reconstruct_series(rows[1:], t0, t0 + timedelta(hours=1), step=60)
+    assert [p["time"] - t0 for p in series] == [timedelta(minutes=1)]
@@ -0,0 +1,80 @@
+import json
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from api.services.profiler import SamplingProfiler, ProfilerBusy
+from simulation_engine.worker import HeartEngineWorker, PROFILE_TOPIC
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(200))
+
+
+def test_profile_collapsed_stacks_name_the_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        result = SamplingProfiler().profile(0.3, interval_ms=2)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result["samples"] > 20
+    lines = result["collapsed"].splitlines()
+    busy = [line for line in lines if line.startswith("busy-worker;")]
+    assert busy and all("busy_loop (test_profiler.py" in line for line in busy)
+    # "stack count": the count is the last space-separated field
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in busy) > 10
+    assert not any(line.startswith("sampling-profiler") for line in lines)
+
+
+def test_second_profile_while_running_is_refused_then_allowed():
+    profiler = SamplingProfiler()
+    first = threading.Thread(target=profiler.profile, args=(0.3,))
+    first.start()
+    time.sleep(0.05)
+    with pytest.raises(ProfilerBusy):
+        profiler.profile(0.1)
+    first.join()
+    assert not profiler.running
+    assert profiler.profile(0.05)["samples"] >= 1
+    assert not any(t.name == "sampling-profiler" for t in threading.enumerate())
+
+
+def test_admin_profile_endpoint():
+    client = TestClient(app)
+    response = client.post("/admin/profile", params={"seconds": 0.2, "interval_ms": 5})
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    assert client.post("/admin/profile", params={"seconds": 0}).status_code == 422
+
+
+class RecordingClient:
+    def __init__(self):
+        self.published = []
+        self.done = threading.Event()
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload))
+        self.done.set()
+
+
+class Message:
+    def __init__(self, topic, payload):
+        self.topic, self.payload = topic, payload
+
+
+def test_worker_profile_command_publishes_result():
+    worker = HeartEngineWorker(seed=1, verbose=False)
+    worker.client = RecordingClient()
+    worker.on_message(None, None, Message(PROFILE_TOPIC, json.dumps({"seconds": 0.1, "twin_id": "other"}).encode()))
+    worker.on_message(None, None, Message(PROFILE_TOPIC, json.dumps({"seconds": 0.1}).encode()))
+    assert worker.client.done.wait(2)
+    topic, result = worker.client.published[0]
+    assert topic == f"{PROFILE_TOPIC}/result/default"
+    assert result["samples"] > 0 and "collapsed" in result
+    assert len(worker.client.published) == 1
@@ -0,0 +1,54 @@
+import numpy as np
+from scipy.signal import savgol_filter
+from core_logic.recovery_analytics import analyze_curves, pad_curves, hrr_at, hrrpt_index
+from core_logic.physio_model import HeartModel
+
+
+def single_curve_hrrpt(curve):
+    """Reference: filter and search one curve alone."""
+    window = min(15, len(curve))
+    if window % 2 == 0:
+        window -= 1
+    filtered = savgol_filter(curve, window, 3)
+    x = np.arange(len(filtered))
+    y1, y2, x2 = filtered[0], filtered[-1], x[-1]
+    return int(np.argmax(np.abs((y2 - y1) * x - x2 * filtered + x2 * y1) / np.hypot(y2 - y1, x2)))
+
+
+def test_padded_batch_matches_curve_by_curve():
+    rng = np.random.default_rng(3)
+    curves = [75 + 80 * np.exp(-np.arange(n) / rng.uniform(20, 60)) + rng.normal(0, 1, n)
+              for n in rng.integers(10, 200, 200)]
+    padded, lengths = pad_curves(curves)
+    result = analyze_curves(padded, lengths)
+
+    assert result["hrrpt_index"].tolist() == [single_curve_hrrpt(c) for c in curves]
+    for i in (0, 7, 42):
+        n = lengths[i]
+        window = min(15, n) - (1 - min(15, n) % 2)
+        assert np.allclose(result["filtered"][i, :n], savgol_filter(curves[i], window, 3))
+        assert np.isnan(result["filtered"][i, n:]).all()
+
+
+def test_hrr_needs_the_full_lag():
+    curves, lengths = pad_curves([np.linspace(160, 100, 61), np.linspace(160, 130, 50)])
+    assert hrr_at(curves, lengths, 60)[0] == 60.0
+    assert np.isnan(hrr_at(curves, lengths, 60)[1])
+    assert np.isnan(hrr_at(curves, lengths, 120)).all()
+    assert hrrpt_index(np.array([[150.0, 140.0]])).tolist() == [-1]
+
+
+def test_heart_model_hrrpt_unchanged():
+    """The model's HRRPT is the farthest raw point from the start-end chord (old per-point loop)."""
+    twin = HeartModel(age=30, sex='male', resting_hr=60, max_hr=190, seed=5)
+    for _ in range(120):
+        twin.simulate_step(intensity=0.9, dt=1.0)
+    for _ in range(150):
+        twin.simulate_step(intensity=0.0, dt=1.0)
+
+    points = np.array(twin.recovery_curve)
+    start, end = points[0], points[-1]
+    chord = end - start
+    distances = np.abs(chord[0] * (start[1] - points[:, 1]) - chord[1] * (start[0] - points[:, 0])) / np.linalg.norm(chord)
+    assert twin.hrrpt_time == points[np.argmax(distances), 0]
+    assert 0 < twin.hrrpt_time < 150
@@ -0,0 +1,35 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from recovery_detector import detect_user_events, value_after
+
+
+def irregular_recovery(seed=0):
+    """10 min of effort at 160 BPM then an exponential recovery, sampled every 1-15 s."""
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.choice([1, 5, 10, 15], size=400))
+    recovery = times >= 600
+    values = np.where(recovery, 80 + 80 * np.exp(-(times - 600) / 40.0), 160.0)
+    return times, values
+
+
+def test_value_after_uses_timestamps_not_row_counts():
+    times = np.array([0, 5, 15, 60, 70, 200])
+    values = np.array([150.0, 149.0, 148.0, 120.0, 118.0, 90.0])
+    hr_60 = value_after(times, values, 60, tolerance_s=15)
+    assert hr_60[0] == 120.0
+    assert np.isnan(hr_60[4])  # nothing within 15 s of t=130
+
+
+def test_single_event_with_hrr_and_hrrpt():
+    times, values = irregular_recovery()
+    events = detect_user_events(42, times, values)
+    assert len(events) == 1
+    event = events.iloc[0]
+    assert event["start_hr"] == 160.0
+    # exp(-60/40) of the 80 BPM amplitude remains after 1 min (+ sampling tolerance)
+    assert 55.0 < event["hrr1"] < 65.0
+    assert event["hrr2"] > event["hrr1"]
+    assert 0 <= event["hrrpt_s"] < 180
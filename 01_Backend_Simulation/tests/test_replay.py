@@ -0,0 +1,66 @@
+import hashlib
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from simulation_engine.replay import ReplayDriver, InputRecorder, read_recording
+
+
+@patch("message_bus.mqtt.Client")
+def test_replay_is_bit_identical_to_the_recorded_run(mock_mqtt, tmp_path):
+    from simulation_engine.worker import HeartEngineWorker
+    path = str(tmp_path / "session.hrec")
+
+    live = HeartEngineWorker(seed=42, verbose=False, record_path=path)
+    live_digest = hashlib.sha256()
+    for second in range(120):
+        if second % 30 == 0:
+            payload = json.dumps({"intensity": 0.9 if second % 60 == 0 else 0.0}).encode()
+            live.on_message(None, None, SimpleNamespace(topic="heart/physio/intensity", payload=payload))
+        if second == 45:
+            live.on_message(None, None, SimpleNamespace(topic="heart/env/temperature", payload=b'{"temp_c": 31.0}'))
+        _, row = live.tick()
+        live_digest.update(repr(sorted(row.items())).encode())
+    live.recorder.close()
+
+    ticks_a, digest_a = ReplayDriver(path).run()
+    ticks_b, digest_b = ReplayDriver(path).run()
+    assert ticks_a == ticks_b == 120
+    assert digest_a == digest_b == live_digest.hexdigest()
+
+
+@patch("message_bus.mqtt.Client")
+def test_broker_capture_gets_synthetic_ticks(mock_mqtt, tmp_path):
+    path = str(tmp_path / "broker.hrec")
+    recorder = InputRecorder(path, seed=1, ticks=False)
+    for t in range(10):
+        recorder.record("heart/physio/intensity", b'{"intensity": 0.5}', t=1000.0 + t)
+    recorder.close()
+
+    ticks, _ = ReplayDriver(path).run()
+    assert ticks == 9
+
+
+@patch("message_bus.mqtt.Client")
+def test_unseeded_recording_stores_its_seed_and_never_appends(mock_mqtt, tmp_path):
+    from simulation_engine.worker import HeartEngineWorker
+    path = str(tmp_path / "session.hrec")
+
+    digests = []
+    for run in range(2):
+        live = HeartEngineWorker(verbose=False, record_path=path)   # no ENGINE_SEED
+        digest = hashlib.sha256()
+        for second in range(30):
+            _, row = live.tick()
+            digest.update(repr(sorted(row.items())).encode())
+        live.recorder.close()
+        digests.append(digest.hexdigest())
+
+    # Second session went to its own file, with its own header
+    first, second = read_recording(path)[0], read_recording(str(tmp_path / "session-1.hrec"))[0]
+    assert first["seed"] is not None and second["seed"] is not None
+    for recording, digest in ((path, digests[0]), (str(tmp_path / "session-1.hrec"), digests[1])):
+        assert ReplayDriver(recording).run() == (30, digest)
+
+    with pytest.raises(FileExistsError):
+        InputRecorder(path)
@@ -2,10 +2,12 @@ import pytest
 from unittest.mock import patch, MagicMock
 from simulation_engine.worker import HeartEngineWorker
 
-@patch("simulation_engine.worker.mqtt.Client")
+# The engine's MQTT client lives in the transport (05_Data_Ingestion/message_bus.py)
+@patch("message_bus.mqtt.Client")
+@patch("message_bus.time.sleep", return_value=None)
 @patch("simulation_engine.worker.SessionLocal")
 @patch("simulation_engine.worker.time.sleep", return_value=None)
-def test_worker_full_resilience(mock_sleep, mock_session, mock_mqtt_class):
+def test_worker_full_resilience(mock_sleep, mock_session, mock_bus_sleep, mock_mqtt_class):
     # 1. Setup del Mock MQTT
     mock_client_instance = mock_mqtt_class.return_value
     
@@ -0,0 +1,77 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from route_profiles import parse_track, build_profile, load_route, RouteFollower
+
+
+class RampTerrain:
+    """Fake DEM: elevation grows 10 m per 0.001° of latitude (~9% going north)."""
+    def elevation(self, lats, lons):
+        return (np.asarray(lats) - 46.2) * 10_000.0
+
+
+GPX = b"""<?xml version="1.0"?>
+<gpx xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>
+<trkpt lat="46.2000" lon="6.1432"><ele>400</ele></trkpt>
+<trkpt lat="46.2050" lon="6.1432"><ele>450</ele></trkpt>
+<trkpt lat="46.2050" lon="6.1432"><ele>450</ele></trkpt>
+<trkpt lat="46.2100" lon="6.1432"><ele>500</ele></trkpt>
+</trkseg></trk></gpx>"""
+
+
+def test_gpx_and_geojson_parse_to_the_same_track():
+    lats, lons, eles = parse_track(GPX, "route.gpx")
+    geojson = b'{"type": "LineString", "coordinates": [[6.1432, 46.2, 400], [6.1432, 46.205, 450], [6.1432, 46.205, 450], [6.1432, 46.21, 500]]}'
+    g_lats, g_lons, g_eles = parse_track(geojson, "route.geojson")
+    assert np.allclose(lats, g_lats) and np.allclose(lons, g_lons) and np.allclose(eles, g_eles)
+
+
+def test_profile_is_resampled_by_distance_with_constant_slope():
+    lats, lons, eles = parse_track(GPX)
+    profile = build_profile(lats, lons, eles, RampTerrain(), step=10.0)
+    assert np.allclose(np.diff(profile.distances), 10.0)
+    assert abs(profile.length - 1112) < 15  # 0.01° of latitude
+    # Away from the ends the ramp is a constant ~9 %
+    middle = profile.slope_at(np.array([200.0, 500.0, 800.0]))
+    assert np.allclose(middle, 100 / 1112 * 100, atol=0.5)
+
+
+def test_dem_gaps_fall_back_to_gps_altitude():
+    lats, lons, eles = parse_track(GPX)
+
+    class NoData:
+        def elevation(self, lats, lons):
+            return np.full(len(lats), np.nan)
+
+    profile = build_profile(lats, lons, eles, NoData(), step=10.0, smoothing=10.0)
+    assert profile.elevation_at(0.0) == 400.0
+    assert abs(profile.elevation_at(profile.length) - 500.0) < 1.0
+
+
+def test_route_is_cached_on_disk(tmp_path):
+    route = tmp_path / "route.gpx"
+    route.write_bytes(GPX)
+    cache = tmp_path / "cache"
+    first = load_route(str(route), terrain=RampTerrain(), cache_dir=str(cache))
+    assert len(os.listdir(cache)) == 1
+
+    class Exploding:
+        def elevation(self, lats, lons):
+            raise AssertionError("cached profile must not touch the DEM")
+
+    second = load_route(str(route), terrain=Exploding(), cache_dir=str(cache))
+    assert np.array_equal(first.slopes, second.slopes)
+
+
+def test_follower_tracks_each_athlete():
+    lats, lons, eles = parse_track(GPX)
+    profile = build_profile(lats, lons, eles, RampTerrain())
+    follower = RouteFollower(profile, ["a", "b"], speed_ms=5.0)
+    follower.set_position("b", distance_m=300.0, speed_ms=0.0)
+    follower.advance(10.0)
+    snapshot = {p["twin_id"]: p for p in follower.snapshot()}
+    assert snapshot["a"]["distance_m"] == 50.0
+    assert snapshot["b"]["distance_m"] == 300.0
+    assert snapshot["b"]["elevation"] > snapshot["a"]["elevation"]
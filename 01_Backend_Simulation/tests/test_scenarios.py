@@ -0,0 +1,91 @@
+import sys
+import os
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from scenario_compiler import compile_scenario, load_scenario, scenario_key
+from scenario_publisher import ScenarioPublisher
+from simulation_engine.scenario_runner import run_scenario
+from core_logic.physio_model import HeartModel
+
+SPEC = {
+    "name": "test",
+    "defaults": {"intensity": 0.1, "temperature": 20.0, "slope": 0.0},
+    "segments": [
+        {"duration": 10, "intensity": 0.2},
+        {"duration": 10, "intensity": [0.2, 0.7]},
+        {"repeat": 3, "segments": [{"duration": 5, "intensity": 0.9}, {"duration": 5, "intensity": 0.0}]},
+        {"duration": 10, "temperature": 30, "slope": [0, 5]},
+    ],
+}
+
+
+def test_hold_ramp_repeat_and_carry_over():
+    s = compile_scenario(SPEC, dt=1.0)
+    assert len(s) == 10 + 10 + 30 + 10
+    assert np.all(s.intensity[:10] == 0.2)
+    np.testing.assert_allclose(s.intensity[10:20], 0.2 + 0.5 * np.arange(10) / 10)
+    assert list(s.intensity[20:50:5]) == [0.9, 0.0] * 3
+    # Last segment has no intensity: the value of the last repeat (0.0) is kept
+    assert np.all(s.intensity[50:] == 0.0)
+    assert np.all(s.temperature[:50] == 20.0) and np.all(s.temperature[50:] == 30.0)
+    np.testing.assert_allclose(s.slope[50:], 5 * np.arange(10) / 10)
+
+
+def test_resolution_and_random_segments():
+    assert len(compile_scenario(SPEC, dt=0.25)) == 4 * len(compile_scenario(SPEC, dt=1.0))
+    spec = {"seed": 3, "segments": [{"duration": 60, "intensity": {"uniform": [0.1, 0.9], "every": 5}}]}
+    a, b = compile_scenario(spec), compile_scenario(spec)
+    np.testing.assert_array_equal(a.intensity, b.intensity)
+    assert a.intensity.min() >= 0.1 and a.intensity.max() <= 0.9
+    assert len(np.unique(a.intensity)) == 12          # one draw held every 5 s
+
+
+def test_cache_by_scenario_hash(tmp_path):
+    first = load_scenario(SPEC, cache_dir=str(tmp_path))
+    assert os.path.exists(tmp_path / f"{first.key}.npz")
+    other = dict(SPEC, segments=SPEC["segments"][:1])
+    assert scenario_key(other, 1.0) != first.key
+    from scenario_compiler import CompiledScenario
+    reloaded = CompiledScenario.load(str(tmp_path / f"{first.key}.npz"))
+    np.testing.assert_array_equal(reloaded.slope, first.slope)
+    assert reloaded.name == "test"
+
+
+def test_publisher_sends_changes_for_every_twin():
+    s = compile_scenario(SPEC)
+    publisher = ScenarioPublisher(s, ["a", "b"], speed=0, stagger_s=20)
+    first = publisher.messages(0)
+    assert len(first) == 3 * 2
+    assert publisher.messages(1) == []               # hold: nothing to send
+    # Twin b is 20 s ahead: it is in the repeat block while a is still holding
+    topics = [(topic, p["twin_id"]) for topic, p in publisher.messages(5)]
+    assert topics == [("heart/physio/intensity", "b")]
+
+    class Sink:
+        count = 0
+        def publish(self, topic, payload, qos=0, retain=False):
+            Sink.count += 1
+
+    sent = ScenarioPublisher(s, ["a"], speed=0, channels=("intensity",)).run(Sink())
+    assert sent == Sink.count == 1 + int(np.count_nonzero(np.diff(s.intensity)))
+
+
+def test_offline_batch_matches_a_manual_loop():
+    s = load_scenario("sprint_recovery", cache_dir=None)
+    results = run_scenario(s, seeds=[1, 2])
+    assert results["bpm"].shape == (2, 240)
+
+    twin = HeartModel(age=25, sex="male", resting_hr=50, max_hr=195, vo2_max=55.0, seed=2)
+    manual = [twin.simulate_step(intensity=0.9 if i < 60 else 0.0, dt=1.0)["bpm"] for i in range(240)]
+    np.testing.assert_array_equal(results["bpm"][1], manual)
+
+
+def test_worker_ignores_scenario_inputs_for_other_twins():
+    from simulation_engine.worker import HeartEngineWorker
+    worker = HeartEngineWorker(seed=1, verbose=False)
+    worker.apply_input("heart/physio/intensity", {"intensity": 0.8, "twin_id": "someone_else"})
+    assert worker.current_intensity == 0.1
+    worker.apply_input("heart/physio/intensity", {"intensity": 0.8, "twin_id": "default"})
+    assert worker.current_intensity == 0.8
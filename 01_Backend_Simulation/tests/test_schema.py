@@ -0,0 +1,15 @@
+from datetime import timedelta
+from api.schema import chunk_interval_for_ingest, MIN_CHUNK, MAX_CHUNK
+
+
+def test_chunk_interval_shrinks_with_ingest_rate():
+    one_twin = chunk_interval_for_ingest(1.0)
+    thousand_twins = chunk_interval_for_ingest(1000.0)
+    assert thousand_twins < one_twin
+
+
+def test_chunk_interval_is_clamped():
+    assert chunk_interval_for_ingest(0.0) == MAX_CHUNK
+    assert chunk_interval_for_ingest(1e9) == MIN_CHUNK
+    # 100 twins at 1 Hz with 256 MB chunks -> a few hours per chunk
+    assert timedelta(hours=1) <= chunk_interval_for_ingest(100.0) <= timedelta(days=1)
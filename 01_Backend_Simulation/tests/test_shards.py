@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import queue
+import pickle
+import threading
+from collections import Counter
+import pytest
+from simulation_engine import shard as shard_module
+from simulation_engine.shard import EngineShard, checkpoint_path, twin_seed
+from simulation_engine.supervisor import HashRing, ShardSupervisor, parse_twin_ids
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from message_bus import LocalBus, LocalTransport
+
+
+def test_hash_ring_balance_and_minimal_movement():
+    twin_ids = parse_twin_ids(2000)
+    ring = HashRing(range(4))
+    before = {t: ring.owner(t) for t in twin_ids}
+    counts = Counter(before.values())
+    assert all(300 < counts[s] < 700 for s in range(4))
+
+    ring.add(4)
+    after = {t: ring.owner(t) for t in twin_ids}
+    moved = [t for t in twin_ids if before[t] != after[t]]
+    # Only the new shard's arcs move (~1/5 of the twins), and all of them go to it
+    assert 200 < len(moved) < 600
+    assert all(after[t] == 4 for t in moved)
+    assert parse_twin_ids("a, b") == ["a", "b"]
+
+
+def test_shard_routes_by_twin_and_hands_off_state(tmp_path):
+    bus = LocalBus()
+    bus.start()
+    a = EngineShard(0, ["t1", "t2"], transport=LocalTransport("a", bus), seed=1, checkpoint_dir=str(tmp_path))
+    b = EngineShard(1, [], transport=LocalTransport("b", bus), seed=1, checkpoint_dir=str(tmp_path))
+    # ENGINE_SEED is per engine, not per twin: every twin draws its own (reproducible) noise
+    assert a.twins["t1"].seed != a.twins["t2"].seed
+    assert a.twins["t1"].seed == twin_seed(1, "t1") and a.observer.rng.random() != b.observer.rng.random()
+    # One observer per shard, stepped by the shard (not one per twin)
+    assert all(twin.observer is a.observer and not twin.owns_observer for twin in a.twins.values())
+    assert a.observer.keys == ["t1", "t2"]
+    a.route("heart/physio/intensity", {"intensity": 0.8, "twin_id": "t1"})
+    a.route("heart/env/temperature", {"temp_c": 30.0})
+    assert a.twins["t1"].current_intensity == 0.8 and a.twins["t2"].current_intensity == 0.1
+    assert a.twins["t2"].current_temperature == 30.0
+    # A fleet load test addressed to twins nobody hosts is still counted, once per shard
+    a.route("heart/physio/intensity", {"intensity": 0.5, "twin_id": "fleet_7", "sensor_id": "F7", "seq": 0,
+                                       "sent_at": 0.0, "run": "load"})
+    assert sum(twin.ingest.received for twin in a.twins.values()) == 1
+    assert a.twins["t1"].current_intensity == 0.8
+
+    class Session:
+        def add(self, obj): pass
+        def commit(self): pass
+
+    for _ in range(30):
+        a.step_all(Session())
+    hr = a.twins["t1"].patient.current_hr
+    a.release("t1")
+    assert "t1" not in a.twins and os.path.exists(checkpoint_path("t1", str(tmp_path)))
+    assert b.adopt("t1")
+    moved = b.twins["t1"]
+    assert moved.patient.current_hr == hr and moved.current_intensity == 0.8 and moved.current_temperature == 30.0
+
+
+def test_supervisor_restarts_a_dead_shard_and_rebalances(tmp_path, monkeypatch):
+    monkeypatch.setenv("CHECKPOINT_EVERY_S", "0.1")
+    twin_ids = parse_twin_ids(40)
+    supervisor = ShardSupervisor(twin_ids, shards=2, transport="local", persist=False, realtime=False,
+                                 checkpoint_dir=str(tmp_path))
+    supervisor.start()
+    try:
+        # Shards take longer to start on a loaded machine: wait for their first steps and checkpoints
+        def started(stats):
+            return (all(s["steps"] > 0 for s in stats.values())
+                    and all(os.path.exists(checkpoint_path(t, str(tmp_path))) for t in supervisor.assignment()[0]))
+
+        deadline = time.monotonic() + 10
+        stats = supervisor.stats()
+        while not started(stats) and time.monotonic() < deadline:
+            time.sleep(0.1)
+            stats = supervisor.stats()
+        assert sum(s["twins"] for s in stats.values()) == 40
+        assert all(s["steps"] > 0 for s in stats.values())
+
+        process, _ = supervisor.processes[0]
+        process.kill()
+        process.join(5)
+        assert supervisor.watch() == [0]
+        assert supervisor.restarts == 1
+        assert all(os.path.exists(checkpoint_path(t, str(tmp_path))) for t in supervisor.assignment()[0])
+
+        shard, pause = supervisor.add_shard()
+        stats = supervisor.stats()
+        assert stats[shard]["twins"] == len(supervisor.assignment()[shard]) > 0
+        assert sum(s["twins"] for s in stats.values()) == 40
+        assert pause > 0
+    finally:
+        supervisor.stop()
+    assert not supervisor.processes
+
+
+def test_periodic_saves_never_clobber_a_release(tmp_path):
+    shard = EngineShard(0, ["t1", "t2"], transport=LocalTransport("a", LocalBus()), seed=1, checkpoint_dir=str(tmp_path))
+    errors = []
+
+    def save_loop():
+        try:
+            for _ in range(200):
+                shard.save_all()
+        except Exception as e:
+            errors.append(e)
+
+    saver = threading.Thread(target=save_loop)
+    saver.start()
+    twin = shard.twins["t1"]
+    twin.current_intensity = 0.9
+    shard.release("t1")
+    saver.join()
+    assert not errors
+    # The released twin's checkpoint is its final one, and no temp file is left behind
+    assert pickle.loads(open(checkpoint_path("t1", str(tmp_path)), "rb").read())["inputs"][0] == 0.9
+    assert sorted(os.listdir(tmp_path)) == ["t1.ckpt", "t2.ckpt"]
+
+
+def test_shard_process_exits_when_its_simulation_thread_dies(tmp_path, monkeypatch):
+    def crash(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(shard_module, "_simulation_loop", crash)
+    options = {"transport": "local", "persist": False, "checkpoint_dir": str(tmp_path)}
+    with pytest.raises(SystemExit) as exit_info:
+        shard_module.run_shard(0, ["t1"], None, queue.Queue(), queue.Queue(), options)
+    assert exit_info.value.code == 1
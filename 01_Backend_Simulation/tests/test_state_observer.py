@@ -0,0 +1,80 @@
+import numpy as np
+from core_logic.physio_model import HeartModel
+from core_logic.state_observer import EnsembleObserver
+
+
+def test_tracks_hr_and_the_hidden_intensity_from_a_noisy_sensor():
+    rng = np.random.default_rng(0)
+    model = HeartModel(age=25, sex='male', resting_hr=50, max_hr=195, seed=1)
+    observer = EnsembleObserver(seed=0, sensor_sd=3.0)
+    observer.add("a", hr=50, resting_hr=50, max_hr=195)
+
+    intensity = np.r_[np.full(200, 0.2), np.full(300, 0.7), np.full(200, 0.05)]
+    errors, estimates = [], []
+    for value in intensity:
+        model.simulate_step(value)
+        observer.observe("a", model.current_hr + rng.normal(0, 3.0))
+        assert observer.step(1.0) == {"a"}
+        estimate = observer.estimate("a")
+        errors.append(estimate["hr"] - model.current_hr)
+        estimates.append(estimate)
+
+    # Better than the raw sensor, and the intensity nobody measured is recovered
+    assert np.sqrt(np.mean(np.square(errors[20:]))) < 3.0
+    for step, truth in ((180, 0.2), (480, 0.7), (690, 0.05)):
+        assert abs(estimates[step]["intensity"] - truth) < 0.15
+        assert 0 < estimates[step]["intensity_sd"] < 0.2
+
+
+def test_twins_are_independent_and_samples_of_one_step_are_averaged():
+    observer = EnsembleObserver(seed=3, sensor_sd=4.0)
+    for key in ("a", "b", "c"):
+        observer.add(key, hr=60, resting_hr=50, max_hr=190)
+    before_b = observer.hr[observer.rows["b"]].copy()
+    observer.predict(1.0)
+    predicted_b = observer.hr[observer.rows["b"]].copy()
+    for bpm in (120, 130, 140):
+        observer.observe("a", bpm)
+    assert observer.assimilate() == {"a"}
+    np.testing.assert_array_equal(observer.hr[observer.rows["b"]], predicted_b)
+    assert not np.array_equal(predicted_b, before_b)
+    # Three samples of sd 4 around 130 weigh as one of sd 4 / sqrt(3): the prior (~60) is mostly overruled
+    assert observer.estimate("a")["hr"] > 110
+
+    observer.observe("unknown", 100)   # not hosted here: ignored
+    saved = observer.export_state("c")
+    observer.remove("a")
+    assert observer.keys == ["c", "b"] and observer.rows == {"c": 0, "b": 1} and len(observer) == 2
+    np.testing.assert_array_equal(observer.hr[0], saved["hr"])
+    observer.add("d", hr=70, resting_hr=50, max_hr=190)
+    observer.import_state("d", saved)
+    np.testing.assert_array_equal(observer.export_state("d")["intensity"], saved["intensity"])
+
+
+
+def test_noise_free_prediction_is_heart_model_and_unobserved_twins_wait(monkeypatch):
+    import core_logic.state_observer as state_observer
+    for name in ("INTENSITY_WALK", "HR_PROCESS_SD", "INITIAL_INTENSITY_SD"):
+        monkeypatch.setattr(state_observer, name, 0.0)
+    observer = EnsembleObserver(seed=0, sensor_sd=0.0)
+    observer.add("a", hr=50, resting_hr=50, max_hr=195, intensity=0.6, temperature=30.0, slope=6.0)
+
+    # Every member of "a" follows HeartModel's (noise-free) HR, inputs changing on the way
+    model = HeartModel(age=25, sex='male', resting_hr=50, max_hr=195, seed=1)
+    for second in range(300):
+        slope = 6.0 if second < 150 else -8.0
+        observer.set_inputs("a", slope=slope)
+        model.simulate_step(0.6, temperature=30.0, slope_percent=slope)
+        observer.predict(1.0)
+        np.testing.assert_allclose(observer.hr[observer.rows["a"]], model.current_hr, rtol=1e-12)
+
+    # Without samples a step leaves a twin alone; its next prediction covers the whole lag
+    observer.add("b", hr=50, resting_hr=50, max_hr=195, intensity=0.6, temperature=30.0, slope=6.0)
+    for _ in range(60):
+        observer.step(1.0)
+    assert (observer.hr[observer.rows["b"]] == 50).all() and observer.lag[observer.rows["b"]] == 60
+    model = HeartModel(age=25, sex='male', resting_hr=50, max_hr=195, seed=1)
+    for _ in range(60):
+        model.simulate_step(0.6, temperature=30.0, slope_percent=6.0)
+    observer.predict(0.0)
+    np.testing.assert_allclose(observer.hr[observer.rows["b"]], model.current_hr, rtol=1e-9)
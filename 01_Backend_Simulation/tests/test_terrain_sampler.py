@@ -0,0 +1,80 @@
+import os
+import sys
+import numpy as np
+import pytest
+from PIL import Image, TiffImagePlugin
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from terrain_sampler import TerrainSampler, haversine, NODATA, TAG_PIXEL_SCALE, TAG_TIEPOINT
+
+# 3 x 3 pixels of 0.01°, top-left corner at (46.03 N, 6.00 E): pixel centers at
+# lat 46.025 / 46.015 / 46.005 and lon 6.005 / 6.015 / 6.025
+ELEVATION = np.array([[0, 10, 20],
+                      [100, 110, 120],
+                      [200, 210, 220]])   # +100 m per row going south, +10 m per column going east
+
+
+def write_geotiff(path, raster):
+    tags = TiffImagePlugin.ImageFileDirectory_v2()
+    tags[TAG_PIXEL_SCALE] = (0.01, 0.01, 0.0)
+    tags.tagtype[TAG_PIXEL_SCALE] = 12
+    tags[TAG_TIEPOINT] = (0.0, 0.0, 0.0, 6.0, 46.03, 0.0)
+    tags.tagtype[TAG_TIEPOINT] = 12
+    Image.fromarray(raster.astype(np.int32)).save(path, tiffinfo=tags)
+
+
+@pytest.fixture
+def dem(tmp_path):
+    path = str(tmp_path / "dem.tif")
+    write_geotiff(path, ELEVATION)
+    return path
+
+
+def test_bilinear_at_pixel_centers_and_midpoints(dem):
+    sampler = TerrainSampler(dem)
+    assert sampler.bounds == pytest.approx((46.0, 46.03, 6.0, 6.03))
+    # Corners of the interpolation grid are the pixel values themselves
+    z = sampler.elevation([46.025, 46.025, 46.005, 46.005], [6.005, 6.025, 6.005, 6.025])
+    np.testing.assert_allclose(z, [0, 20, 200, 220], atol=1e-6)
+    # Midpoint of four pixels, and halfway along an edge
+    np.testing.assert_allclose(sampler.elevation([46.02, 46.025], [6.01, 6.01]), [55, 5], atol=1e-6)
+
+
+def test_outside_the_raster_and_nodata_are_nan(dem, tmp_path):
+    sampler = TerrainSampler(dem)
+    # Outside the bounds, and in the half-pixel border where no 4 centers surround the point
+    z = sampler.elevation([46.5, 46.015, 46.015, 46.029], [6.015, 5.9, 6.1, 6.015])
+    assert np.isnan(z).all()
+
+    holed = ELEVATION.copy()
+    holed[1, 1] = NODATA
+    path = str(tmp_path / "holed.tif")
+    write_geotiff(path, holed)
+    # Around the hole: NaN; on the next pixel center (the hole has no weight there): its value
+    z = TerrainSampler(path).elevation([46.02, 46.025], [6.01, 6.025])
+    assert np.isnan(z[0]) and z[1] == pytest.approx(20)
+
+
+def test_cache_is_built_once_and_rebuilt_when_the_tif_changes(dem):
+    cache = os.path.splitext(dem)[0] + ".elev.npy"
+    TerrainSampler(dem)
+    assert os.path.exists(cache) and os.path.exists(cache + ".json")
+    assert isinstance(TerrainSampler(dem).raster, np.memmap)
+
+    write_geotiff(dem, ELEVATION + 1000)
+    later = os.path.getmtime(cache) + 10
+    os.utime(dem, (later, later))
+    assert TerrainSampler(dem).elevation(46.025, 6.005)[0] == pytest.approx(1000)
+
+
+def test_path_slope_sign_and_distance(dem):
+    sampler = TerrainSampler(dem)
+    # Going south climbs 100 m per 0.01° of latitude (~1112 m): ~ +9 %
+    elevations, distances, slopes = sampler.path_slope([46.025, 46.015, 46.005], [6.015, 6.015, 6.015])
+    np.testing.assert_allclose(elevations, [10, 110, 210], atol=1e-6)
+    np.testing.assert_allclose(distances, haversine(46.025, 6.015, 46.015, 6.015))
+    assert distances[0] == pytest.approx(1112, rel=1e-3)
+    assert slopes == pytest.approx([8.99, 8.99], abs=0.01)
+    # The way back is downhill; a repeated point has no distance and no slope
+    _, _, slopes = sampler.path_slope([46.005, 46.015, 46.015], [6.015, 6.015, 6.015])
+    assert slopes[0] == pytest.approx(-8.99, abs=0.01) and slopes[1] == 0.0
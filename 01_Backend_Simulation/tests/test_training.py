@@ -0,0 +1,32 @@
+import numpy as np
+from data_processing.feature_pipeline import run_pipeline
+from data_processing.train_model import train_streaming, check_onnx_parity
+
+
+def write_cases(source, n_cases=10, rows=900):
+    """Propofol rises over the case while BPM and HRV fall with it."""
+    rng = np.random.default_rng(0)
+    for case_id in range(1, n_cases + 1):
+        propofol = np.linspace(0, 3 + case_id % 3, rows)
+        bpm = 85 - 6 * propofol + rng.normal(0, 1.5, rows)
+        lines = ["Time,Solar8000/HR,Orchestra/PPF20_CE"] + [f"{t},{h},{p}" for t, (h, p) in enumerate(zip(bpm, propofol))]
+        (source / f"{case_id}.csv").write_text("\n".join(lines))
+
+
+def test_streaming_training_exports_a_scaled_pipeline(tmp_path):
+    source = tmp_path / "cases"
+    source.mkdir()
+    write_cases(source)
+    features = str(tmp_path / "features")
+    run_pipeline(range(1, 11), features, workers=1, cases_per_shard=3,
+                 cache_dir=str(tmp_path / "cache"), source_dir=str(source))
+
+    onnx_path = str(tmp_path / "model.onnx")
+    pipeline, metrics = train_streaming(features, epochs=3, batch_rows=256, onnx_path=onnx_path)
+    # Cases 5 and 10 are held out
+    assert metrics["test_rows"] > 0 and metrics["train_rows"] > 3 * metrics["test_rows"]
+    assert metrics["r2"] is not None
+
+    # One graph with the scaler inside: raw BPM / RMSSD in, same answer as sklearn, any batch size
+    report = check_onnx_parity(pipeline, onnx_path, batch_sizes=(1, 7, 512), repeats=2)
+    assert all(row["max_abs_diff"] < 1e-3 for row in report.values())
@@ -0,0 +1,56 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from fitbit_store import open_store
+from validation.validation_harness import run_harness, summarize, validate_event, error_stats
+
+
+def write_workouts(path, users=3, workouts=2, seed=0):
+    """Fitbit-like CSV: rest, 20 min of effort, exponential recovery; samples every 1-15 s."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for u in range(users):
+        t0 = pd.Timestamp("2016-04-12").value // 10**9
+        t = t0 + np.cumsum(rng.choice([1, 5, 10, 15], size=2500))
+        elapsed = t - t0
+        hr = 62 + rng.normal(0, 2, len(t))
+        for w in range(workouts):
+            start = 1800 + w * 6000
+            peak = 140 + 15 * u
+            effort = (elapsed >= start) & (elapsed < start + 1200)
+            recovery = (elapsed >= start + 1200) & (elapsed < start + 2400)
+            hr[effort] = peak + rng.normal(0, 2, effort.sum())
+            hr[recovery] = 70 + (peak - 70) * np.exp(-(elapsed[recovery] - start - 1200) / 45.0)
+        times = pd.to_datetime(t, unit="s").strftime("%m/%d/%Y %I:%M:%S %p")
+        frames.append(pd.DataFrame({"Id": 1000 + u, "Time": times, "Value": np.round(hr).astype(int)}))
+    pd.concat(frames).to_csv(path, index=False)
+
+
+def test_every_event_is_validated_the_same_in_parallel(tmp_path):
+    csv_path = str(tmp_path / "heartrate_seconds_merged.csv")
+    write_workouts(csv_path)
+    store = open_store(csv_path)
+
+    serial = run_harness(store, workers=1)
+    parallel = run_harness(store, workers=2)
+    assert len(serial) == 6  # 3 users x 2 workouts
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert set(serial["activity"]) == {"vigorous", "intense", "maximal"}  # peaks 140 / 155 / 170
+
+    summary = summarize(serial)
+    assert summary["overall"]["events"] == 6
+    assert set(summary["per_user"]) == {"1000", "1001", "1002"}
+    assert 0 < summary["overall"]["rmse"]["median"] < 30
+
+
+def test_sparse_windows_are_skipped():
+    times = np.arange(0, 1200, 60)  # one sample per minute
+    assert validate_event(times, np.full(len(times), 120.0), 600) is None
+
+
+def test_error_stats_sign():
+    stats = error_stats([100, 100], [103, 99])
+    assert stats["bias"] == 1.0 and stats["mae"] == 2.0
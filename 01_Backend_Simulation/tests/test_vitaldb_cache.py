@@ -0,0 +1,69 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+import vitaldb_cache
+from vitaldb_cache import load_tracks, load_frame, fetch_cases
+
+TRACKS = ['Solar8000/HR', 'Orchestra/PPF20_CE']
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Stand-in for the VitalDB server: one CSV per case, irregular samples."""
+    source_dir = tmp_path / "cases"
+    source_dir.mkdir()
+    for case_id in range(1, 6):
+        times = np.arange(0, 600, 0.5)
+        hr = 70 + case_id + np.sin(times / 30)
+        ppf = np.where(times % 2 == 0, times / 600, np.nan)
+        lines = ["Time,Solar8000/HR,Orchestra/PPF20_CE"] + [f"{t},{h},{'' if np.isnan(p) else p}" for t, h, p in zip(times, hr, ppf)]
+        (source_dir / f"{case_id}.csv").write_text("\n".join(lines))
+    return str(source_dir)
+
+
+def test_tracks_are_resampled_and_cached(tmp_path, source):
+    cache = str(tmp_path / "cache")
+    values = load_tracks(3, TRACKS, 1.0, cache_dir=cache, source_dir=source)
+    assert values.shape == (600, 2)
+    assert abs(values[0, 0] - 73.0) < 0.1
+    # Propofol is sampled every 2 s: odd bins stay empty, like VitalFile.to_numpy
+    assert not np.isnan(values[::2, 1]).any() and np.isnan(values[1::2, 1]).all()
+
+    frame = load_frame(3, TRACKS, 2.0, cache_dir=cache, source_dir=source)
+    assert list(frame.columns) == TRACKS and len(frame) == 300
+    assert len(os.listdir(cache)) == 2  # one entry per (case, tracks, interval)
+
+
+def test_second_run_does_no_io_to_the_source(tmp_path, source, monkeypatch):
+    cache = str(tmp_path / "cache")
+    first = load_tracks(2, TRACKS, 1.0, cache_dir=cache, source_dir=source)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("cache hit must not download")
+
+    monkeypatch.setattr(vitaldb_cache, "_download", no_network)
+    assert np.array_equal(load_tracks(2, TRACKS, 1.0, cache_dir=cache, source_dir=source), first, equal_nan=True)
+
+
+def test_parallel_fetch_reports_each_case(tmp_path, source):
+    results = fetch_cases([1, 2, 3, 4, 5, 99], TRACKS, 1.0, workers=4, cache_dir=str(tmp_path / "cache"), source_dir=source)
+    assert all(results[c] == 600 for c in range(1, 6))
+    assert results[99].startswith("error")
+
+
+def test_duplicate_cases_and_sources_get_their_own_entries(tmp_path, source):
+    cache = str(tmp_path / "cache")
+    # The same case twice in one parallel fetch: both writers finish, one entry remains
+    results = fetch_cases([4] * 8, TRACKS, 1.0, workers=8, cache_dir=cache, source_dir=source)
+    assert results == {4: 600}
+    assert os.listdir(cache) == [vitaldb_cache.case_key(4, TRACKS, 1.0, source) + ".npz"]
+
+    # Same case id from another source: not served from the first source's entry
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "4.csv").write_text("Time,Solar8000/HR,Orchestra/PPF20_CE\n0,150,0.5\n1,151,0.5\n")
+    assert load_tracks(4, TRACKS, 1.0, cache_dir=cache, source_dir=str(other))[0, 0] == 150
+    assert load_tracks(4, TRACKS, 1.0, cache_dir=cache, source_dir=source)[0, 0] == pytest.approx(74.0, abs=0.1)
@@ -1,14 +1,14 @@
 import sys
 import os
-import csv
-import math
-import matplotlib.pyplot as plt
+import numpy as np
 
 # Add the root path to import the logic
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from core_logic.physio_model import HeartModel
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from fitbit_store import open_store
+from validation.validation_harness import run_observer, error_stats
 
-def run_continuous_validation():
+def run_continuous_validation(plot=True):
     print("🏃‍♂️ Starting Validation Marathon: Kaggle vs Digital Twin...")
     
     # Path to the giant dataset
@@ -19,15 +19,11 @@ def run_continuous_validation():
         print("Make sure the path is correct.")
         return
 
-    print("🔍 Extracting training event (April 12, 13:40 - 13:55)...")
-    real_hr_data = []
-    
-    with open(csv_path, 'r') as file:
-        reader = csv.reader(file)
-        next(reader) # Skip headers
-        for row in reader:
-            if row[0] == "2022484408" and ("4/12/2016 1:4" in row[1] or "4/12/2016 1:5" in row[1]):
-                real_hr_data.append(float(row[2]))
+    print("🔍 Extracting training event (April 12, 13:40 - 14:00)...")
+    # Columnar store (built once from the CSV): the window is a binary search away
+    store = open_store(csv_path)
+    _, values = store.window(2022484408, "2016-04-12 13:40:00", "2016-04-12 14:00:00")
+    real_hr_data = [float(v) for v in values]
                 
     if not real_hr_data:
         print("⚠️ No data found for this time range.")
@@ -36,43 +32,14 @@ def run_continuous_validation():
     n_samples = len(real_hr_data)
     print(f"✅ Extracted {n_samples} seconds of real data from Kaggle!")
 
-    # Initialize Digital Twin
-    twin = HeartModel(age=30, sex='male', resting_hr=62)
-    twin.current_hr = real_hr_data[0] 
-    
-    predicted_hr_data = []
-    
-    print("⚙️  Executing simulation (Proportional Controller / State Observer)...")
-    for real_hr in real_hr_data:
-        
-        # 1. Calculate the "Error" (Difference between reality and the Twin)
-        error = real_hr - twin.current_hr
-        
-        # 2. Auto-Tuning Logic
-        if error > 2.0:
-            # The human is going faster. Accelerate proportionally to the error.
-            # Multiply by 0.05 to smooth, and limit to 1.0 (maximum effort)
-            intensity = min(1.0, error * 0.05)
-        else:
-            # The human is going slower, same, or resting. Total brake!
-            intensity = 0.0
-        
-        # One step of simulation
-        metrics = twin.simulate_step(intensity=intensity, 
-        dt=1.0, 
-        temperature=6.19, 
-        slope_percent=0.0)
-
-        predicted_hr_data.append(metrics['bpm'])
+    # Digital Twin driven by the intensity its state observer estimates (shared with validation_harness.py)
+    print("⚙️  Executing simulation (HeartModel, intensity from the State Observer: ensemble Kalman filter)...")
+    predicted_hr_data = run_observer(np.array(real_hr_data), temperature=6.19).tolist()
 
     # 📊 ERROR CALCULATION
     print("\n📊 CALCULATING SCIENTIFIC ACCURACY...")
-    mse = 0.0
-    for real, pred in zip(real_hr_data, predicted_hr_data):
-        mse += (real - pred) ** 2
-    
-    mse = mse / n_samples
-    rmse = math.sqrt(mse) 
+    rmse = error_stats(real_hr_data, predicted_hr_data)["rmse"]
+    mse = rmse ** 2
 
     print(f"   📈 Mean Squared Error (MSE): {round(mse, 2)}")
     print(f"   🎯 RMSE (Average deviation): ±{round(rmse, 2)} BPM")
@@ -90,19 +57,21 @@ def run_continuous_validation():
     if rmse < 10.0:
         print("\n✅ FINAL VERDICT: Excellent. Your twin mimics the real physiology with commercial accuracy.")
     else:
-        print("\n⚠️ FINAL VERDICT: There is room for improvement. Adjust the 'tau' or the intensity in the heuristic.")
+        print("\n⚠️ FINAL VERDICT: There is room for improvement. Adjust the 'tau' or the observer noise (SENSOR_NOISE_BPM, INTENSITY_WALK).")
 
 
-    # 👇 THIS IS THE MISSING MAGIC 👇
-    # Generate a list of seconds [0, 1, 2, ..., 133] for the X axis
-    time_data = list(range(n_samples))
-    
-    # Call the function with the real names of your variables
-    generate_validation_plot(time_data, real_hr_data, predicted_hr_data, filename="validation_plot.png")
+    # Plot only on request: the numbers above don't need matplotlib
+    if plot:
+        time_data = list(range(n_samples))
+        generate_validation_plot(time_data, real_hr_data, predicted_hr_data, filename="validation_plot.png")
 
 
 # 📊 GENERATION OF THE VALIDATION PLOT
 def generate_validation_plot(time_data, human_data, twin_data, filename="validation_plot.png"):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
     # Configure the style and size of the canvas
     plt.figure(figsize=(10, 6))
     
@@ -141,4 +110,4 @@ def generate_validation_plot(time_data, human_data, twin_data, filename="validat
 
 
 if __name__ == "__main__":
-    run_continuous_validation()
\ No newline at end of file
+    run_continuous_validation(plot="--no-plot" not in sys.argv)
\ No newline at end of file
@@ -3,10 +3,12 @@ import os
 import math
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.signal import savgol_filter
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
 from core_logic.physio_model import HeartModel
+from core_logic.recovery_analytics import analyze_curves
+from scenario_compiler import load_scenario
 
 
 # 🧪 TEST 1: Validation Scientific Basic of Recovery (HRR)
@@ -49,22 +51,9 @@ def validate_basic_recovery_curve():
 
 # 🧬 TEST 2: Advanced HRRPT Validation (Data Science
 def calculate_hrrpt(recovery_hr_data):
-    """HRRPT algorithm based on Bartels et al., 2018."""
-    window_length = min(15, len(recovery_hr_data))
-    if window_length % 2 == 0: window_length -= 1  
-    filtered_hr = savgol_filter(recovery_hr_data, window_length, 3)
-
-    x = np.arange(len(filtered_hr))
-    p1 = np.array([x[0], filtered_hr[0]])
-    p2 = np.array([x[-1], filtered_hr[-1]])
-
-    y1, y2 = p1[1], p2[1]
-    x1, x2 = p1[0], p2[0]
-    
-    distances = np.abs((y2 - y1) * x - (x2 - x1) * filtered_hr + x2 * y1 - y2 * x1) / np.sqrt((y2 - y1)**2 + (x2 - x1)**2)
-    
-    hrrpt_idx = np.argmax(distances)
-    return hrrpt_idx, filtered_hr
+    """HRRPT algorithm based on Bartels et al., 2018 (one curve of the batch analytics)."""
+    result = analyze_curves(np.asarray(recovery_hr_data, dtype=np.float64)[None, :])
+    return int(result["hrrpt_index"][0]), result["filtered"][0]
 
 def validate_hrrpt():
     print("="*50)
@@ -72,16 +61,16 @@ def validate_hrrpt():
     print("="*50)
     
     twin = HeartModel(age=30, sex='male', resting_hr=60, max_hr=190)
+    # 05_Data_Ingestion/scenarios/sprint_recovery.json: 60 s at 0.9, then 180 s at rest
+    scenario = load_scenario("sprint_recovery", dt=1.0)
     
     print("🏃♂️ Phase A: Subjecting the twin to effort (60s sprint)...")
-    for _ in range(60):
-        twin.simulate_step(intensity=0.9, dt=1.0)
-    
     print("🛑 Phase B: Inactive recovery (180s)...")
     recovery_data = []
-    for _ in range(180):
-        metrics = twin.simulate_step(intensity=0.0, dt=1.0)
-        recovery_data.append(metrics['bpm'])
+    for i in range(len(scenario)):
+        metrics = twin.simulate_step(dt=scenario.dt, **scenario.at(i))
+        if scenario.intensity[i] == 0.0:
+            recovery_data.append(metrics['bpm'])
         
     print("🧮 Phase C: Processing data with Savitzky-Golay filter...")
     hrrpt_segundo, filtered_hr = calculate_hrrpt(recovery_data)
@@ -0,0 +1,182 @@
+import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../05_Data_Ingestion')))
+from core_logic.physio_model import HeartModel
+from core_logic.state_observer import EnsembleObserver
+from fitbit_store import open_store, HeartRateStore, DEFAULT_CSV
+from recovery_detector import detect_user_events
+
+# Window simulated around every recovery event (seconds before / after its start)
+PRE_S = int(os.getenv("VALIDATION_PRE_S", "300"))
+POST_S = int(os.getenv("VALIDATION_POST_S", "300"))
+MAX_MEAN_INTERVAL_S = 15    # Fitbit logs every 1-15 s; sparser windows are skipped
+MAX_GAP_S = 60              # and so are windows with the watch off for a minute
+TEMPERATURE_C = 6.19        # Geneva, April (same as the single-event validation)
+
+# Activity level of an event = its peak HR (start of the recovery)
+ACTIVITY_BINS = [0, 130, 150, 170, 300]
+ACTIVITY_LABELS = ["moderate", "vigorous", "intense", "maximal"]
+
+RESULT_COLUMNS = ["user_id", "start_time", "start_hr", "activity", "samples", "rmse", "mae", "bias"]
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "validation_report")
+
+
+def run_observer(real_hr, temperature=TEMPERATURE_C, age=30, sex='male', resting_hr=62, seed=None, observed=None):
+    """
+    The twin (HeartModel), one step per second, driven by the intensity its state observer
+    (ensemble Kalman filter over hr / intensity) estimates from the samples where `observed`
+    is True (default: all). Returns the twin's BPM: each one before its sample is assimilated.
+    """
+    twin = HeartModel(age=age, sex=sex, resting_hr=resting_hr, seed=seed)
+    twin.current_hr = float(real_hr[0])
+    observer = EnsembleObserver(seed=seed)
+    observer.add("twin", hr=twin.current_hr, resting_hr=resting_hr, max_hr=twin.max_hr,
+                 intensity=0.0, temperature=temperature)
+    intensity = 0.0
+    predicted = np.empty(len(real_hr))
+    for i, real in enumerate(real_hr):
+        metrics = twin.simulate_step(intensity=intensity, dt=1.0, temperature=temperature, slope_percent=0.0)
+        predicted[i] = metrics['bpm']
+        if observed is None or observed[i]:
+            observer.observe("twin", real)
+        if observer.step(1.0):
+            intensity = observer.estimate("twin")["intensity"]
+    return predicted
+
+
+def error_stats(real, predicted):
+    diff = np.asarray(predicted) - np.asarray(real)
+    return {"rmse": float(np.sqrt(np.mean(diff ** 2))), "mae": float(np.mean(np.abs(diff))), "bias": float(np.mean(diff))}
+
+
+def validate_event(times, values, start, seed=None):
+    """Observer run over [start - PRE_S, start + POST_S); errors only at the real sample times."""
+    lo = np.searchsorted(times, start - PRE_S, side="left")
+    hi = np.searchsorted(times, start + POST_S, side="left")
+    t, v = np.asarray(times[lo:hi]), np.asarray(values[lo:hi], dtype=np.float64)
+    if len(t) < 2 or len(t) < (PRE_S + POST_S) / MAX_MEAN_INTERVAL_S or np.diff(t).max() > MAX_GAP_S:
+        return None
+    # Fitbit samples are irregular (1-15 s): the twin runs on a 1 Hz grid, the filter only sees the real samples
+    grid = np.arange(t[0], t[-1] + 1)
+    observed = np.zeros(len(grid), dtype=bool)
+    observed[t - t[0]] = True
+    predicted = run_observer(np.interp(grid, t, v), seed=seed, observed=observed)
+    stats = error_stats(v, predicted[t - t[0]])
+    stats["samples"] = len(t)
+    return stats
+
+
+def _validate_partition(args):
+    store_dir, user_ids = args
+    store = HeartRateStore(store_dir)
+    rows = []
+    for user_id in user_ids:
+        times, values = store.user_series(user_id)
+        events = detect_user_events(user_id, times, values)
+        starts = events["start_time"].to_numpy("datetime64[s]").astype(np.int64)
+        for start, start_hr in zip(starts, events["start_hr"]):
+            stats = validate_event(times, values, start, seed=int(start))
+            if stats is not None:
+                rows.append({"user_id": user_id, "start_time": start, "start_hr": float(start_hr), **stats})
+    return rows
+
+
+def run_harness(store, user_ids=None, workers=None):
+    """Per-event validation results for the whole dataset, users spread over a process pool."""
+    user_ids = store.users() if user_ids is None else list(user_ids)
+    workers = workers or os.cpu_count() or 1
+
+    sizes = {u: len(store.user_series(u)[0]) for u in user_ids}
+    n_parts = max(1, min(len(user_ids), workers * 4))
+    partitions = [[] for _ in range(n_parts)]
+    for i, user_id in enumerate(sorted(user_ids, key=sizes.get, reverse=True)):
+        partitions[i % n_parts].append(user_id)
+    tasks = [(store.store_dir, part) for part in partitions if part]
+
+    if workers == 1:
+        chunks = [_validate_partition(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_validate_partition, tasks))
+
+    results = pd.DataFrame([row for chunk in chunks for row in chunk], columns=[c for c in RESULT_COLUMNS if c != "activity"])
+    results["start_time"] = results["start_time"].astype("datetime64[s]")
+    results.insert(3, "activity", pd.cut(results["start_hr"], ACTIVITY_BINS, labels=ACTIVITY_LABELS, right=False))
+    return results.sort_values(["user_id", "start_time"], ignore_index=True)
+
+
+def summarize(results):
+    """RMSE / MAE / bias distributions: overall, per user and per activity level."""
+    def distribution(frame):
+        return {metric: {"mean": round(float(frame[metric].mean()), 2),
+                         "p10": round(float(frame[metric].quantile(0.1)), 2),
+                         "median": round(float(frame[metric].median()), 2),
+                         "p90": round(float(frame[metric].quantile(0.9)), 2)}
+                for metric in ("rmse", "mae", "bias")} | {"events": int(len(frame))}
+
+    return {
+        "overall": distribution(results) if len(results) else {"events": 0},
+        "per_activity": {str(level): distribution(group) for level, group in results.groupby("activity", observed=True)},
+        "per_user": {str(user): distribution(group) for user, group in results.groupby("user_id")},
+    }
+
+
+def write_report(results, summary, output_dir=DEFAULT_OUTPUT):
+    os.makedirs(output_dir, exist_ok=True)
+    results.to_csv(os.path.join(output_dir, "events.csv"), index=False)
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return output_dir
+
+
+def plot_events(store, results, output_dir=DEFAULT_OUTPUT, count=3):
+    """Optional: best and worst events re-simulated and drawn after the run (matplotlib only here)."""
+    from validation.continuous_validation import generate_validation_plot
+    ranked = results.sort_values("rmse")
+    picks = pd.concat([ranked.head(count), ranked.tail(count)]).drop_duplicates()
+    for row in picks.itertuples():
+        times, values = store.user_series(row.user_id)
+        start = int(np.datetime64(row.start_time, "s").astype(np.int64))
+        lo = np.searchsorted(times, start - PRE_S)
+        hi = np.searchsorted(times, start + POST_S)
+        t, v = np.asarray(times[lo:hi]), np.asarray(values[lo:hi], dtype=np.float64)
+        grid = np.arange(t[0], t[-1] + 1)
+        real = np.interp(grid, t, v)
+        filename = os.path.join(output_dir, f"event_{row.user_id}_{start}.png")
+        generate_validation_plot(grid - grid[0], real, run_observer(real, seed=start), filename=filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the twin's observer against every recovery event of the dataset")
+    parser.add_argument("csv_path", nargs="?", default=DEFAULT_CSV)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--plot", type=int, default=0, help="draw the N best and N worst events")
+    args = parser.parse_args()
+
+    store = open_store(args.csv_path)
+    start = time.perf_counter()
+    results = run_harness(store, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    summary = summarize(results)
+    write_report(results, summary, args.output)
+
+    print(f"✅ {len(results):,} events from {results['user_id'].nunique()} users validated in {elapsed:.1f}s")
+    overall = summary["overall"]
+    if overall["events"]:
+        print(f"🎯 RMSE median {overall['rmse']['median']} BPM (p10 {overall['rmse']['p10']} / p90 {overall['rmse']['p90']}) "
+              f"| MAE {overall['mae']['median']} | bias {overall['bias']['median']:+}")
+        for level, stats in summary["per_activity"].items():
+            print(f"   {level:>9}: {stats['events']:>5} events | RMSE median {stats['rmse']['median']} BPM")
+    print(f"💾 Report saved to {args.output}")
+
+    if args.plot and len(results):
+        plot_events(store, results, args.output, args.plot)
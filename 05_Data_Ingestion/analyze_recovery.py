@@ -1,20 +1,21 @@
 import pandas as pd
-import matplotlib.pyplot as plt
+from fitbit_store import open_store
+from recovery_detector import detect_user_events
 
 def find_recovery_windows(file_path, user_id=None):
     print(f"📂 Loading data from: {file_path}")
-    df = pd.read_csv(file_path)
-    df['Time'] = pd.to_datetime(df['Time'])
+    store = open_store(file_path)
     
     # If there is not an ID, take the first one with more data
     if not user_id:
-        user_id = df['Id'].iloc[0]
+        user_id = store.users()[0]
     
-    user_data = df[df['Id'] == user_id].sort_values('Time')
+    # Only this user's slice is read (already sorted by time)
+    user_data = store.to_frame([user_id])
     
     # Search for sharp drops: The pulse drops more than 20 beats in 60 seconds
-    user_data['diff_hr'] = user_data['Value'].diff(periods=-60) # Compare with 1 min later
-    recoveries = user_data[user_data['diff_hr'] > 20]
+    # (60 s measured on the timestamps: Fitbit sampling is irregular)
+    recoveries = detect_user_events(user_id, *store.user_series(user_id), min_drop=20)
     
     if recoveries.empty:
         print("❌ No clear recovery windows were found for this user.")
@@ -23,7 +24,7 @@ def find_recovery_windows(file_path, user_id=None):
     print(f"✅ Found {len(recoveries)} recovery events for user {user_id}")
     
     # Take the most drastic event to analyze
-    best_event_time = recoveries.sort_values('diff_hr', ascending=False).iloc[0]['Time']
+    best_event_time = recoveries.sort_values('hrr1', ascending=False).iloc[0]['start_time']
     window = user_data[(user_data['Time'] >= best_event_time - pd.Timedelta(seconds=10)) & 
                        (user_data['Time'] <= best_event_time + pd.Timedelta(seconds=120))]
     
@@ -0,0 +1,101 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+SENSOR_TOPIC = "heart/sensor/data"
+
+# Replay settings from Docker
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "1"))      # 1 = real time, 60 = 1 min/s, 0 = max
+REPLAY_ATHLETES = os.getenv("REPLAY_ATHLETES", "all")     # "all", the first N ("first:5") or ids ("id1,id2")
+REPLAY_QOS = int(os.getenv("REPLAY_QOS", "0"))
+REPORT_EVERY_S = 5.0
+
+
+def select_athletes(store, selection=REPLAY_ATHLETES):
+    users = store.users()
+    if selection in ("", "all"):
+        return users
+    if selection.startswith("first:"):
+        return users[:int(selection[len("first:"):])]
+    return [int(user) for user in selection.split(",")]
+
+
+class AthleteReplay:
+    """
+    Streams many athletes at once, keeping each one's real (irregular)
+    inter-sample gaps scaled by `speed`. Every athlete starts at t=0 of the replay.
+    """
+    def __init__(self, store, athlete_ids, speed=REPLAY_SPEED, qos=REPLAY_QOS):
+        self.speed = speed
+        self.qos = qos
+
+        offsets, owners, bpms, recorded = [], [], [], []
+        for index, athlete_id in enumerate(athlete_ids):
+            times, values = store.user_series(athlete_id)
+            if len(times) == 0:
+                continue
+            times = np.asarray(times)
+            offsets.append(times - times[0])
+            owners.append(np.full(len(times), index, dtype=np.int32))
+            bpms.append(np.asarray(values))
+            recorded.append(times)
+
+        # One merged timeline, sorted once: the scheduler only walks forward
+        offsets = np.concatenate(offsets)
+        order = np.argsort(offsets, kind="stable")
+        self.offsets = offsets[order]
+        self.owners = np.concatenate(owners)[order]
+        self.bpms = np.concatenate(bpms)[order]
+        self.recorded = np.concatenate(recorded)[order]
+        self.sensor_ids = [f"FITBIT_{athlete_id}" for athlete_id in athlete_ids]
+        self.twin_ids = [f"fitbit_{athlete_id}" for athlete_id in athlete_ids]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _payload(self, i):
+        """Message object: the transport serializes it for MQTT, the local bus hands it over as-is."""
+        owner = self.owners[i]
+        return {
+            "bpm": float(self.bpms[i]),
+            "sensor_id": self.sensor_ids[owner],
+            "twin_id": self.twin_ids[owner],
+            "timestamp": time.time(),
+            "real_time_recorded": str(pd.Timestamp(int(self.recorded[i]), unit="s")),
+        }
+
+    def run(self, client, topic=SENSOR_TOPIC):
+        """Publish the whole timeline through a message_bus transport (already started)."""
+        total = len(self.offsets)
+        # Replay time of each sample, in wall-clock seconds from the start
+        due = self.offsets / self.speed if self.speed > 0 else np.zeros(total)
+
+        print(f"▶️ Replaying {total:,} samples from {len(self.sensor_ids)} athletes "
+              f"(speed {'max' if self.speed <= 0 else f'{self.speed:g}x'}, QoS {self.qos})")
+        start = time.perf_counter()
+        last_report, sent_at_report = start, 0
+        i = 0
+        max_lag = 0.0
+
+        while i < total:
+            elapsed = time.perf_counter() - start
+            # Batch: everything already due goes out in one burst
+            j = int(np.searchsorted(due, elapsed, side="right"))
+            if j == i:
+                time.sleep(min(due[i] - elapsed, REPORT_EVERY_S))
+                continue
+            max_lag = max(max_lag, elapsed - due[i])
+            for k in range(i, j):
+                client.publish(topic, self._payload(k), qos=self.qos)
+            i = j
+
+            now = time.perf_counter()
+            if now - last_report >= REPORT_EVERY_S:
+                rate = (i - sent_at_report) / (now - last_report)
+                print(f"📡 [REPLAY] {i:,}/{total:,} sent | {rate:,.0f} msg/s | max lag {max_lag * 1000:.0f} ms")
+                last_report, sent_at_report, max_lag = now, i, 0.0
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ Replay finished: {total:,} messages in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} msg/s)")
+        return total, elapsed
@@ -1,60 +1,79 @@
-import paho.mqtt.client as mqtt
-import requests
 import time
-import json
 import os
+from message_bus import build_transport
+from climate_providers import build_provider, ClimateCache
 
 # Configuration from environment variables
-# Get your free key at: https://openweathermap.org/api
+# Get your free key at: https://openweathermap.org/api (without a key Open-Meteo is used)
 API_KEY = os.getenv("API_KEY", "TU_API_KEY_AQUI") 
 CITY = "Geneva,CH"
+GENEVA = (46.2044, 6.1432)
 MQTT_BROKER = os.getenv("MQTT_HOST", "mqtt_broker")
 TOPIC_ENV = "heart/env/temperature"
+REFRESH_S = float(os.getenv("CLIMATE_REFRESH_S", "300"))
 
-# setting up the MQTT client 
-client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, "Climate_Fetcher_RealTime")
+# Twins and where they are: "twin_a=46.20,6.14;twin_b=47.37,8.54" (default: one twin in Geneva)
+CLIMATE_LOCATIONS = os.getenv("CLIMATE_LOCATIONS", "")
 
-def get_real_weather():
-    """
-    Request the real temperature of Geneva using OpenWeatherMap.
-    """
-    try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={CITY}&appid={API_KEY}&units=metric"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status() 
-        data = response.json()
-        return data['main']['temp']
-    except Exception as e:
-        print(f"❌ Error connecting to the weather API: {e}")
-        return None
+# setting up the transport (MQTT, or the in-process bus in single-node mode)
+client = build_transport("Climate_Fetcher_RealTime", host=MQTT_BROKER)
+
+def parse_locations(spec=CLIMATE_LOCATIONS):
+    if not spec:
+        return {os.getenv("TWIN_ID", "default"): GENEVA}
+    locations = {}
+    for entry in spec.split(";"):
+        twin_id, coords = entry.split("=")
+        lat, lon = coords.split(",")
+        locations[twin_id.strip()] = (float(lat), float(lon))
+    return locations
+
+def build_payloads(cache, locations, provider_name):
+    """One temperature message per twin from the shared cache (stale values are still sent, flagged)."""
+    payloads = []
+    for twin_id, (lat, lon) in locations.items():
+        cached = cache.lookup(lat, lon)
+        if cached is None:
+            continue
+        temp, age = cached
+        payloads.append({
+            "temp_c": temp,
+            "twin_id": twin_id,
+            "lat": lat,
+            "lon": lon,
+            "timestamp": time.time(),
+            "age_s": round(age, 1),
+            "stale": age > cache.ttl_s,
+            "provider": provider_name
+        })
+    return payloads
 
 def run_scheduler():
+    locations = parse_locations()
+    provider = build_provider(api_key=API_KEY)
+    cache = ClimateCache(provider)
     try:
-        client.connect(MQTT_BROKER, 1883, 60)
-        print(f"🚀 [LEVEL 3] Climate Fetcher started for {CITY}.")
+        client.start()
+        print(f"🚀 [LEVEL 3] Climate Fetcher started: {len(locations)} twins, provider {provider.name}.")
     except Exception as e:
         print(f"📡 Error connecting to MQTT broker: {e}")
         return
 
     while True:
-        print(f"📡 Consultando clima real para {CITY}...")
-        temp = get_real_weather()
-        
-        if temp is not None:
-            payload = {
-                "temp_c": float(temp),
-                "city": CITY,
-                "timestamp": time.time(),
-                "provider": "OpenWeatherMap_RealTime"
-            }
-            client.publish(TOPIC_ENV, json.dumps(payload), retain=True)
-            
-            print(f"🌡️  REAL DATA SENT: {temp}°C (Geneva)")
+        fetched = cache.refresh(locations)
+        if fetched:
+            print(f"📡 Clima actualizado para {fetched} zonas")
+
+        payloads = build_payloads(cache, locations, provider.name)
+        for payload in payloads:
+            # Retained per twin topic would need new subscriptions: the engine filters by twin_id
+            client.publish(TOPIC_ENV, payload, retain=len(locations) == 1)
+        if payloads:
+            print(f"🌡️  REAL DATA SENT: {len(payloads)} twins ({payloads[0]['temp_c']}°C {payloads[0]['twin_id']})")
         else:
             print("⚠️ Could not get the weather. Retrying...")
 
-        
-        time.sleep(300) 
+        time.sleep(REFRESH_S) 
 
 if __name__ == "__main__":
-    run_scheduler()
\ No newline at end of file
+    run_scheduler()
@@ -0,0 +1,152 @@
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+import requests
+
+# Twins closer than ~11 km (0.1°) share one weather lookup
+GRID_DECIMALS = int(os.getenv("CLIMATE_GRID_DECIMALS", "1"))
+CACHE_TTL_S = float(os.getenv("CLIMATE_TTL_S", "900"))
+HTTP_TIMEOUT_S = 10
+
+
+def cell_of(lat, lon, decimals=GRID_DECIMALS):
+    return (round(float(lat), decimals), round(float(lon), decimals))
+
+
+class OpenWeatherMapProvider:
+    """Current temperature per cell; OWM has no multi-coordinate endpoint, so one call per cell on a keep-alive session."""
+    name = "OpenWeatherMap_RealTime"
+    url = "http://api.openweathermap.org/data/2.5/weather"
+
+    def __init__(self, api_key, session=None):
+        self.api_key = api_key
+        self.session = session or requests.Session()
+
+    def fetch(self, cells):
+        temps = {}
+        for lat, lon in cells:
+            try:
+                response = self.session.get(self.url, params={"lat": lat, "lon": lon, "appid": self.api_key,
+                                                              "units": "metric"}, timeout=HTTP_TIMEOUT_S)
+                response.raise_for_status()
+                temps[(lat, lon)] = float(response.json()["main"]["temp"])
+            except Exception as e:
+                print(f"❌ Error connecting to the weather API ({lat}, {lon}): {e}")
+        return temps
+
+
+class OpenMeteoProvider:
+    """No key needed and real batching: every cell in a single request."""
+    name = "OpenMeteo"
+    url = "https://api.open-meteo.com/v1/forecast"
+
+    def __init__(self, session=None):
+        self.session = session or requests.Session()
+
+    def fetch(self, cells):
+        if not cells:
+            return {}
+        try:
+            response = self.session.get(self.url, params={
+                "latitude": ",".join(str(lat) for lat, _ in cells),
+                "longitude": ",".join(str(lon) for _, lon in cells),
+                "current": "temperature_2m",
+            }, timeout=HTTP_TIMEOUT_S)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            print(f"❌ Error connecting to the weather API: {e}")
+            return {}
+        # One location -> object, several -> list (same order as requested)
+        results = data if isinstance(data, list) else [data]
+        return {cell: float(result["current"]["temperature_2m"]) for cell, result in zip(cells, results)}
+
+
+class FileReplayProvider:
+    """
+    Historical weather from a CSV (timestamp, lat, lon, temp_c) for tests and offline runs.
+    The replay clock starts at the first timestamp and runs `speed` times faster than `clock`.
+    """
+    name = "FileReplay"
+
+    def __init__(self, path, speed=1.0, clock=time.time):
+        frame = pd.read_csv(path)
+        stamps = frame["timestamp"]
+        if not pd.api.types.is_numeric_dtype(stamps):
+            stamps = pd.to_datetime(stamps, utc=True).astype("int64") // 1_000_000_000
+        frame = frame.assign(timestamp=stamps.astype(np.float64)).sort_values("timestamp", kind="stable")
+
+        self.series = {}
+        for (lat, lon), group in frame.groupby(["lat", "lon"]):
+            self.series[(float(lat), float(lon))] = (group["timestamp"].to_numpy(), group["temp_c"].to_numpy(np.float64))
+        self.stations = np.array(list(self.series.keys()))
+        self.t0 = float(frame["timestamp"].iloc[0])
+        self.speed = speed
+        self.clock = clock
+        self.started = clock()
+
+    def replay_time(self):
+        return self.t0 + (self.clock() - self.started) * self.speed
+
+    def fetch(self, cells):
+        now = self.replay_time()
+        temps = {}
+        for cell in cells:
+            # Nearest station in the file, then the last sample at or before the replay time
+            nearest = np.argmin(((self.stations - np.array(cell)) ** 2).sum(axis=1))
+            times, values = self.series[tuple(self.stations[nearest])]
+            i = max(int(np.searchsorted(times, now, side="right")) - 1, 0)
+            temps[cell] = float(values[i])
+        return temps
+
+
+def build_provider(spec=None, api_key=None, session=None):
+    """CLIMATE_PROVIDER: "openweathermap" (default with an API key), "openmeteo" or "file:<path>"."""
+    spec = spec or os.getenv("CLIMATE_PROVIDER", "")
+    api_key = api_key or os.getenv("API_KEY", "")
+    if spec.startswith("file:"):
+        return FileReplayProvider(spec[5:], speed=float(os.getenv("CLIMATE_REPLAY_SPEED", "1")))
+    if spec == "openmeteo" or (not spec and api_key in ("", "TU_API_KEY_AQUI")):
+        return OpenMeteoProvider(session)
+    return OpenWeatherMapProvider(api_key, session)
+
+
+class ClimateCache:
+    """TTL cache keyed by grid cell: upstream calls scale with locations, not twins."""
+    def __init__(self, provider, ttl_s=CACHE_TTL_S, decimals=GRID_DECIMALS, clock=time.time):
+        self.provider = provider
+        self.ttl_s = ttl_s
+        self.decimals = decimals
+        self.clock = clock
+        self.entries = {}          # cell -> (temp_c, fetched_at)
+        self.refresh_batches = 0
+        self.lock = threading.Lock()
+
+    def refresh(self, locations):
+        """
+        Fetch every expired cell of `locations` ({twin_id: (lat, lon)}) in one provider batch.
+        Returns how many cells were actually refreshed (the provider may fail on some or all).
+        """
+        now = self.clock()
+        cells = {cell_of(lat, lon, self.decimals) for lat, lon in locations.values()}
+        with self.lock:
+            expired = sorted(c for c in cells if c not in self.entries or now - self.entries[c][1] >= self.ttl_s)
+        if not expired:
+            return 0
+        self.refresh_batches += 1
+        fresh = self.provider.fetch(expired)
+        with self.lock:
+            for cell, temp in fresh.items():
+                self.entries[cell] = (temp, now)
+        if len(fresh) < len(expired):
+            print(f"⚠️ {len(expired) - len(fresh)} of {len(expired)} expired zones not refreshed: serving the last value")
+        return len(fresh)
+
+    def lookup(self, lat, lon):
+        """(temp_c, age_s) for the cell of (lat, lon); None if it was never fetched."""
+        entry = self.entries.get(cell_of(lat, lon, self.decimals))
+        if entry is None:
+            return None
+        return entry[0], self.clock() - entry[1]
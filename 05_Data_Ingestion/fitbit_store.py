@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+# Fitbit export columns: Id, Time ("4/12/2016 7:21:00 AM"), Value (BPM)
+FITBIT_TIME_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets", "heartrate_seconds_merged.csv")
+CSV_CHUNK_ROWS = 1_000_000
+STORE_VERSION = 1
+
+
+def _default_store_dir(csv_path):
+    return os.path.splitext(csv_path)[0] + "_store"
+
+
+def convert_csv(csv_path=DEFAULT_CSV, store_dir=None):
+    """
+    One-time conversion of heartrate_seconds_merged.csv into a columnar store:
+    ids.npy / offsets.npy (per-user slice) + time.npy (epoch s) + value.npy,
+    sorted by (Id, Time) so any window is two binary searches away.
+    """
+    store_dir = store_dir or _default_store_dir(csv_path)
+    os.makedirs(store_dir, exist_ok=True)
+    print(f"🗜️ Converting {csv_path} -> {store_dir} ...")
+
+    ids, times, values = [], [], []
+    for chunk in pd.read_csv(csv_path, chunksize=CSV_CHUNK_ROWS,
+                             dtype={"Id": np.int64, "Value": np.float32}):
+        # Explicit format: no per-row format inference
+        parsed = pd.to_datetime(chunk["Time"], format=FITBIT_TIME_FORMAT)
+        ids.append(chunk["Id"].to_numpy(np.int64))
+        times.append(parsed.to_numpy("datetime64[s]").astype(np.int64))
+        values.append(chunk["Value"].to_numpy(np.float32))
+
+    ids = np.concatenate(ids)
+    times = np.concatenate(times)
+    values = np.concatenate(values)
+
+    order = np.lexsort((times, ids))
+    ids, times, values = ids[order], times[order], values[order]
+
+    user_ids, starts = np.unique(ids, return_index=True)
+    offsets = np.append(starts, len(ids)).astype(np.int64)
+
+    np.save(os.path.join(store_dir, "ids.npy"), user_ids)
+    np.save(os.path.join(store_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(store_dir, "time.npy"), times)
+    np.save(os.path.join(store_dir, "value.npy"), values)
+    with open(os.path.join(store_dir, "meta.json"), "w") as f:
+        json.dump({"version": STORE_VERSION, "source": os.path.abspath(csv_path),
+                   "source_mtime": os.path.getmtime(csv_path), "rows": int(len(ids)),
+                   "users": int(len(user_ids))}, f)
+
+    print(f"✅ Store ready: {len(ids):,} samples, {len(user_ids)} users.")
+    return store_dir
+
+
+def to_epoch(value):
+    """Accept epoch seconds, datetime/Timestamp or an ISO / Fitbit string (naive = dataset clock)."""
+    if isinstance(value, (int, np.integer, float, np.floating)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(timezone.utc).tz_localize(None)
+    return int(ts.value // 1_000_000_000)
+
+
+class HeartRateStore:
+    """Memory-mapped, read-only view of the converted dataset."""
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.ids = np.load(os.path.join(store_dir, "ids.npy"))
+        self.offsets = np.load(os.path.join(store_dir, "offsets.npy"))
+        # mmap: opening is O(1), pages are only read for the windows we touch
+        self.time = np.load(os.path.join(store_dir, "time.npy"), mmap_mode="r")
+        self.value = np.load(os.path.join(store_dir, "value.npy"), mmap_mode="r")
+
+    def users(self):
+        return self.ids.tolist()
+
+    def _slice(self, user_id):
+        i = np.searchsorted(self.ids, user_id)
+        if i >= len(self.ids) or self.ids[i] != user_id:
+            raise KeyError(f"User {user_id} not in the dataset")
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def user_series(self, user_id):
+        """All (epoch seconds, BPM) samples of one user, sorted by time."""
+        lo, hi = self._slice(user_id)
+        return self.time[lo:hi], self.value[lo:hi]
+
+    def window(self, user_id, t0, t1):
+        """Samples of `user_id` in [t0, t1) via binary search (views, no copy)."""
+        times, values = self.user_series(user_id)
+        lo = np.searchsorted(times, to_epoch(t0), side="left")
+        hi = np.searchsorted(times, to_epoch(t1), side="left")
+        return times[lo:hi], values[lo:hi]
+
+    def to_frame(self, user_ids=None):
+        """DataFrame(Id, Time, Value) for the given users (all when None)."""
+        user_ids = self.users() if user_ids is None else user_ids
+        frames = []
+        for user_id in user_ids:
+            times, values = self.user_series(user_id)
+            frames.append(pd.DataFrame({
+                "Id": np.full(len(times), user_id, dtype=np.int64),
+                "Time": np.asarray(times).astype("datetime64[s]"),
+                "Value": np.asarray(values),
+            }))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Id", "Time", "Value"])
+
+
+def open_store(csv_path=DEFAULT_CSV, store_dir=None):
+    """Open the store, converting the CSV first if the store is missing or stale."""
+    store_dir = store_dir or _default_store_dir(csv_path)
+    meta_path = os.path.join(store_dir, "meta.json")
+    stale = True
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        stale = (meta.get("version") != STORE_VERSION or
+                 (os.path.exists(csv_path) and os.path.getmtime(csv_path) > meta.get("source_mtime", 0)))
+    if stale:
+        convert_csv(csv_path, store_dir)
+    return HeartRateStore(store_dir)
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    start = datetime.now()
+    convert_csv(csv_path, store_dir)
+    print(f"⏱️ Conversion took {(datetime.now() - start).total_seconds():.1f}s")
@@ -1,69 +1,48 @@
 import os
 import time
-import json
-import pandas as pd
 import numpy as np
-import vitaldb
-import paho.mqtt.client as mqtt
+from message_bus import build_transport
+from fitbit_store import open_store, DEFAULT_CSV
+from athlete_replay import AthleteReplay, select_athletes
+from vitaldb_cache import load_tracks
 
 # Setting from Docker
 MQTT_HOST = os.getenv("MQTT_HOST", "mqtt_broker")
 MODE = os.getenv("DATA_MODE", "athlete") # 'athlete' o 'clinical'
-CSV_PATH = "/app/datasets/heartrate_seconds_merged.csv"
+CSV_PATH = os.getenv("FITBIT_CSV") or DEFAULT_CSV   # datasets/ next to this file (/app/datasets in Docker)
 
-client = mqtt.Client()
-
-def connect_mqtt():
-    while True:
-        try:
-            client.connect(MQTT_HOST, 1883, 60)
-            print(f"✅ Connected to MQTT Broker in mode: {MODE}")
-            break
-        except:
-            print("⏳ Waiting for Broker MQTT...")
-            time.sleep(2)
+# MQTT: paho's network thread handles the socket, publish() only queues (non-blocking); stop() flushes the queue
+client = build_transport("Heart_Data_Ingestor", host=MQTT_HOST, max_inflight=1000)
 
 def run_ingestor():
-    connect_mqtt()
-    
-    if MODE == "athlete":
-        print(f"🏃 Loading Kaggle data from {CSV_PATH}...")
-        df = pd.read_csv(CSV_PATH)
-
-        # take the first runner
-        first_user_id = df['Id'].iloc[0]
-        athlete_data = df[df['Id'] == first_user_id]
-
-        print(f"👤 Reproducing data from Atleta ID: {first_user_id}")
-        print(f"📊 Total beats to reproduce: {len(athlete_data)}")
-
-        # Assuming the columns are 'Id', 'Time', 'Value'
-        for _, row in athlete_data.iterrows():
-            payload = {
-                "bpm": float(row['Value']),
-                "sensor_id": f"FITBIT_{first_user_id}",
-                "timestamp": time.time(),
-                "real_time_recorded": str(row['Time'])
-            }
-
-            client.publish("heart/sensor/data", json.dumps(payload))
-            print(f"📡 [KAGGE-REAL] BPM: {row['Value']} | Hora original: {row['Time']}")
-
-            time.sleep(1) # One beat per second
-
-    elif MODE == "clinical":
-        print("🏥  clinical mode connect with data from VitalDB (Case 1)...")
-        # This does not download the 95GB, only case 1
-        vals = vitaldb.load_case(1, ['Solar8000/HR'], interval=1)
-        for hr in vals:
-            if hr[0] and not np.isnan(hr[0]):
-                payload = {
-                    "bpm": float(hr[0]),
-                    "sensor_id": "VITALDB_PATIENT_001",
-                    "timestamp": time.time()
-                }
-                client.publish("heart/sensor/data", json.dumps(payload))
-                time.sleep(1)
+    client.start()
+    print(f"✅ Ingestor running in mode: {MODE}")
+
+    try:
+        if MODE == "athlete":
+            print(f"🏃 Loading Kaggle data from {CSV_PATH}...")
+            store = open_store(CSV_PATH)
+
+            athlete_ids = select_athletes(store)
+            print(f"👤 Reproducing {len(athlete_ids)} athletes: {athlete_ids[:5]}{'...' if len(athlete_ids) > 5 else ''}")
+            AthleteReplay(store, athlete_ids).run(client)
+
+        elif MODE == "clinical":
+            print("🏥  clinical mode connect with data from VitalDB (Case 1)...")
+            # This does not download the 95GB, only case 1 (and only once: then from the cache)
+            vals = load_tracks(1, ['Solar8000/HR'], interval=1)
+            for hr in vals:
+                if hr[0] and not np.isnan(hr[0]):
+                    payload = {
+                        "bpm": float(hr[0]),
+                        "sensor_id": "VITALDB_PATIENT_001",
+                        "timestamp": time.time()
+                    }
+                    client.publish("heart/sensor/data", payload)
+                    time.sleep(1)
+    finally:
+        # Waits for the queued tail of the replay before disconnecting
+        client.stop()
 
 
 if __name__ == "__main__":
@@ -1,48 +1,22 @@
-import time
-import json
-import random
-import paho.mqtt.client as mqtt
+import os
+from message_bus import build_transport
+from scenario_compiler import load_scenario
+from scenario_publisher import ScenarioPublisher
 
 # Settings the system nervous (MQTT)
 MQTT_BROKER = "mqtt_broker"
 MQTT_PORT = 1883
-TOPIC_INTENSITY = "heart/physio/intensity"
-TOPIC_ENV = "heart/env/temperature"
 
-client = mqtt.Client()
+# Virtual sensor: the random training load (0.1-0.9) and Geneva heat (23-30°C) of a
+# biomedical + climatic API, as a seeded scenario (05_Data_Ingestion/scenarios/virtual_sensor.json)
+SCENARIO = os.getenv("SCENARIO", "virtual_sensor")
 
-def connect_mqtt():
-    while True:
-        try:
-            client.connect(MQTT_BROKER, MQTT_PORT, 60)
-            print("✅ Ingestor connected to MQTT Broker")
-            break
-        except:
-            print("⏳ Waiting for Broker...")
-            time.sleep(2)
-
-def fetch_virtual_sensor_data():
-    """
-    Simulate the acquisition of data from a biomédical API (e.g. PhysioNet)
-    and a climatic API for the Digital Twin.
-    """
-    # API 1: Physiological data (Real training load)
-    virtual_intensity = random.uniform(0.1, 0.9) 
-    
-    # API 2: Climatic data (Temperature in Geneva)
-    # The heat increases the stress on the heart
-    ambient_temp = 25.0 + random.uniform(-2, 5) 
-    
-    return virtual_intensity, ambient_temp
+client = build_transport("Virtual_Sensor_Ingestor", host=MQTT_BROKER, port=MQTT_PORT)
 
 if __name__ == "__main__":
-    connect_mqtt()
-    while True:
-        intensity, temp = fetch_virtual_sensor_data()
-        
-        # Send as JSON for consistency
-        client.publish(TOPIC_INTENSITY, json.dumps({"intensity": intensity}))
-        client.publish(TOPIC_ENV, json.dumps({"temp_c": temp, "unit": "Celsius"}))
-        
-        print(f"📡 Sensor Virtual -> Intensity: {intensity:.2f} | Temp: {temp:.1f}°C")
-        time.sleep(1)
\ No newline at end of file
+    client.start()
+    print("✅ Ingestor connected")
+    # Every value every second, for every twin (no twin_id), forever
+    publisher = ScenarioPublisher(load_scenario(SCENARIO), [None], speed=1.0, changes_only=False,
+                                  channels=("intensity", "temperature"))
+    publisher.run(client, loop=True)
@@ -0,0 +1,268 @@
+import os
+import json
+import queue
+import threading
+import time
+from collections import deque
+import paho.mqtt.client as mqtt
+
+# Transport between the services:
+#   mqtt  -> paho-mqtt through Mosquitto (one container per service, the distributed setup)
+#   local -> in-process queue, every service in one process (single_node.py): Python objects
+#            are handed over as-is, no JSON, no socket
+TRANSPORT = os.getenv("TRANSPORT", "mqtt")
+MQTT_HOST = os.getenv("MQTT_HOST", "mqtt_broker")
+MQTT_PORT = int(os.getenv("MQTT_PORT", "1883"))
+CONNECT_RETRY_S = 2.0
+# stop() waits this long for queued publishes to leave before disconnecting
+FLUSH_TIMEOUT_S = float(os.getenv("FLUSH_TIMEOUT_S", "30"))
+
+
+def topic_matches(pattern, topic):
+    """MQTT filter matching ('+' one level, '#' the rest)."""
+    parts, levels = pattern.split("/"), topic.split("/")
+    for i, part in enumerate(parts):
+        if part == "#":
+            return True
+        if i >= len(levels) or (part != "+" and part != levels[i]):
+            return False
+    return len(parts) == len(levels)
+
+
+def encode(payload):
+    """Bytes for the wire: dict / list / number -> JSON, str -> UTF-8."""
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    if isinstance(payload, str):
+        return payload.encode()
+    return json.dumps(payload).encode()
+
+
+def decode(payload):
+    """Handler side: MQTT bytes -> JSON value (or the raw text); local objects are returned untouched."""
+    if isinstance(payload, (bytes, bytearray)):
+        payload = payload.decode()
+    if not isinstance(payload, str):
+        return payload
+    try:
+        return json.loads(payload)
+    except ValueError:
+        return payload
+
+
+class MQTTTransport:
+    """paho-mqtt client; subscriptions are renewed on every (re)connection."""
+    def __init__(self, client_id, host=MQTT_HOST, port=MQTT_PORT, max_inflight=None):
+        self.client_id = client_id
+        self.host, self.port = host, port
+        self.handlers = []         # (pattern, handler, qos)
+        # publish() only queues: MessageInfo of every publish paho may not have sent yet, oldest first
+        self.unsent = deque()
+        self.unsent_lock = threading.Lock()
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id)
+        if max_inflight:
+            self.client.max_inflight_messages_set(max_inflight)
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+
+    def subscribe(self, pattern, handler, qos=0):
+        """handler(topic, payload) runs on the network thread; payload is the raw bytes."""
+        self.handlers.append((pattern, handler, qos))
+        if self.client.is_connected():
+            self.client.subscribe(pattern, qos=qos)
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        info = self.client.publish(topic, encode(payload), qos=qos, retain=retain)
+        with self.unsent_lock:
+            self.unsent.append(info)
+            while self.unsent and _sent_or_failed(self.unsent[0]):
+                self.unsent.popleft()
+        return info
+
+    def flush(self, timeout=FLUSH_TIMEOUT_S):
+        """Block until every queued publish is out (QoS 0: written to the socket, QoS 1/2: acknowledged)."""
+        deadline = time.monotonic() + timeout
+        with self.unsent_lock:
+            unsent, self.unsent = self.unsent, deque()
+        for info in unsent:
+            if _sent_or_failed(info):
+                continue
+            info.wait_for_publish(max(0.0, deadline - time.monotonic()))
+            if not info.is_published():
+                left = sum(1 for i in unsent if not _sent_or_failed(i))
+                print(f"⚠️ {self.client_id}: {left:,} messages still queued after {timeout:g}s")
+                return False
+        return True
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
+        if rc == 0:
+            print(f"✅ {self.client_id} connected to the broker ({self.host}).")
+            for pattern, _, qos in self.handlers:
+                client.subscribe(pattern, qos=qos)
+        else:
+            print(f"❌ Error MQTT: {rc}")
+
+    def _on_message(self, client, userdata, msg):
+        for pattern, handler, _ in self.handlers:
+            if topic_matches(pattern, msg.topic):
+                handler(msg.topic, msg.payload)
+
+    def connect(self):
+        """Block until the broker accepts the connection."""
+        while True:
+            try:
+                self.client.connect(self.host, self.port, 60)
+                return
+            except Exception as e:
+                print(f"⏳ Waiting for Broker MQTT ({e})...")
+                time.sleep(CONNECT_RETRY_S)
+
+    def start(self, wait=True):
+        """Network loop in a background thread; wait=False boots even if the broker is still down."""
+        if wait:
+            self.connect()
+        else:
+            self.client.connect_async(self.host, self.port, 60)
+        self.client.loop_start()
+
+    def loop_forever(self):
+        self.connect()
+        self.client.loop_forever()
+
+    def stop(self, flush=True):
+        """Flush, then disconnect: stopping the network thread first would drop what is still queued."""
+        if flush:
+            self.flush()
+        self.client.disconnect()
+        self.client.loop_stop()
+
+
+def _sent_or_failed(info):
+    # Failed publishes (not queued, no connection for QoS 0) have nothing left to wait for
+    if info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_AGAIN):
+        return True
+    return info.is_published()
+
+
+class LocalBus:
+    """
+    Process-wide broker: one queue and one dispatcher thread, so handlers run
+    in publish order, off the publisher's thread (as with paho's network thread).
+    Retained messages are replayed to late subscribers. Published objects are
+    shared, not copied: handlers must treat them as read-only.
+    """
+    def __init__(self):
+        self.handlers = []         # (pattern, handler)
+        self.retained = {}
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.thread = None
+        # Messages queued / fully handled so far: flush() waits for the first to catch up
+        self.published = 0
+        self.dispatched = 0
+        self.progress = threading.Condition(threading.Lock())
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._dispatch, daemon=True, name="local-bus")
+                self.thread.start()
+
+    def subscribe(self, pattern, handler):
+        with self.lock:
+            self.handlers.append((pattern, handler))
+            retained = [(t, p) for t, p in self.retained.items() if topic_matches(pattern, t)]
+        for topic, payload in retained:
+            self._put((topic, payload, [handler]))
+
+    def unsubscribe(self, handler):
+        with self.lock:
+            self.handlers = [(p, h) for p, h in self.handlers if h is not handler]
+
+    def publish(self, topic, payload, retain=False):
+        with self.lock:
+            if retain:
+                self.retained[topic] = payload
+            handlers = [h for pattern, h in self.handlers if topic_matches(pattern, topic)]
+        if handlers:
+            self._put((topic, payload, handlers))
+
+    def _put(self, item):
+        with self.progress:
+            self.published += 1
+        self.queue.put(item)
+
+    def flush(self, timeout=FLUSH_TIMEOUT_S):
+        """Block until every message published so far has been handled (False on timeout)."""
+        if self.thread is None or threading.current_thread() is self.thread:
+            return True     # no dispatcher yet, or called from a handler: waiting would deadlock
+        with self.progress:
+            target = self.published
+            return self.progress.wait_for(lambda: self.dispatched >= target, timeout)
+
+    def _dispatch(self):
+        while True:
+            topic, payload, handlers = self.queue.get()
+            for handler in handlers:
+                try:
+                    handler(topic, payload)
+                except Exception as e:
+                    print(f"⚠️ Error en handler ({topic}): {e}")
+            with self.progress:
+                self.dispatched += 1
+                self.progress.notify_all()
+
+
+class LocalTransport:
+    """One service's view of the shared LocalBus, same interface as MQTTTransport."""
+    def __init__(self, client_id, bus=None):
+        self.client_id = client_id
+        self.bus = bus or local_bus()
+        self.handlers = []
+
+    def subscribe(self, pattern, handler, qos=0):
+        self.handlers.append(handler)
+        self.bus.subscribe(pattern, handler)
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        self.bus.publish(topic, payload, retain=retain)
+
+    def start(self, wait=True):
+        self.bus.start()
+
+    def loop_forever(self):
+        self.bus.start()
+        threading.Event().wait()
+
+    def flush(self, timeout=FLUSH_TIMEOUT_S):
+        return self.bus.flush(timeout)
+
+    def stop(self, flush=True):
+        """Same contract as MQTTTransport.stop: what was published is delivered before stopping."""
+        if flush and not self.bus.flush():
+            print(f"⚠️ {self.client_id}: local bus still busy after {FLUSH_TIMEOUT_S:g}s")
+        for handler in self.handlers:
+            self.bus.unsubscribe(handler)
+        self.handlers = []
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def local_bus():
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = LocalBus()
+        return _bus
+
+
+def build_transport(client_id, kind=None, **kwargs):
+    """Transport selected by TRANSPORT (mqtt | local)."""
+    kind = kind or TRANSPORT
+    if kind == "local":
+        return LocalTransport(client_id)
+    if kind == "mqtt":
+        return MQTTTransport(client_id, **kwargs)
+    raise ValueError(f"Unknown transport: {kind} (mqtt | local)")
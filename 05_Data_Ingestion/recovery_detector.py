@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from fitbit_store import open_store, DEFAULT_CSV
+
+# Shared HRR / HRRPT analytics (also used by HeartModel and the validation scripts)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../01_Backend_Simulation')))
+from core_logic.recovery_analytics import analyze_curves
+
+# Detection parameters (time based: Fitbit sampling is irregular, 1-15 s)
+MIN_START_HR = 110.0     # the recovery must start from an effort
+MIN_DROP_60S = 20.0      # HRR1 threshold (BPM)
+TOLERANCE_S = 15         # max distance between t+60 s and the sample used for it
+EVENT_GAP_S = 60         # candidates closer than this belong to the same event
+RECOVERY_WINDOW_S = 180  # curve length used for HRRPT (1 Hz resampled)
+
+EVENT_COLUMNS = ["user_id", "start_time", "start_hr", "hr_60s", "hrr1", "hr_120s", "hrr2", "hrrpt_s"]
+
+
+def value_after(times, values, lag_s, tolerance_s=TOLERANCE_S):
+    """HR `lag_s` seconds later for every sample (first sample at/after t+lag), NaN if too far."""
+    target = times + lag_s
+    j = np.searchsorted(times, target, side="left")
+    valid = j < len(times)
+    j_safe = np.minimum(j, len(times) - 1)
+    valid &= (times[j_safe] - target) <= tolerance_s
+    return np.where(valid, values[j_safe], np.nan)
+
+
+def detect_user_events(user_id, times, values, min_start_hr=MIN_START_HR, min_drop=MIN_DROP_60S):
+    """All recovery events of one user as a DataFrame (one row per event)."""
+    t = np.asarray(times, dtype=np.int64)
+    v = np.asarray(values, dtype=np.float64)
+    if len(t) < 2:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    hr_60 = value_after(t, v, 60)
+    drop = v - hr_60
+    candidates = np.flatnonzero((v >= min_start_hr) & (drop >= min_drop))
+    if len(candidates) == 0:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    # Group candidates into events and keep the strongest drop of each one
+    cluster = np.concatenate(([0], np.cumsum(np.diff(t[candidates]) > EVENT_GAP_S)))
+    order = np.lexsort((-drop[candidates], cluster))
+    first_of_cluster = np.concatenate(([True], np.diff(cluster[order]) != 0))
+    starts = candidates[order[first_of_cluster]]
+
+    hr_120 = value_after(t, v, 120)[starts]
+
+    # Resample every recovery curve on a common 1 Hz grid, then HRRPT in one pass
+    grid = t[starts, None] + np.arange(RECOVERY_WINDOW_S)
+    curves = np.interp(grid.ravel(), t, v).reshape(grid.shape)
+    covered = t[-1] >= t[starts] + RECOVERY_WINDOW_S - TOLERANCE_S
+    hrrpt = np.where(covered, analyze_curves(curves)["hrrpt_s"], np.nan)
+
+    return pd.DataFrame({
+        "user_id": np.full(len(starts), user_id, dtype=np.int64),
+        "start_time": t[starts].astype("datetime64[s]"),
+        "start_hr": v[starts],
+        "hr_60s": hr_60[starts],
+        "hrr1": drop[starts],
+        "hr_120s": hr_120,
+        "hrr2": v[starts] - hr_120,
+        "hrrpt_s": hrrpt,
+    })
+
+
+def _detect_partition(args):
+    store_dir, user_ids, min_start_hr, min_drop = args
+    # Each worker maps the store itself: nothing big crosses the process boundary
+    from fitbit_store import HeartRateStore
+    store = HeartRateStore(store_dir)
+    frames = [detect_user_events(user_id, *store.user_series(user_id), min_start_hr, min_drop)
+              for user_id in user_ids]
+    frames = [f for f in frames if len(f)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=EVENT_COLUMNS)
+
+
+def detect_all(store, user_ids=None, workers=None, min_start_hr=MIN_START_HR, min_drop=MIN_DROP_60S):
+    """Recovery event index for the whole dataset, users split across a process pool."""
+    user_ids = store.users() if user_ids is None else list(user_ids)
+    workers = workers or os.cpu_count() or 1
+
+    # Balance partitions by sample count (largest users first, round-robin)
+    sizes = {u: len(store.user_series(u)[0]) for u in user_ids}
+    n_parts = max(1, min(len(user_ids), workers * 4))
+    partitions = [[] for _ in range(n_parts)]
+    for i, user_id in enumerate(sorted(user_ids, key=sizes.get, reverse=True)):
+        partitions[i % n_parts].append(user_id)
+
+    tasks = [(store.store_dir, part, min_start_hr, min_drop) for part in partitions if part]
+    if workers == 1:
+        frames = [_detect_partition(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(_detect_partition, tasks))
+
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    return pd.concat(frames, ignore_index=True).sort_values(["user_id", "start_time"], ignore_index=True)
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    store = open_store(csv_path)
+    start = time.perf_counter()
+    events = detect_all(store)
+    elapsed = time.perf_counter() - start
+
+    output = os.path.join(os.path.dirname(os.path.abspath(csv_path)), "recovery_events.csv")
+    events.to_csv(output, index=False)
+    print(f"✅ {len(events):,} recovery events from {len(store.users())} users in {elapsed:.1f}s")
+    print(f"💾 Event index saved to {output}")
@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+import xml.etree.ElementTree as ET
+import numpy as np
+from terrain_sampler import TerrainSampler, haversine, TERRAIN_TIF
+
+ROUTE_CACHE_DIR = os.getenv("ROUTE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets", "route_cache"))
+RESAMPLE_STEP_M = 10.0     # distance between profile points
+SMOOTHING_M = 50.0         # elevation moving-average window (removes DEM pixel steps)
+PROFILE_VERSION = 1
+
+
+def parse_track(data: bytes, filename=""):
+    """(lats, lons, elevations or None) from a GPX or GeoJSON track."""
+    text = data.lstrip()
+    if filename.lower().endswith((".json", ".geojson")) or text[:1] in (b"{", b"["):
+        geo = json.loads(data)
+        if geo.get("type") == "FeatureCollection":
+            geometries = [f["geometry"] for f in geo["features"]]
+        elif geo.get("type") == "Feature":
+            geometries = [geo["geometry"]]
+        else:
+            geometries = [geo]
+        coords = []
+        for geometry in geometries:
+            if geometry["type"] == "LineString":
+                coords += geometry["coordinates"]
+            elif geometry["type"] == "MultiLineString":
+                for line in geometry["coordinates"]:
+                    coords += line
+        coords = np.asarray(coords, dtype=np.float64)
+        elevations = coords[:, 2] if coords.shape[1] > 2 else None
+        return coords[:, 1], coords[:, 0], elevations  # GeoJSON is lon, lat[, ele]
+
+    root = ET.fromstring(data)
+    points = [el for el in root.iter() if el.tag.split("}")[-1] in ("trkpt", "rtept")]
+    lats = np.array([float(p.get("lat")) for p in points])
+    lons = np.array([float(p.get("lon")) for p in points])
+    eles = [next((c.text for c in p if c.tag.split("}")[-1] == "ele"), None) for p in points]
+    elevations = np.array([float(e) for e in eles]) if all(e is not None for e in eles) else None
+    return lats, lons, elevations
+
+
+class RouteProfile:
+    """Elevation / slope profile sampled every `step` meters along a route."""
+    def __init__(self, distances, lats, lons, elevations, slopes, step):
+        self.distances = distances
+        self.lats = lats
+        self.lons = lons
+        self.elevations = elevations
+        self.slopes = slopes
+        self.step = step
+        self.length = float(distances[-1])
+
+    def _index(self, distance):
+        # Uniform grid: O(1) lookup, vectorized for many athletes at once
+        idx = np.floor(np.asarray(distance, dtype=np.float64) / self.step).astype(np.int64)
+        return np.clip(idx, 0, len(self.distances) - 1)
+
+    def slope_at(self, distance):
+        """Smoothed slope (%) at `distance` meters (scalar or array)."""
+        return self.slopes[self._index(distance)]
+
+    def elevation_at(self, distance):
+        return self.elevations[self._index(distance)]
+
+    def position_at(self, distance):
+        idx = self._index(distance)
+        return self.lats[idx], self.lons[idx]
+
+    def save(self, path):
+        np.savez_compressed(path, distances=self.distances, lats=self.lats, lons=self.lons,
+                            elevations=self.elevations, slopes=self.slopes, step=self.step)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["distances"], data["lats"], data["lons"], data["elevations"],
+                       data["slopes"], float(data["step"]))
+
+
+def build_profile(lats, lons, track_elevations=None, terrain=None, step=RESAMPLE_STEP_M, smoothing=SMOOTHING_M):
+    """Resample a track by distance and precompute elevation + smoothed slope."""
+    segment = haversine(lats[:-1], lons[:-1], lats[1:], lons[1:])
+    cumulative = np.concatenate(([0.0], np.cumsum(segment)))
+    # Drop repeated points (GPS pauses): np.interp needs increasing x
+    keep = np.concatenate(([True], np.diff(cumulative) > 0))
+    cumulative, lats, lons = cumulative[keep], lats[keep], lons[keep]
+
+    distances = np.arange(0.0, cumulative[-1] + step, step)
+    r_lats = np.interp(distances, cumulative, lats)
+    r_lons = np.interp(distances, cumulative, lons)
+
+    elevations = terrain.elevation(r_lats, r_lons) if terrain is not None else np.full(len(distances), np.nan)
+    if track_elevations is not None:
+        # Outside the DEM the GPS altitude of the track is the best we have
+        gps = np.interp(distances, cumulative, track_elevations[keep])
+        elevations = np.where(np.isnan(elevations), gps, elevations)
+    elevations = np.nan_to_num(elevations, nan=0.0)
+
+    window = max(1, int(round(smoothing / step)))
+    if window > 1 and len(elevations) > window:
+        padded = np.pad(elevations, (window // 2, window - 1 - window // 2), mode="edge")
+        smoothed = np.convolve(padded, np.ones(window) / window, mode="valid")
+    else:
+        smoothed = elevations
+    slopes = np.gradient(smoothed, step) * 100.0
+
+    return RouteProfile(distances, r_lats, r_lons, smoothed, slopes, step)
+
+
+def route_key(data: bytes, step, smoothing, dem_path):
+    digest = hashlib.sha256(data)
+    dem_mtime = os.path.getmtime(dem_path) if os.path.exists(dem_path) else 0
+    digest.update(f"{PROFILE_VERSION}|{step}|{smoothing}|{dem_mtime}".encode())
+    return digest.hexdigest()[:24]
+
+
+def load_route(path, terrain=None, step=RESAMPLE_STEP_M, smoothing=SMOOTHING_M, cache_dir=ROUTE_CACHE_DIR):
+    """Profile for a GPX/GeoJSON file, computed once and cached on disk by route hash."""
+    with open(path, "rb") as f:
+        data = f.read()
+    cache_path = os.path.join(cache_dir, route_key(data, step, smoothing, TERRAIN_TIF) + ".npz")
+    if os.path.exists(cache_path):
+        return RouteProfile.load(cache_path)
+
+    lats, lons, track_elevations = parse_track(data, path)
+    profile = build_profile(lats, lons, track_elevations, terrain or TerrainSampler(), step, smoothing)
+    os.makedirs(cache_dir, exist_ok=True)
+    profile.save(cache_path)
+    print(f"🗺️ Route profile cached: {profile.length / 1000:.2f} km -> {cache_path}")
+    return profile
+
+
+class RouteFollower:
+    """Position of many athletes on one route; each step is one vectorized lookup."""
+    def __init__(self, profile, twin_ids, speed_ms=3.0, loop=True):
+        self.profile = profile
+        self.twin_ids = list(twin_ids)
+        self.index = {twin_id: i for i, twin_id in enumerate(self.twin_ids)}
+        self.distances = np.zeros(len(self.twin_ids))
+        self.speeds = np.full(len(self.twin_ids), float(speed_ms))
+        self.loop = loop
+
+    def set_position(self, twin_id, distance_m=None, speed_ms=None):
+        i = self.index[twin_id]
+        if distance_m is not None:
+            self.distances[i] = float(distance_m)
+        if speed_ms is not None:
+            self.speeds[i] = float(speed_ms)
+
+    def advance(self, dt):
+        self.distances += self.speeds * dt
+        if self.loop and self.profile.length > 0:
+            self.distances %= self.profile.length
+        else:
+            np.minimum(self.distances, self.profile.length, out=self.distances)
+
+    def snapshot(self):
+        """One terrain payload per athlete, ready for heart/env/terrain."""
+        slopes = self.profile.slope_at(self.distances)
+        elevations = self.profile.elevation_at(self.distances)
+        lats, lons = self.profile.position_at(self.distances)
+        return [{"twin_id": twin_id, "distance_m": round(float(d), 1), "elevation": round(float(e), 1),
+                 "slope_percent": round(float(s), 2), "lat": float(la), "lon": float(lo)}
+                for twin_id, d, e, s, la, lo in zip(self.twin_ids, self.distances, elevations, slopes, lats, lons)]
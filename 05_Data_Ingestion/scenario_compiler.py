@@ -0,0 +1,177 @@
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+
+# Declarative workout scenarios -> dense input arrays for the engine.
+#
+# {"name": "intervals", "dt": 1.0, "seed": 7,
+#  "defaults": {"intensity": 0.1, "temperature": 20.0, "slope": 0.0},
+#  "segments": [
+#     {"duration": 300, "intensity": 0.2},                         hold
+#     {"duration": 600, "intensity": [0.2, 0.8]},                  linear ramp (start, end)
+#     {"repeat": 6, "segments": [{"duration": 60, "intensity": 0.9},
+#                                {"duration": 90, "intensity": 0.1}]},
+#     {"duration": 300, "temperature": 31, "slope": [0, 8]},
+#     {"duration": 600, "intensity": {"uniform": [0.1, 0.9], "every": 5}}   random, held 5 s
+#  ]}
+#
+# A channel left out of a segment keeps its last value (the end of a ramp; after a
+# random segment, the value it had before).
+CHANNELS = ("intensity", "temperature", "slope")
+DEFAULTS = {"intensity": 0.1, "temperature": 20.0, "slope": 0.0}
+COMPILER_VERSION = 1
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+SCENARIO_CACHE_DIR = os.getenv("SCENARIO_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets", "scenario_cache"))
+
+
+class CompiledScenario:
+    """Dense inputs at a fixed step: sample i covers [t[i], t[i] + dt)."""
+    def __init__(self, name, dt, intensity, temperature, slope, key):
+        self.name = name
+        self.dt = dt
+        self.intensity = intensity
+        self.temperature = temperature
+        self.slope = slope
+        self.key = key
+
+    def __len__(self):
+        return len(self.intensity)
+
+    @property
+    def t(self):
+        return np.arange(len(self)) * self.dt
+
+    @property
+    def duration(self):
+        return len(self) * self.dt
+
+    def at(self, i):
+        return {"intensity": float(self.intensity[i]), "temperature": float(self.temperature[i]),
+                "slope_percent": float(self.slope[i])}
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp_path, intensity=self.intensity, temperature=self.temperature, slope=self.slope,
+                            name=self.name, dt=self.dt, key=self.key)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(str(data["name"]), float(data["dt"]), data["intensity"], data["temperature"],
+                       data["slope"], str(data["key"]))
+
+
+def scenario_key(spec, dt):
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(f"{canonical}|{float(dt)}|{COMPILER_VERSION}".encode()).hexdigest()[:16]
+
+
+def _flatten(segments, depth=0):
+    """Nested repeats -> flat list of leaf segments (repeats are expanded by reference, not copied)."""
+    if depth > 16:
+        raise ValueError("Scenario nesting too deep")
+    leaves = []
+    for segment in segments:
+        if "repeat" in segment:
+            block = _flatten(segment["segments"], depth + 1)
+            leaves.extend(block * int(segment["repeat"]))
+        else:
+            if float(segment.get("duration", 0)) <= 0:
+                raise ValueError(f"Segment without a positive duration: {segment}")
+            leaves.append(segment)
+    return leaves
+
+
+def _channel(leaves, counts, channel, start_value, rng, dt):
+    """One dense channel: hold / ramp vectorized over all leaves, random segments filled in place."""
+    n_leaves = len(leaves)
+    starts, ends = np.empty(n_leaves), np.empty(n_leaves)
+    randoms = []
+    current = float(start_value)
+    for j, segment in enumerate(leaves):
+        value = segment.get(channel)
+        if isinstance(value, dict):
+            randoms.append((j, value))
+            starts[j] = ends[j] = current
+        elif isinstance(value, (list, tuple)):
+            starts[j], ends[j] = float(value[0]), float(value[1])
+            current = ends[j]
+        else:
+            current = current if value is None else float(value)
+            starts[j] = ends[j] = current
+
+    owner = np.repeat(np.arange(n_leaves), counts)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    fraction = (np.arange(len(owner)) - offsets[owner]) / counts[owner]
+    values = starts[owner] + (ends - starts)[owner] * fraction
+
+    for j, spec in randoms:
+        low, high = spec["uniform"]
+        n = int(counts[j])
+        every = max(1, int(round(float(spec.get("every", dt)) / dt)))
+        draws = rng.uniform(low, high, -(-n // every))
+        values[offsets[j]:offsets[j] + n] = np.repeat(draws, every)[:n]
+    return values
+
+
+def compile_scenario(spec, dt=None):
+    """Scenario dict -> CompiledScenario (float64 arrays, one sample per dt)."""
+    dt = float(dt or spec.get("dt", 1.0))
+    leaves = _flatten(spec["segments"])
+    if not leaves:
+        raise ValueError("Empty scenario")
+    counts = np.array([max(1, int(round(float(s["duration"]) / dt))) for s in leaves], dtype=np.int64)
+    defaults = {**DEFAULTS, **spec.get("defaults", {})}
+    rng = np.random.default_rng(spec.get("seed", 0))
+
+    arrays = {channel: _channel(leaves, counts, channel, defaults[channel], rng, dt) for channel in CHANNELS}
+    return CompiledScenario(spec.get("name", "scenario"), dt, arrays["intensity"], arrays["temperature"],
+                            arrays["slope"], scenario_key(spec, dt))
+
+
+def read_spec(source):
+    """A dict, a path to a .json file, or the name of a file in SCENARIO_DIR."""
+    if isinstance(source, dict):
+        return source
+    path = source if os.path.exists(source) else os.path.join(SCENARIO_DIR, f"{source}.json")
+    with open(path) as f:
+        return json.load(f)
+
+
+_memory = {}
+
+
+def load_scenario(source, dt=None, cache_dir=SCENARIO_CACHE_DIR):
+    """Compiled scenario, from memory, the on-disk cache (keyed by the scenario hash) or compiled now."""
+    spec = read_spec(source)
+    dt = float(dt or spec.get("dt", 1.0))
+    key = scenario_key(spec, dt)
+    if key in _memory:
+        return _memory[key]
+
+    path = os.path.join(cache_dir, f"{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        compiled = CompiledScenario.load(path)
+    else:
+        compiled = compile_scenario(spec, dt)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            compiled.save(path)
+    _memory[key] = compiled
+    return compiled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a workout scenario into dense input arrays")
+    parser.add_argument("scenario", help="scenario name (scenarios/<name>.json) or path")
+    parser.add_argument("--dt", type=float, default=None)
+    args = parser.parse_args()
+
+    compiled = load_scenario(args.scenario, args.dt)
+    print(f"🏋️ {compiled.name}: {len(compiled):,} steps of {compiled.dt:g}s ({compiled.duration / 60:.1f} min) | key {compiled.key}")
+    for channel in CHANNELS:
+        values = getattr(compiled, channel)
+        print(f"   {channel:>11}: min {values.min():.2f} | mean {values.mean():.2f} | max {values.max():.2f}")
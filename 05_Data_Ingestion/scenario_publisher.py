@@ -0,0 +1,108 @@
+import os
+import time
+import argparse
+import numpy as np
+from message_bus import build_transport
+from scenario_compiler import load_scenario
+
+# Real-time driver: one compiled scenario played for many twins through the transport
+SCENARIO = os.getenv("SCENARIO", "interval_training")
+SCENARIO_TWINS = [t for t in os.getenv("SCENARIO_TWINS", os.getenv("TWIN_ID", "default")).split(",") if t]
+SCENARIO_SPEED = float(os.getenv("SCENARIO_SPEED", "1"))         # 1 = real time, 0 = as fast as possible
+SCENARIO_STAGGER_S = float(os.getenv("SCENARIO_STAGGER_S", "0"))  # phase shift between consecutive twins
+REPORT_EVERY_S = 5.0
+
+# channel -> (topic, payload key), the topics the engine already listens to
+CHANNEL_TOPICS = {
+    "intensity": ("heart/physio/intensity", "intensity"),
+    "temperature": ("heart/env/temperature", "temp_c"),
+    "slope": ("heart/env/terrain", "slope_percent"),
+}
+
+
+class ScenarioPublisher:
+    """
+    Publishes scenario inputs for many twins. Twin k runs the scenario shifted by
+    k * stagger_s; with changes_only, a channel is sent only when its value changes
+    (holds cost nothing, which is what makes thousands of twins affordable).
+    """
+    def __init__(self, scenario, twin_ids, speed=SCENARIO_SPEED, stagger_s=SCENARIO_STAGGER_S, changes_only=True,
+                 channels=tuple(CHANNEL_TOPICS)):
+        self.scenario = scenario
+        self.twin_ids = list(twin_ids)
+        self.speed = speed
+        self.changes_only = changes_only
+        n = len(scenario)
+        self.phases = (np.arange(len(self.twin_ids)) * int(round(stagger_s / scenario.dt))) % n
+        # Only these channels are sent (e.g. no slope when the terrain service drives it)
+        self.channels = {channel: CHANNEL_TOPICS[channel] for channel in channels}
+        self.values = {channel: getattr(scenario, channel) for channel in self.channels}
+        # changed[i]: value at step i differs from step i - 1 (step 0 always sent)
+        self.changed = {channel: np.concatenate(([True], np.diff(values) != 0))
+                        for channel, values in self.values.items()}
+
+    def messages(self, step):
+        """(topic, payload) for every twin at scenario step `step` (absolute, before the phase shift)."""
+        n = len(self.scenario)
+        indexes = (step + self.phases) % n
+        first = step == 0
+        out = []
+        for channel, (topic, key) in self.channels.items():
+            values, changed = self.values[channel], self.changed[channel]
+            for twin_id, i in zip(self.twin_ids, indexes):
+                if self.changes_only and not first and not changed[i]:
+                    continue
+                payload = {key: round(float(values[i]), 4), "scenario": self.scenario.name}
+                if twin_id is not None:
+                    payload["twin_id"] = twin_id
+                out.append((topic, payload))
+        return out
+
+    def run(self, client, loop=False, steps=None):
+        """Play the scenario on a started transport; returns the number of messages sent."""
+        n = len(self.scenario)
+        steps = steps or (None if loop else n)
+        print(f"▶️ Scenario {self.scenario.name}: {n:,} steps of {self.scenario.dt:g}s for {len(self.twin_ids)} twins "
+              f"(speed {'max' if self.speed <= 0 else f'{self.speed:g}x'})")
+        start = time.perf_counter()
+        last_report, sent, sent_at_report = start, 0, 0
+        step = 0
+        while steps is None or step < steps:
+            if self.speed > 0:
+                delay = step * self.scenario.dt / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            for topic, payload in self.messages(step):
+                client.publish(topic, payload)
+                sent += 1
+            step += 1
+
+            now = time.perf_counter()
+            if now - last_report >= REPORT_EVERY_S:
+                rate = (sent - sent_at_report) / (now - last_report)
+                print(f"📡 [SCENARIO] step {step:,} | {sent:,} msgs | {rate:,.0f} msg/s")
+                last_report, sent_at_report = now, sent
+        elapsed = time.perf_counter() - start
+        print(f"✅ Scenario done: {step:,} steps, {sent:,} messages in {elapsed:.1f}s")
+        return sent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish a workout scenario to the engine(s)")
+    parser.add_argument("scenario", nargs="?", default=SCENARIO)
+    parser.add_argument("--twins", default=",".join(SCENARIO_TWINS), help="comma-separated twin ids")
+    parser.add_argument("--speed", type=float, default=SCENARIO_SPEED)
+    parser.add_argument("--stagger", type=float, default=SCENARIO_STAGGER_S)
+    parser.add_argument("--dt", type=float, default=None)
+    parser.add_argument("--channels", default=",".join(CHANNEL_TOPICS))
+    parser.add_argument("--loop", action="store_true")
+    args = parser.parse_args()
+
+    client = build_transport("Scenario_Publisher")
+    client.start()
+    publisher = ScenarioPublisher(load_scenario(args.scenario, args.dt), args.twins.split(","), args.speed, args.stagger,
+                                  channels=args.channels.split(","))
+    try:
+        publisher.run(client, loop=args.loop)
+    finally:
+        client.stop()
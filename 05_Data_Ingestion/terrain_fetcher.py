@@ -1,28 +1,53 @@
-import requests
 import time
-import json
 import os
-import paho.mqtt.client as mqtt
+from message_bus import build_transport, decode
+from terrain_sampler import TerrainSampler, haversine
+from route_profiles import load_route, RouteFollower
 
-# Public API: "https://api.open-elevation.com/api/v1/lookup"
-#  Docker: "http://localhost:8080/api/v1/lookup"
-ELEVATION_URL = "http://heart_elevation_server:8080/api/v1/lookup"
+# Elevation comes from the local DEM (02_Database/terrain_data), memory-mapped:
+# no open-elevation container, no HTTP round trip per point
 MQTT_BROKER = os.getenv("MQTT_HOST", "mqtt_broker")
 
-client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, "Terrain_Engine")
+# Route mode: athletes follow a GPX/GeoJSON track with a precomputed slope profile
+ROUTE_FILE = os.getenv("ROUTE_FILE", "")
+ROUTE_TWINS = [t for t in os.getenv("ROUTE_TWINS", os.getenv("TWIN_ID", "default")).split(",") if t]
+ROUTE_SPEED_MS = float(os.getenv("ROUTE_SPEED_MS", "3.0"))
+ROUTE_TICK_S = float(os.getenv("ROUTE_TICK_S", "1.0"))
+POSITION_TOPIC = "heart/env/position"   # {"twin_id", "distance_m"?, "speed_ms"?}
+
+client = build_transport("Terrain_Engine", host=MQTT_BROKER)
+terrain = TerrainSampler()
 
 def get_elevation(lat, lon):
-    try:
-        payload = {"locations": [{"latitude": lat, "longitude": lon}]}
-        response = requests.post(ELEVATION_URL, json=payload, timeout=5)
-        if response.status_code == 200:
-            return response.json()['results'][0]['elevation']
-    except Exception as e:
-        print(f"⚠️ Error de Elevación: {e}")
-    return 0
+    elevation = terrain.elevation(lat, lon)[0]
+    if elevation != elevation:  # NaN: outside the Geneva raster
+        print(f"⚠️ Error de Elevación: ({lat}, {lon}) fuera del mapa")
+        return 0
+    return float(elevation)
+
+def run_route_service():
+    profile = load_route(ROUTE_FILE, terrain=terrain)
+    follower = RouteFollower(profile, ROUTE_TWINS, speed_ms=ROUTE_SPEED_MS)
+    print(f"🗺️ Ruta {os.path.basename(ROUTE_FILE)}: {profile.length / 1000:.2f} km, {len(ROUTE_TWINS)} atletas")
+
+    def on_position(topic, payload):
+        try:
+            data = decode(payload)
+            follower.set_position(data["twin_id"], data.get("distance_m"), data.get("speed_ms"))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Posición inválida: {e}")
+
+    client.subscribe(POSITION_TOPIC, on_position)
+    client.start()
+
+    while True:
+        follower.advance(ROUTE_TICK_S)
+        for payload in follower.snapshot():
+            client.publish("heart/env/terrain", payload)
+        time.sleep(ROUTE_TICK_S)
 
 def run_terrain_service():
-    client.connect(MQTT_BROKER, 1883, 60)
+    client.start()
     
     # Test coordinates (Geneva - going up towards Salève)
     current_lat, current_lon = 46.2044, 6.1432
@@ -30,25 +55,29 @@ def run_terrain_service():
 
     while True:
         # Simulate movement: advance a bit the latitude (going up)
+        prev_lat = current_lat
         current_lat += 0.0001 
         current_elevation = get_elevation(current_lat, current_lon)
         
-        # Calculate slope (simplified): height difference
-        # In a real route, we would use the distance traveled
-        slope = (current_elevation - prev_elevation) / 10.0 # assuming 10m of advance
+        # Slope over the real distance travelled (haversine), not a fixed 10 m
+        distance = float(haversine(prev_lat, current_lon, current_lat, current_lon))
+        slope = (current_elevation - prev_elevation) / distance if distance > 0 else 0.0
         
         payload = {
-            "elevation": current_elevation,
+            "elevation": round(current_elevation, 1),
             "slope_percent": round(slope * 100, 2),
             "lat": current_lat,
             "lon": current_lon
         }
         
-        client.publish("heart/env/terrain", json.dumps(payload))
-        print(f"⛰️ Terreno: {current_elevation}m | Pendiente: {payload['slope_percent']}%")
+        client.publish("heart/env/terrain", payload)
+        print(f"⛰️ Terreno: {payload['elevation']}m | Pendiente: {payload['slope_percent']}%")
         
         prev_elevation = current_elevation
-        time.sleep(5) # Consultamos cada 5 seg para no saturar la API
+        time.sleep(5)
 
 if __name__ == "__main__":
-    run_terrain_service()
\ No newline at end of file
+    if ROUTE_FILE:
+        run_route_service()
+    else:
+        run_terrain_service()
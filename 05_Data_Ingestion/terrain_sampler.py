@@ -0,0 +1,115 @@
+import os
+import json
+import numpy as np
+
+DEFAULT_TIF = os.path.abspath(os.path.join(os.path.dirname(__file__), "../02_Database/terrain_data/geneva_terrain.tif"))
+TERRAIN_TIF = os.getenv("TERRAIN_TIF", DEFAULT_TIF)
+
+EARTH_RADIUS_M = 6371008.8
+NODATA = -32768
+# Pixels: points on the outermost pixel centers land a rounding error outside the grid
+EDGE_TOLERANCE = 1e-6
+
+# GeoTIFF tags (degrees per pixel / pixel -> lon, lat anchor)
+TAG_PIXEL_SCALE = 33550
+TAG_TIEPOINT = 33922
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters (vectorized)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def _decode_geotiff(tif_path, cache_path):
+    """Decompress the (LZW, tiled) GeoTIFF once into a raw .npy that can be memory-mapped."""
+    from PIL import Image
+    with Image.open(tif_path) as im:
+        raster = np.asarray(im).astype(np.int16)
+        scale = im.tag_v2.get(TAG_PIXEL_SCALE)
+        tiepoint = im.tag_v2.get(TAG_TIEPOINT)
+
+    if scale and tiepoint:
+        # Tiepoint: raster (i, j) -> (lon, lat) of the top-left pixel corner
+        geo = {"lon0": tiepoint[3] - tiepoint[0] * scale[0], "lat0": tiepoint[4] + tiepoint[1] * scale[1],
+               "dlon": scale[0], "dlat": scale[1]}
+    else:
+        # Fallback: bounds from summary.json ([lat_min, lat_max, lon_min, lon_max])
+        with open(os.path.join(os.path.dirname(tif_path), "summary.json")) as f:
+            lat_min, lat_max, lon_min, lon_max = json.load(f)[0]["coords"]
+        geo = {"lon0": lon_min, "lat0": lat_max,
+               "dlon": (lon_max - lon_min) / raster.shape[1], "dlat": (lat_max - lat_min) / raster.shape[0]}
+
+    try:
+        np.save(cache_path, raster)
+        with open(cache_path + ".json", "w") as f:
+            json.dump(geo, f)
+    except OSError:
+        # Read-only volume: keep the decoded raster in memory only
+        return raster, geo
+    return np.load(cache_path, mmap_mode="r"), geo
+
+
+class TerrainSampler:
+    """Elevation (m) and slope (%) from the local DEM, bilinear, batch queries."""
+    def __init__(self, tif_path=TERRAIN_TIF):
+        cache_path = os.path.splitext(tif_path)[0] + ".elev.npy"
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(tif_path):
+            self.raster = np.load(cache_path, mmap_mode="r")
+            with open(cache_path + ".json") as f:
+                geo = json.load(f)
+        else:
+            self.raster, geo = _decode_geotiff(tif_path, cache_path)
+
+        self.lon0, self.lat0 = geo["lon0"], geo["lat0"]
+        self.dlon, self.dlat = geo["dlon"], geo["dlat"]
+        self.rows, self.cols = self.raster.shape
+
+    @property
+    def bounds(self):
+        """(lat_min, lat_max, lon_min, lon_max)"""
+        return (self.lat0 - self.rows * self.dlat, self.lat0,
+                self.lon0, self.lon0 + self.cols * self.dlon)
+
+    def elevation(self, lats, lons):
+        """Bilinear elevation for arrays of points; NaN outside the raster or on nodata."""
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+
+        # Fractional position relative to pixel centers
+        x = (lons - self.lon0) / self.dlon - 0.5
+        y = (self.lat0 - lats) / self.dlat - 0.5
+        eps = EDGE_TOLERANCE
+        inside = (x >= -eps) & (x <= self.cols - 1 + eps) & (y >= -eps) & (y <= self.rows - 1 + eps)
+
+        x0 = np.clip(np.floor(x).astype(np.int64), 0, self.cols - 2)
+        y0 = np.clip(np.floor(y).astype(np.int64), 0, self.rows - 2)
+        fx = np.clip(x - x0, 0.0, 1.0)
+        fy = np.clip(y - y0, 0.0, 1.0)
+
+        z00 = self.raster[y0, x0].astype(np.float64)
+        z01 = self.raster[y0, x0 + 1].astype(np.float64)
+        z10 = self.raster[y0 + 1, x0].astype(np.float64)
+        z11 = self.raster[y0 + 1, x0 + 1].astype(np.float64)
+        w00, w01, w10, w11 = (1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy
+        # Only a neighbour that actually contributes makes the sample nodata
+        nodata = (((z00 == NODATA) & (w00 > 0)) | ((z01 == NODATA) & (w01 > 0)) |
+                  ((z10 == NODATA) & (w10 > 0)) | ((z11 == NODATA) & (w11 > 0)))
+
+        z = z00 * w00 + z01 * w01 + z10 * w10 + z11 * w11
+        return np.where(inside & ~nodata, z, np.nan)
+
+    def path_slope(self, lats, lons):
+        """
+        Slope (%) of each segment of a path, using the real haversine distance.
+        Returns (elevations, distances_m, slopes_percent); the last two have len(path) - 1.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        elevations = self.elevation(lats, lons)
+        distances = haversine(lats[:-1], lons[:-1], lats[1:], lons[1:])
+        rise = np.diff(elevations)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slopes = np.where(distances > 0, rise / distances * 100.0, 0.0)
+        return elevations, distances, slopes
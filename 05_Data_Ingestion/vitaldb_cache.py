@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Resampled tracks are stored once per (case_id, tracks, interval, source): re-runs do no network I/O
+VITALDB_CACHE_DIR = os.getenv("VITALDB_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets", "vitaldb_cache"))
+# Optional local stand-in for the VitalDB server: <case_id>.vital or <case_id>.csv (Time + track columns)
+VITALDB_SOURCE_DIR = os.getenv("VITALDB_SOURCE_DIR", "")
+VITALDB_WORKERS = int(os.getenv("VITALDB_WORKERS", "8"))
+
+
+def case_key(case_id, tracks, interval, source_dir=""):
+    """Cache entry name; a local source directory gets its own entries (the server keeps the plain key)."""
+    key = f"{int(case_id)}|{','.join(tracks)}|{float(interval)}"
+    if source_dir:
+        key += f"|{os.path.abspath(source_dir)}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return f"case_{int(case_id)}_{digest}"
+
+
+def _read_local_csv(path, tracks, interval):
+    """Same layout as VitalFile.to_numpy: row i holds the samples of [i*interval, (i+1)*interval)."""
+    frame = pd.read_csv(path)
+    times = frame["Time"].to_numpy(np.float64)
+    rows = np.floor((times - times.min()) / interval).astype(np.int64)
+    values = np.full((int(rows.max()) + 1, len(tracks)), np.nan, dtype=np.float32)
+    for j, track in enumerate(tracks):
+        if track in frame:
+            column = frame[track].to_numpy(np.float32)
+            valid = ~np.isnan(column)
+            values[rows[valid], j] = column[valid]
+    return values
+
+
+def _download(case_id, tracks, interval, source_dir=""):
+    if source_dir:
+        csv_path = os.path.join(source_dir, f"{case_id}.csv")
+        if os.path.exists(csv_path):
+            return _read_local_csv(csv_path, tracks, interval)
+        vital_path = os.path.join(source_dir, f"{case_id}.vital")
+        if os.path.exists(vital_path):
+            import vitaldb
+            return vitaldb.VitalFile(vital_path, tracks).to_numpy(tracks, interval).astype(np.float32)
+        raise FileNotFoundError(f"Case {case_id} not in {source_dir}")
+
+    import vitaldb
+    return vitaldb.VitalFile(int(case_id), tracks).to_numpy(tracks, interval).astype(np.float32)
+
+
+def load_tracks(case_id, tracks, interval=1.0, cache_dir=VITALDB_CACHE_DIR, source_dir=None):
+    """(n_samples, len(tracks)) float32 array, like vitaldb.load_case, served from the local cache."""
+    tracks = list(tracks)
+    source_dir = VITALDB_SOURCE_DIR if source_dir is None else source_dir
+    path = os.path.join(cache_dir, case_key(case_id, tracks, interval, source_dir) + ".npz")
+    if os.path.exists(path):
+        with np.load(path) as data:
+            return data["values"]
+
+    values = _download(case_id, tracks, interval, source_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write then rename: a parallel reader never sees a half-written file. One temp file per
+    # writer thread: fetch_cases may load the same case twice at once
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    np.savez_compressed(tmp_path, values=values, tracks=np.array(tracks), interval=float(interval), case_id=int(case_id))
+    os.replace(tmp_path, path)
+    return values
+
+
+def load_frame(case_id, tracks, interval=1.0, cache_dir=VITALDB_CACHE_DIR, source_dir=None):
+    """Same tracks as a DataFrame (columns = track names), like VitalFile.to_pandas."""
+    tracks = list(tracks)
+    return pd.DataFrame(load_tracks(case_id, tracks, interval, cache_dir, source_dir), columns=tracks)
+
+
+def find_cases(tracks, cache_dir=VITALDB_CACHE_DIR):
+    """vitaldb.find_cases, remembered on disk (the track index is a download too)."""
+    tracks = list(tracks)
+    path = os.path.join(cache_dir, "find_" + hashlib.sha1(",".join(tracks).encode()).hexdigest()[:12] + ".json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    import vitaldb
+    case_ids = [int(case_id) for case_id in vitaldb.find_cases(tracks)]
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(case_ids, f)
+    return case_ids
+
+
+def fetch_cases(case_ids, tracks, interval=1.0, workers=VITALDB_WORKERS, cache_dir=VITALDB_CACHE_DIR, source_dir=None):
+    """
+    Warm the cache for many cases with a thread pool (downloads are I/O bound).
+    Returns {case_id: n_samples or the error message}.
+    """
+    def fetch(case_id):
+        try:
+            return case_id, len(load_tracks(case_id, tracks, interval, cache_dir, source_dir))
+        except Exception as e:
+            return case_id, f"error: {e}"
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(pool.map(fetch, case_ids))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download VitalDB cases into the local track cache")
+    parser.add_argument("case_ids", nargs="*", type=int, help="cases to fetch (default: every case with the tracks)")
+    parser.add_argument("--tracks", default="Solar8000/HR,Orchestra/PPF20_CE")
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--limit", type=int, default=20, help="max cases when no ids are given")
+    parser.add_argument("--workers", type=int, default=VITALDB_WORKERS)
+    args = parser.parse_args()
+
+    tracks = args.tracks.split(",")
+    case_ids = args.case_ids or find_cases(tracks)[:args.limit]
+    print(f"🏥 Caching {len(case_ids)} VitalDB cases ({len(tracks)} tracks, {args.interval}s) with {args.workers} workers...")
+    results = fetch_cases(case_ids, tracks, args.interval, args.workers)
+    failed = {c: r for c, r in results.items() if isinstance(r, str)}
+    print(f"✅ {len(results) - len(failed)} cases cached in {VITALDB_CACHE_DIR}")
+    for case_id, error in failed.items():
+        print(f"❌ Case {case_id}: {error}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import heapq
+import random
+import socket
+import asyncio
+import argparse
+import paho.mqtt.client as mqtt
+
+# Synthetic sensor fleet: thousands of virtual devices on ONE asyncio loop, multiplexed
+# over a few MQTT connections to the local Mosquitto, publishing on the engine's topics.
+# Tracked payloads carry run / sensor_id / seq / sent_at: the engine counts them
+# (simulation_engine/ingest_stats.py) and answers on heart/admin/ingest/<twin_id>.
+MQTT_HOST = os.getenv("MQTT_HOST", "localhost")
+MQTT_PORT = int(os.getenv("MQTT_PORT", "1883"))
+INGEST_TOPIC = "heart/admin/ingest"
+REPORT_EVERY_S = 5.0
+
+# --channel -> (topic, value key, value range)
+CHANNELS = {
+    "sensor": ("heart/sensor/data", "bpm", (55.0, 185.0)),
+    "intensity": ("heart/physio/intensity", "intensity", (0.0, 1.0)),
+    "temperature": ("heart/env/temperature", "temp_c", (-5.0, 35.0)),
+    "terrain": ("heart/env/terrain", "slope_percent", (-10.0, 10.0)),
+}
+FORMATS = ("json", "compact", "raw")
+
+
+class AsyncioMQTT:
+    """One paho client driven by the asyncio loop (socket callbacks, no network thread)."""
+    def __init__(self, loop, client_id):
+        self.loop = loop
+        self.connected = loop.create_future()
+        self.misc = None
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id)
+        self.client.on_connect = self._on_connect
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = lambda c, u, sock: self.loop.add_writer(sock, c.loop_write)
+        self.client.on_socket_unregister_write = lambda c, u, sock: self.loop.remove_writer(sock)
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
+        if not self.connected.done():
+            self.connected.set_result(rc)
+
+    def _on_socket_open(self, client, userdata, sock):
+        self.loop.add_reader(sock, client.loop_read)
+        self.misc = self.loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):
+        self.loop.remove_reader(sock)
+        if self.misc:
+            self.misc.cancel()
+
+    async def _misc_loop(self):
+        while self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+    async def connect(self, host=MQTT_HOST, port=MQTT_PORT):
+        self.client.connect(host, port, 60)
+        self.client.socket().setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        rc = await asyncio.wait_for(self.connected, 10)
+        if rc != 0:
+            raise ConnectionError(f"MQTT connect refused: {rc}")
+
+    def publish(self, topic, payload, qos=0):
+        return self.client.publish(topic, payload, qos=qos).rc
+
+    def disconnect(self):
+        self.client.disconnect()
+
+
+class Fleet:
+    """
+    Device i publishes `burst` messages every burst / rate_hz seconds (same mean rate),
+    each period stretched by +-jitter. Devices start spread over one period unless aligned.
+    """
+    def __init__(self, devices, rate_hz=1.0, jitter=0.1, burst=1, payload_format="json", channel="sensor",
+                 qos=0, pad_bytes=0, align=False, run_id=None, seed=0):
+        if payload_format not in FORMATS:
+            raise ValueError(f"Unknown payload format: {payload_format} ({', '.join(FORMATS)})")
+        self.devices = devices
+        self.period = burst / rate_hz
+        self.jitter = jitter
+        self.burst = burst
+        self.format = payload_format
+        self.topic, self.key, (self.low, self.high) = CHANNELS[channel]
+        self.qos = qos
+        self.pad = "x" * pad_bytes
+        self.align = align
+        self.run_id = run_id or f"fleet-{int(time.time())}"
+        self.rng = random.Random(seed)
+
+        self.sensor_ids = [f"FLEET_{i:06d}" for i in range(devices)]
+        self.values = [self.rng.uniform(self.low, self.high) for _ in range(devices)]
+        self.seqs = [0] * devices
+        self.sent = 0
+        self.errors = 0
+        self.max_lag = 0.0
+
+    def payload(self, i):
+        # Bounded random walk per device
+        span = self.high - self.low
+        value = min(self.high, max(self.low, self.values[i] + self.rng.uniform(-0.02, 0.02) * span))
+        self.values[i] = value
+        if self.format == "raw":
+            return f"{value:.2f}"
+        seq = self.seqs[i]
+        self.seqs[i] = seq + 1
+        message = {self.key: round(value, 2), "sensor_id": self.sensor_ids[i], "seq": seq,
+                   "sent_at": time.time(), "run": self.run_id}
+        if self.format == "compact":
+            return json.dumps(message, separators=(",", ":"))
+        message.update({"twin_id": f"fleet_{i}", "timestamp": message["sent_at"], "unit": self.key})
+        if self.pad:
+            message["pad"] = self.pad
+        return json.dumps(message)
+
+    async def run(self, connections, duration_s, on_report=None):
+        """Publish for `duration_s`; one heap of due times schedules every device."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        heap = [(start + (0.0 if self.align else self.rng.uniform(0, self.period)), i) for i in range(self.devices)]
+        heapq.heapify(heap)
+        end = start + duration_s
+        last_report, sent_at_report = start, 0
+        n_conn = len(connections)
+
+        while heap and heap[0][0] < end:
+            now = loop.time()
+            published = 0
+            # Everything already due, in bounded slices so the sockets get written in between
+            while heap and heap[0][0] <= now and published < 5000:
+                due, i = heapq.heappop(heap)
+                self.max_lag = max(self.max_lag, now - due)
+                connection = connections[i % n_conn]
+                for _ in range(self.burst):
+                    if connection.publish(self.topic, self.payload(i), self.qos) != mqtt.MQTT_ERR_SUCCESS:
+                        self.errors += 1
+                    self.sent += 1
+                    published += 1
+                step = self.period * (1.0 + self.rng.uniform(-self.jitter, self.jitter))
+                heapq.heappush(heap, (due + step, i))
+
+            if now - last_report >= REPORT_EVERY_S:
+                rate = (self.sent - sent_at_report) / (now - last_report)
+                if on_report:
+                    on_report(self.sent, rate, self.max_lag)
+                last_report, sent_at_report, self.max_lag = now, self.sent, 0.0
+            await asyncio.sleep(max(0.0, min(heap[0][0], end) - loop.time()) if published < 5000 else 0)
+        return self.sent
+
+
+async def main(args):
+    loop = asyncio.get_running_loop()
+    connections = [AsyncioMQTT(loop, f"fleet_{os.getpid()}_{k}") for k in range(args.connections)]
+    for connection in connections:
+        await connection.connect(args.host, args.port)
+
+    fleet = Fleet(args.devices, args.rate, args.jitter, args.burst, args.format, args.channel, args.qos,
+                  args.pad, args.align)
+    engine_reports = {}
+
+    def on_engine_report(client, userdata, msg):
+        report = json.loads(msg.payload)
+        if report.get("run") == fleet.run_id:
+            engine_reports[msg.topic] = report
+
+    connections[0].client.on_message = on_engine_report
+    connections[0].client.subscribe(f"{INGEST_TOPIC}/#", qos=1)
+
+    def on_report(sent, rate, lag):
+        engine = ", ".join(f"{r['received']:,} recv / {r.get('latency_ms', {}).get('p50', '-')} ms p50"
+                           for r in engine_reports.values()) or "no engine report yet"
+        print(f"📡 [FLEET] {sent:,} sent | {rate:,.0f} msg/s | sched lag {lag * 1000:.0f} ms | engine: {engine}")
+
+    print(f"🚀 Fleet {fleet.run_id}: {args.devices:,} devices x {args.rate:g} Hz (burst {args.burst}, jitter "
+          f"{args.jitter:.0%}, {args.format}) on {args.connections} connections -> {fleet.topic}")
+    start = time.perf_counter()
+    sent = await fleet.run(connections, args.duration, on_report)
+    elapsed = time.perf_counter() - start
+
+    # Drain, then ask the engine(s) for the final numbers of this run
+    await asyncio.sleep(args.drain)
+    if args.format != "raw":
+        engine_reports.clear()
+        marker = json.dumps({"run": fleet.run_id, "fleet_end": True, "sensor_id": "fleet"})
+        connections[0].publish(fleet.topic, marker, qos=1)
+        for _ in range(50):
+            if any(r.get("final") for r in engine_reports.values()):
+                break
+            await asyncio.sleep(0.1)
+
+    print(f"\n✅ Sent {sent:,} messages in {elapsed:.1f}s = {sent / elapsed:,.0f} msg/s "
+          f"({fleet.errors:,} publish errors)")
+    if args.format == "raw":
+        print("ℹ️ raw payloads carry no sequence numbers: loss and latency are not measurable")
+    elif not engine_reports:
+        print("⚠️ No engine report: is the engine running and subscribed to this topic?")
+    for topic, report in engine_reports.items():
+        received = report["received"]
+        loss = sent - received
+        print(f"🫀 {topic.rsplit('/', 1)[-1]}: received {received:,} ({loss:,} lost = {loss / max(sent, 1):.2%}, "
+              f"{report['lost']:,} seq gaps, {report['out_of_order']:,} out of order) at {report['rate_msg_s']:,.0f} msg/s")
+        if "latency_ms" in report:
+            lat = report["latency_ms"]
+            print(f"   latency p50 {lat['p50']} ms | p95 {lat['p95']} ms | p99 {lat['p99']} ms | max {lat['max']} ms")
+
+    for connection in connections:
+        connection.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asyncio synthetic sensor fleet for engine ingest benchmarks")
+    parser.add_argument("--devices", type=int, default=10_000)
+    parser.add_argument("--rate", type=float, default=1.0, help="messages per second per device")
+    parser.add_argument("--jitter", type=float, default=0.1, help="+- fraction of each period")
+    parser.add_argument("--burst", type=int, default=1, help="messages sent back to back per wake-up")
+    parser.add_argument("--align", action="store_true", help="all devices start together (worst-case bursts)")
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--pad", type=int, default=0, help="extra payload bytes (json format)")
+    parser.add_argument("--channel", choices=sorted(CHANNELS), default="sensor")
+    parser.add_argument("--qos", type=int, choices=(0, 1), default=0)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--drain", type=float, default=3.0, help="seconds to wait before the final engine report")
+    parser.add_argument("--host", default=MQTT_HOST)
+    parser.add_argument("--port", type=int, default=MQTT_PORT)
+    asyncio.run(main(parser.parse_args()))
@@ -4,6 +4,7 @@ CREATE EXTENSION IF NOT EXISTS timescaledb;
 -- 2. Table of heart metrics (Here we add SLOPE)
 CREATE TABLE IF NOT EXISTS heart_metrics (
     time            TIMESTAMPTZ       NOT NULL, 
+    twin_id         VARCHAR(64)       NOT NULL DEFAULT 'default', -- Compression segment
     bpm             DOUBLE PRECISION  NOT NULL,
     trimp           DOUBLE PRECISION  NOT NULL,
     eccentric_load  DOUBLE PRECISION,
@@ -27,6 +28,8 @@ CREATE TABLE IF NOT EXISTS environmental_metrics (
 );
 
 -- 4. Convert both to Hypertables (TimescaleDB Optimization)
+-- (chunk interval, compression, retention and rollups are applied by the
+--  application on startup: see 01_Backend_Simulation/api/schema.py)
 SELECT create_hypertable('heart_metrics', 'time', if_not_exists => TRUE);
 SELECT create_hypertable('environmental_metrics', 'time', if_not_exists => TRUE);
 
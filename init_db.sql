@@ -4,6 +4,7 @@ CREATE EXTENSION IF NOT EXISTS timescaledb;
 -- 2. Metrics table (Synchronized with Python)
 CREATE TABLE IF NOT EXISTS heart_metrics (
     time            TIMESTAMPTZ       NOT NULL, 
+    twin_id         VARCHAR(64)       NOT NULL DEFAULT 'default', -- Compression segment
     bpm             DOUBLE PRECISION  NOT NULL,
     trimp           DOUBLE PRECISION  NOT NULL,
     eccentric_load  DOUBLE PRECISION,
@@ -18,6 +19,8 @@ CREATE TABLE IF NOT EXISTS heart_metrics (
 );
 
 -- 3. Convert to Hypertable using the correct column
+-- (chunk interval, compression, retention and rollups are applied by the
+--  application on startup: see 01_Backend_Simulation/api/schema.py)
 SELECT create_hypertable('heart_metrics', 'time', if_not_exists => TRUE);
 
 -- 4. State table
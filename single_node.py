@@ -0,0 +1,55 @@
+import os
+import sys
+import argparse
+import threading
+
+# Ingest, simulate and serve in ONE process: the services talk through the in-process
+# bus (message_bus.LocalBus) instead of Mosquitto. Postgres is still used for history.
+os.environ["TRANSPORT"] = "local"   # before any service module builds its transport
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT, "01_Backend_Simulation"))
+sys.path.append(os.path.join(ROOT, "05_Data_Ingestion"))
+
+
+def start_thread(target, name):
+    thread = threading.Thread(target=target, daemon=True, name=name)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-node Digital Twin: ingestor + engine + API over the local bus")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--no-ingestor", action="store_true", help="no sensor replay (inputs from the API/tests only)")
+    parser.add_argument("--climate", action="store_true", help="run the climate fetcher too")
+    parser.add_argument("--terrain", action="store_true", help="run the terrain/route service too (needs the DEM)")
+    args = parser.parse_args()
+
+    import uvicorn
+    from api.main import app
+    from simulation_engine.worker import HeartEngineWorker
+
+    seed = os.getenv("ENGINE_SEED")
+    worker = HeartEngineWorker(seed=int(seed) if seed else None, record_path=os.getenv("RECORD_PATH"))
+    start_thread(worker.run, "heart-engine")
+
+    if not args.no_ingestor:
+        import heart_data_ingestor
+        start_thread(heart_data_ingestor.run_ingestor, "heart-ingestor")
+    if args.climate:
+        import climate_fetcher
+        start_thread(climate_fetcher.run_scheduler, "heart-climate")
+    if args.terrain:
+        import terrain_fetcher
+        start_thread(terrain_fetcher.run_route_service if terrain_fetcher.ROUTE_FILE
+                     else terrain_fetcher.run_terrain_service, "heart-terrain")
+
+    print(f"🫀 Single-node Digital Twin on http://{args.host}:{args.port} (local bus, no broker)")
+    # The API lifespan starts the alert/live hub on the same bus
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()